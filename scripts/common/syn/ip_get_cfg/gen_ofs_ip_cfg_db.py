@@ -0,0 +1,992 @@
+#!/usr/bin/env python
+# Copyright 2023 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+'''
+Generate the ofs_ip_cfg_db configuration headers directly from .ip files,
+without Quartus. Python equivalent of gen_ofs_ip_cfg_db.tcl/ofs_ip_cfg_db.tcl
+and the IP-specific *_get_cfg.tcl scripts: the headers written are the same
+byte for byte. Only headers whose content changes are rewritten.
+
+Run from the Quartus project directory:
+
+    gen_ofs_ip_cfg_db.py --tcl <project>.qsf
+    gen_ofs_ip_cfg_db.py --ip ../ip_lib/ipss/pcie/qip/pcie_ss.ip pcie_ss pcie_ss_get_cfg.tcl
+'''
+
+import argparse
+import fnmatch
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', '..', '..', 'tools', 'ofss_config', 'utils'))
+from ip_reader import IPFile  # noqa: E402
+
+
+DB_DIR = 'ofs_ip_cfg_db'
+WRAPPER = 'ofs_ip_cfg_db.vh'
+
+README = '''This directory is generated by the OFS common script ofs_ip_cfg_db.tcl.
+It contains parameters extracted from IP. The extraction runs as a
+post-module hook after ipgenerate.
+
+The names of IP files to parse are added by projects to the
+::ofs_ip_cfg_db::ip_db Tcl dictionary, defined and managed in
+ofs_ip_cfg_db.tcl.
+'''
+
+SOURCE_TCL_RE = re.compile(r'^\s*set_global_assignment\s+-name\s+SOURCE_TCL_SCRIPT_FILE\s+(\S+)')
+IP_DB_RE = re.compile(r'^\s*dict\s+set\s+(?:::)?ofs_ip_cfg_db::ip_db\s+(\S+)\s+\[\s*list\s+(\S+)\s+(\S+)\s*\]')
+TCL_ENV_RE = re.compile(r'\$(?:::)?env\((\w+)\)')
+TCL_INT_RE = re.compile(r'[+-]?(0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|0[0-7]*|[1-9][0-9]*)$')
+TCL_FLOAT_RE = re.compile(r'[+-]?(\d+\.\d*|\.\d+|\d+(?=[eE]))([eE][+-]?\d+)?$')
+TCL_TRUE = ('true', 'yes', 'on')
+TCL_FALSE = ('false', 'no', 'off')
+
+
+class IPCfgError(Exception):
+    ''' Error the equivalent Tcl script would stop on '''
+
+
+class IPCfgSkip(IPCfgError):
+    ''' Header that only the Quartus flow can generate. The other headers are still written. '''
+
+
+class TclArray(dict):
+    ''' Dictionary failing like a Tcl array on a missing element '''
+    def __init__(self, name, *args):
+        super().__init__(*args)
+        self.name = name
+
+    def __missing__(self, key):
+        raise IPCfgError('can\'t read "%s(%s)": no such element in array' % (self.name, key))
+
+
+#
+# Tcl value semantics. The generated headers must match the Tcl scripts
+# exactly, including how they compare and order values.
+#
+
+def tcl_number(value):
+    '''
+    Numeric value of a Tcl string, or None when Tcl treats it as a plain string
+    '''
+    value = str(value).strip()
+    if TCL_INT_RE.match(value):
+        sign = -1 if value.startswith('-') else 1
+        digits = value.lstrip('+-')
+        if len(digits) > 1 and digits[0] == '0' and digits[1].isdigit():
+            return sign * int(digits, 8)
+        return sign * int(digits, 0)
+    if TCL_FLOAT_RE.match(value):
+        return float(value)
+
+    return None
+
+
+def tcl_compare(a, b):
+    '''
+    Compare like Tcl's expr: numerically if both values are numbers, otherwise as strings
+    '''
+    num_a, num_b = tcl_number(a), tcl_number(b)
+    if num_a is None or num_b is None:
+        num_a, num_b = str(a), str(b)
+
+    return (num_a > num_b) - (num_a < num_b)
+
+
+def tcl_bool(value):
+    number = tcl_number(value)
+    if number is not None:
+        return number != 0
+
+    word = str(value).strip().lower()
+    if word and len([w for w in TCL_TRUE + TCL_FALSE if w.startswith(word)]) == 1:
+        return any(w.startswith(word) for w in TCL_TRUE)
+
+    raise IPCfgError('expected boolean value but got "%s"' % value)
+
+
+def tcl_split(value):
+    ''' Tcl split on whitespace: consecutive separators give empty elements '''
+    return re.split(r'[ \t\n\r]', value) if value else []
+
+
+def tcl_hash(key):
+    ''' Tcl 8.6 hash of an array element name '''
+    result = 0
+    for c in key.encode('utf-8'):
+        result = (result + (result << 3) + c) & 0xffffffff
+
+    return result
+
+
+def tcl_array_order(keys):
+    '''
+    Order of 'array names' and 'array get' in Tcl 8.6 for an array whose
+    elements were first set in the order of 'keys'. Tcl walks its hash
+    buckets in order; new entries go at the head of their bucket and the
+    table grows 4x, rehashing, when it holds 3 entries per bucket.
+    '''
+    mask = 3
+    rebuild_size = 12
+    buckets = [[] for _ in range(mask + 1)]
+    count = 0
+    for key in dict.fromkeys(keys):
+        h = tcl_hash(key)
+        buckets[h & mask].insert(0, (h, key))
+        count += 1
+        if count >= rebuild_size:
+            mask = (mask << 2) + 3
+            rebuild_size *= 4
+            old_buckets = buckets
+            buckets = [[] for _ in range(mask + 1)]
+            for chain in old_buckets:
+                for h, key in chain:
+                    buckets[h & mask].insert(0, (h, key))
+
+    return [key for chain in buckets for _, key in chain]
+
+
+class HeaderWriter:
+    ''' Collects output the way the Tcl scripts' puts builds it '''
+    def __init__(self):
+        self.text = []
+
+    def puts(self, line='', nonewline=False):
+        self.text.append(line if nonewline else line + '\n')
+
+    def getvalue(self):
+        return ''.join(self.text)
+
+    def begin(self, script, ip_name):
+        self.puts('//')
+        self.puts('// Generated by OFS script %s using qsys-script' % script)
+        self.puts('//')
+        self.puts('')
+        self.puts('`ifndef __OFS_FIM_IP_CFG_%s__' % ip_name)
+        self.puts('`define __OFS_FIM_IP_CFG_%s__ 1' % ip_name)
+        self.puts('')
+
+
+def get_instance_parameters(ip):
+    ''' The IP instance's parameters, in declaration order, empty values as '' '''
+    return TclArray('instance_parameter', (
+        (name, param.value or '') for name, param in ip.altera_module_parameters.items()
+    ))
+
+
+def get_interface_ports(ip, interface):
+    if interface not in ip.interfaces:
+        raise IPCfgError('%s: no interface %s' % (ip.ip_file, interface))
+    return ip.interfaces[interface]
+
+
+def get_port_width(ip, port):
+    width = ip.port_widths.get(port)
+    if width is None:
+        raise IPCfgError('%s: unknown width of port %s' % (ip.ip_file, port))
+    return width
+
+
+#
+# IP-specific generators, one per *_get_cfg.tcl script
+#
+
+def get_iopll_actual_mhz(clocks, clk_num):
+    '''
+    Actual frequency of IOPLL output clk_num in MHz, formatted as Platform
+    Designer stores frequencies. It is either stored in the IP, or computed
+    exactly from the M, N and C counters when advanced parameters are enabled
+    (the counters the PLL is programmed with). Otherwise the counters are
+    chosen by the PLL solver in Quartus, and the header is skipped.
+    '''
+    key = 'actual_output_clock_frequency%d' % clk_num
+    if key in clocks:
+        return clocks[key]
+
+    if (tcl_bool(clocks.get('en_adv_params', 'false')) and clocks.get('pll_mode') == 'Integer-N PLL'
+            and not tcl_bool(clocks.get('cascade_counter%d' % clk_num, 'false'))):
+        mhz = (tcl_number(clocks['reference_clock_frequency']) * tcl_number(clocks['multiply_factor'])
+               / (tcl_number(clocks['divide_factor_n']) * tcl_number(clocks['divide_factor_c%d' % clk_num])))
+        return repr(round(mhz, 6))
+
+    raise IPCfgSkip('the actual frequency of clock %d (%s) is chosen by the Quartus PLL solver and '
+                    'is not stored in the IP file. Generate this header with gen_ofs_ip_cfg_db.tcl '
+                    '(qsys-script)' % (clk_num, clocks['clock_name_string%d' % clk_num]))
+
+
+def emit_iopll_cfg(ip, ip_name):
+    '''
+    iopll_get_cfg.tcl. The actual output frequencies are derived parameters
+    that the .ip file normally doesn't store. They are never estimated, see
+    get_iopll_actual_mhz().
+    '''
+    of = HeaderWriter()
+    of.begin('iopll_get_cfg.tcl', ip_name)
+
+    clocks = TclArray('clocks')
+    for p, value in get_instance_parameters(ip).items():
+        match = re.match('^gui_(.*)', p)
+        if match:
+            clocks[match.group(1)] = value
+
+    of.puts('//')
+    of.puts('// Clock frequencies and names')
+    of.puts('//')
+
+    n_clocks = clocks['number_of_clocks']
+
+    clk_num = 0
+    while tcl_compare(clk_num, n_clocks) < 0:
+        # Exit when a clock name is undefined.
+        if 'clock_name_string%d' % clk_num not in clocks:
+            break
+
+        mhz = clocks['output_clock_frequency%d' % clk_num]
+        if tcl_compare(mhz, 0) > 0:
+            mhz_actual = get_iopll_actual_mhz(clocks, clk_num)
+            name = clocks['clock_name_string%d' % clk_num]
+            of.puts('`define OFS_FIM_IP_CFG_%s_CLK%d_NAME     %s' % (ip_name, clk_num, name))
+            of.puts('`define OFS_FIM_IP_CFG_%s_CLK%d_MHZ      %s' % (ip_name, clk_num, mhz_actual))
+            of.puts('`define OFS_FIM_IP_CFG_%s_CLK%d_TGT_MHZ  %s' % (ip_name, clk_num, mhz))
+
+            of.puts('// Same information, indexed by the clock\'s name')
+            clk_name = name.upper()
+            # Remove leading "CLK_" from name
+            if clk_name.startswith('CLK_'):
+                clk_name = clk_name[4:1001]
+            of.puts('`define OFS_FIM_IP_CFG_%s_%s_NUM      %d' % (ip_name, clk_name, clk_num))
+            of.puts('`define OFS_FIM_IP_CFG_%s_%s_MHZ      %s' % (ip_name, clk_name, mhz_actual))
+            of.puts('`define OFS_FIM_IP_CFG_%s_%s_TGT_MHZ  %s' % (ip_name, clk_name, mhz))
+
+            of.puts('')
+        clk_num += 1
+
+    of.puts('`endif // `ifndef __OFS_FIM_IP_CFG_%s__' % ip_name)
+    return of.getvalue()
+
+
+def get_cfg_enable_pf_vec(core, max_pf_num, name_prefix, name_suffix):
+    '''
+    One entry per PF, 1 if ${name_prefix}<pf_num>${name_suffix} is non-zero in core
+    '''
+    return [int(tcl_compare(core['%s%d%s' % (name_prefix, pf_num, name_suffix)], 0) > 0)
+            for pf_num in range(max_pf_num + 1)]
+
+
+def emit_pcie_ss_cfg(ip, ip_name):
+    ''' pcie_ss_get_cfg.tcl '''
+    of = HeaderWriter()
+    of.begin('pcie_ss_get_cfg.tcl', ip_name)
+
+    params = get_instance_parameters(ip)
+
+    # Figure out which PCIe width is active. Only one instance of
+    # "core<width>_pf0_pci_type0_device_id_hwtcl" is expected to have a non-zero value.
+    width = 0
+    for p in params:
+        match = re.search(r'core([0-9]+)_pf0_pci_type0_device_id_hwtcl', p)
+        if match and tcl_compare(params['core%s_pf0_pci_type0_device_id_hwtcl' % match.group(1)], 0) != 0:
+            width = match.group(1)
+            break
+
+    if tcl_compare(width, 0) == 0:
+        raise IPCfgError('Did not find an active PCIe width')
+
+    interfaces = list(ip.interfaces)
+
+    core = TclArray('core')
+    top_topology = None
+    pcie_ss_func_mode = None
+    for p, value in params.items():
+        if p == 'top_topology_hwtcl':
+            # Change value to upper case and remove space
+            top_topology = re.sub(' +', '_', value.upper())
+
+            # Extract the number of links from top topology (GenA_LXW)
+            topology_num_links, n = re.subn(r'.*_+([0-9]+)X.*', r'\1', top_topology, flags=re.S)
+            if n == 0:
+                # Pattern match failed. Assume 1.
+                topology_num_links = 1
+
+        # Functional mode, original PCIe SS ("AXI-ST Data Mover" or "Power User")
+        if p == 'pcie_ss_func_mode_hwtcl':
+            if 'Data Mover' in value:
+                pcie_ss_func_mode = 'DM'
+            elif 'Power User' in value:
+                pcie_ss_func_mode = 'PU'
+
+        match = re.match('^core%s_(.*)' % width, p)
+        if match:
+            core[match.group(1)] = value
+
+    if top_topology is None:
+        raise IPCfgError('can\'t read "top_topology": no such variable')
+
+    of.puts('// PCIe SS Topology')
+    of.puts('`define OFS_FIM_IP_CFG_%s_%s 1' % (ip_name, top_topology))
+    of.puts('`define OFS_FIM_IP_CFG_%s_NUM_LINKS %s' % (ip_name, topology_num_links))
+    of.puts('')
+
+    of.puts('// PCIe SS Interface')
+    if pcie_ss_func_mode is not None:
+        of.puts('`define OFS_FIM_IP_CFG_%s_FUNC_MODE "%s"' % (ip_name, pcie_ss_func_mode))
+        of.puts('`define OFS_FIM_IP_CFG_%s_FUNC_MODE_IS_%s 1' % (ip_name, pcie_ss_func_mode))
+    if 'header_scheme_hwtcl' in core:
+        hdr = core['header_scheme_hwtcl'].upper().replace('-', '_')
+        of.puts('`define OFS_FIM_IP_CFG_%s_HDR_SCHEME "%s"' % (ip_name, hdr))
+        of.puts('`define OFS_FIM_IP_CFG_%s_HDR_SCHEME_IS_%s 1' % (ip_name, hdr))
+    if 'dwidth_byte_hwtcl' in core:
+        of.puts('`define OFS_FIM_IP_CFG_%s_DWIDTH_BYTE %s' % (ip_name, core['dwidth_byte_hwtcl']))
+    if 'num_seg_hwtcl' in core:
+        of.puts('`define OFS_FIM_IP_CFG_%s_NUM_SEG %s' % (ip_name, core['num_seg_hwtcl']))
+    else:
+        # Assume 1 if not set
+        of.puts('`define OFS_FIM_IP_CFG_%s_NUM_SEG 1' % ip_name)
+
+    # Is there an RX credit interface?
+    if fnmatch.filter(interfaces, '*_st_rxcrdt'):
+        of.puts('`define OFS_FIM_IP_CFG_%s_HAS_RXCRDT 1' % ip_name)
+    else:
+        of.puts('// No rxcrdt interface (OFS_FIM_IP_CFG_%s_HAS_RXCRDT not set)' % ip_name)
+
+    # Does the RX interface have tready?
+    st_rx = fnmatch.filter(interfaces, '*_st_rx')
+    if st_rx:
+        if fnmatch.filter(get_interface_ports(ip, st_rx[0]), '*_tready'):
+            of.puts('`define OFS_FIM_IP_CFG_%s_ST_RX_HAS_TREADY 1' % ip_name)
+        else:
+            of.puts('// No tready in st_rx (OFS_FIM_IP_CFG_%s_ST_RX_HAS_TREADY not set)' % ip_name)
+
+    # Does the FLR completion interface have a tready output?
+    flrcmpl = fnmatch.filter(interfaces, '*_st_flrcmpl')
+    if flrcmpl:
+        if fnmatch.filter(get_interface_ports(ip, flrcmpl[0]), '*_tready'):
+            of.puts('`define OFS_FIM_IP_CFG_%s_FLRCMPL_HAS_TREADY 1' % ip_name)
+        else:
+            of.puts('// No tready in flrcmpl (OFS_FIM_IP_CFG_%s_FLRCMPL_HAS_TREADY not set)' % ip_name)
+
+    # Sorted completions? Meaningful only in DM mode.
+    if 'cpl_reordering_en_hwtcl' in core and tcl_bool(core['cpl_reordering_en_hwtcl']):
+        of.puts('`define OFS_FIM_IP_CFG_%s_HAS_CPL_REORDER 1' % ip_name)
+    else:
+        of.puts('// No completion reordering (OFS_FIM_IP_CFG_%s_HAS_CPL_REORDER not set)' % ip_name)
+
+    of.puts('')
+
+    # Look for active PFs and VFs
+    of.puts('//')
+    of.puts('// The OFS_FIM_IP_CFG_<ip_name>_PF<n>_ACTIVE macro will be defined iff the')
+    of.puts('// PF is active. The value does not have to be tested.')
+    of.puts('//')
+    of.puts('// For each active PF<n>, OFS_FIM_IP_CFG_<ip_name>_PF<n>_NUM_VFS will be')
+    of.puts('// defined iff there are VFs associated with the PF.')
+    of.puts('//')
+    of.puts('')
+
+    num_pfs = 0
+    max_pf_num = 0
+    total_num_vfs = 0
+    max_vfs_per_pf = 0
+
+    pf_active_arr = TclArray('pf_active_arr', {0: 0})
+    num_vfs_arr = TclArray('num_vfs_arr', {0: 0})
+
+    ats_cap_enabled = 0
+    prs_cap_enabled = 0
+    pasid_cap_enabled = 0
+
+    pf_num = 0
+    while tcl_compare(pf_num, core['total_pf_count_hwtcl']) < 0:
+        pf_active_arr[pf_num] = 0
+        num_vfs_arr[pf_num] = 0
+
+        # PF active?
+        if tcl_compare(core['pf%d_pci_type0_device_id_hwtcl' % pf_num], 0) > 0:
+            pf_active_arr[pf_num] = 1
+            max_pf_num = pf_num
+            num_pfs += 1
+            of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_ACTIVE 1' % (ip_name, pf_num))
+            of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_BAR0_ADDR_WIDTH %s'
+                    % (ip_name, pf_num, core['pf%d_bar0_address_width_hwtcl' % pf_num]))
+
+            # Define capability macros only when enabled
+            if tcl_compare(core['virtual_pf%d_ats_cap_enable_hwtcl' % pf_num], 0) > 0:
+                of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_ATS_CAP 1' % (ip_name, pf_num))
+                ats_cap_enabled = 1
+            if tcl_compare(core['virtual_pf%d_prs_ext_cap_enable_hwtcl' % pf_num], 0) > 0:
+                of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_PRS_CAP 1' % (ip_name, pf_num))
+                prs_cap_enabled = 1
+            if tcl_compare(core['virtual_pf%d_pasid_cap_enable_hwtcl' % pf_num], 0) > 0:
+                of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_PASID_CAP 1' % (ip_name, pf_num))
+                pasid_cap_enabled = 1
+
+            # VFs active?
+            num_vfs = core['pf%d_vf_count_hwtcl' % pf_num]
+            if tcl_compare(num_vfs, 0) > 0:
+                num_vfs_arr[pf_num] = num_vfs
+                of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_NUM_VFS %s' % (ip_name, pf_num, num_vfs))
+                of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_VF_BAR0_ADDR_WIDTH %s'
+                        % (ip_name, pf_num, core['pf%d_sriov_vf_bar0_address_width_hwtcl' % pf_num]))
+                if not isinstance(tcl_number(num_vfs), int):
+                    raise IPCfgError('expected integer but got "%s"' % num_vfs)
+                total_num_vfs += tcl_number(num_vfs)
+                if tcl_compare(num_vfs, max_vfs_per_pf) > 0:
+                    max_vfs_per_pf = num_vfs
+
+                if tcl_compare(core['pf%d_vf_ats_cap_enable_hwtcl' % pf_num], 0) > 0:
+                    of.puts('`define OFS_FIM_IP_CFG_%s_PF%d_VF_ATS_CAP 1' % (ip_name, pf_num))
+
+            of.puts('')
+        pf_num += 1
+
+    of.puts('')
+    of.puts('//')
+    of.puts('// The macros below represent the raw PF/VF configuration above in')
+    of.puts('// ways that are easier to process in SystemVerilog loops.')
+    of.puts('//')
+    of.puts('')
+
+    of.puts('// Total number of PFs, not necessarily dense (see MAX_PF_NUM)')
+    of.puts('`define OFS_FIM_IP_CFG_%s_NUM_PFS %d' % (ip_name, num_pfs))
+    of.puts('// Total number of VFs across all PFs')
+    of.puts('`define OFS_FIM_IP_CFG_%s_TOTAL_NUM_VFS %d' % (ip_name, total_num_vfs))
+    of.puts('// Largest active PF number')
+    of.puts('`define OFS_FIM_IP_CFG_%s_MAX_PF_NUM %d' % (ip_name, max_pf_num))
+    of.puts('// Largest number of VFs associated with a single PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_MAX_VFS_PER_PF %s' % (ip_name, max_vfs_per_pf))
+    of.puts('')
+
+    of.puts('// Vector indicating enabled PFs (1 if enabled) with')
+    of.puts('// index range 0 to OFS_FIM_IP_CFG_%s_MAX_PF_NUM' % ip_name)
+    of.puts('`define OFS_FIM_IP_CFG_%s_PF_ENABLED_VEC ' % ip_name, nonewline=True)
+    of.puts(', '.join(str(pf_active_arr[i]) for i in range(max_pf_num + 1)), nonewline=True)
+    of.puts('')
+
+    of.puts('// Vector with the number of VFs indexed by PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_NUM_VFS_VEC ' % ip_name, nonewline=True)
+    of.puts(', '.join(str(num_vfs_arr[i]) for i in range(max_pf_num + 1)), nonewline=True)
+    of.puts('')
+
+    of.puts('')
+    of.puts('// If ATS, PRS or PASID is enabled on at least one PF the following')
+    of.puts('// macros will be defined here, one per feature:')
+    of.puts('//   OFS_FIM_IP_CFG_%s_ATS_CAP' % ip_name)
+    of.puts('//   OFS_FIM_IP_CFG_%s_PRS_CAP' % ip_name)
+    of.puts('//   OFS_FIM_IP_CFG_%s_PASID_CAP' % ip_name)
+    if ats_cap_enabled > 0:
+        of.puts('`define OFS_FIM_IP_CFG_%s_ATS_CAP 1' % ip_name)
+    if prs_cap_enabled > 0:
+        of.puts('`define OFS_FIM_IP_CFG_%s_PRS_CAP 1' % ip_name)
+    if pasid_cap_enabled > 0:
+        of.puts('`define OFS_FIM_IP_CFG_%s_PASID_CAP 1' % ip_name)
+
+    # ATS/PRS/PASID configuration as vectors, indexed by PF
+    of.puts('')
+    of.puts('// Vector indicating whether ATS is enabled, indexed by PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_ATS_CAP_VEC ' % ip_name, nonewline=True)
+    of.puts(', '.join(map(str, get_cfg_enable_pf_vec(core, max_pf_num, 'virtual_pf', '_ats_cap_enable_hwtcl'))))
+
+    of.puts('// Vector indicating whether ATS is enabled for VFs, indexed by PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_VF_ATS_CAP_VEC ' % ip_name, nonewline=True)
+    # Entries in the ATS VF vector are true if VFs and ATS are enabled
+    vf_ena = get_cfg_enable_pf_vec(core, max_pf_num, 'pf', '_vf_count_hwtcl')
+    vf_ats = get_cfg_enable_pf_vec(core, max_pf_num, 'pf', '_vf_ats_cap_enable_hwtcl')
+    of.puts(', '.join(str(int(bool(ena and ats))) for ena, ats in zip(vf_ena, vf_ats)))
+
+    of.puts('// Vector indicating whether PRS is enabled, indexed by PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_PRS_CAP_VEC ' % ip_name, nonewline=True)
+    of.puts(', '.join(map(str, get_cfg_enable_pf_vec(core, max_pf_num, 'virtual_pf', '_prs_ext_cap_enable_hwtcl'))))
+
+    of.puts('// Vector indicating whether PASID is enabled, indexed by PF')
+    of.puts('`define OFS_FIM_IP_CFG_%s_PASID_CAP_VEC ' % ip_name, nonewline=True)
+    of.puts(', '.join(map(str, get_cfg_enable_pf_vec(core, max_pf_num, 'virtual_pf', '_pasid_cap_enable_hwtcl'))))
+
+    of.puts('')
+    of.puts('`endif // `ifndef __OFS_FIM_IP_CFG_%s__' % ip_name)
+    return of.getvalue()
+
+
+def emit_hssi_ss_cfg(ip, ip_name):
+    ''' hssi_ss_get_cfg.tcl '''
+    of = HeaderWriter()
+    of.begin('hssi_ss_get_cfg.tcl', ip_name)
+
+    params = get_instance_parameters(ip)
+    port_enabled_arr = TclArray('port_enabled_arr')
+    lanes_per_port = 1
+    eth_packet_width = 64
+    num_eth_ports = None
+    hssi_config = None
+    for p, value in params.items():
+        if p == 'NUM_ENABLED_PORTS':
+            num_eth_ports = value
+        match = re.search(r'PORT([0-9]+)_ENABLED_GUI', p)
+        if match:
+            # Remove everything except the integer (0-15) from
+            # the parameter 'PORT<n>_ENABLED_GUI
+            key_num = match.group(0).strip('_ENABLED_GUI').strip('PORT')
+            is_en = value
+            port_enabled_arr[key_num] = is_en
+            port_profile = params['PORT%s_PROFILE_GUI' % key_num]
+            if tcl_bool(is_en):
+                hssi_config = port_profile
+                if tcl_compare(port_profile, '100GCAUI-4') == 0:
+                    lanes_per_port = 4
+                    eth_packet_width = 512
+                elif tcl_compare(port_profile, '200GAUI-4') == 0:
+                    lanes_per_port = 4
+                    eth_packet_width = 512
+                elif tcl_compare(port_profile, '400GAUI-8') == 0:
+                    lanes_per_port = 8
+                    eth_packet_width = 1024
+
+    of.puts('//')
+    of.puts('// The OFS_FIM_IP_CFG_<ip_name>_ETH_PORTS macro will be defined iff the')
+    of.puts('// port is active. The value does not have to be tested.')
+    of.puts('//')
+
+    of.puts('')
+    of.puts('//')
+    of.puts('// The macros below represent the raw eth port configuration above in')
+    of.puts('// ways that are easier to process in SystemVerilog loops.')
+    of.puts('//')
+    of.puts('')
+
+    if hssi_config is None:
+        raise IPCfgError('can\'t read "hssi_config": no such variable')
+    eth_defines = {
+        '200GAUI-4': ['`define ETH_200G', '`define MAC_SEGMENTED'],
+        '400GAUI-8': ['`define ETH_400G', '`define MAC_SEGMENTED'],
+        '100GCAUI-4': ['`define ETH_100G'],
+        '100GCAUI-2': ['`define ETH_50G'],
+        '10GbE': ['`define ETH_10G'],
+        '25GbE': ['`define ETH_25G'],
+    }
+    for config, lines in eth_defines.items():
+        if tcl_compare(hssi_config, config) == 0:
+            break
+    else:
+        lines = ['`define ETH_25G']
+    for line in lines:
+        of.puts(line)
+
+    max_port_num = 0
+    # Get the highest port number
+    for i in range(17):
+        if tcl_compare(port_enabled_arr[str(i)], 1) == 0:
+            max_port_num = i + lanes_per_port - 1
+    enabled_ports = [i for i in range(max_port_num + 1)
+                     if tcl_compare(port_enabled_arr[str(i)], 1) == 0]
+
+    # Instantiate each enabled port in the hssi_ss instantiation
+    of.puts('')
+    of.puts('')
+    of.puts('`define INST_ALL_PORTS \\')
+    for i in enabled_ports:
+        of.puts('   `HSSI_PORT_INST(%d) \\' % i)
+
+    # The INCLUDE_HSSI_PORT_<n> macros for UVM
+    of.puts('')
+    of.puts('')
+    for i in enabled_ports:
+        of.puts('`define INCLUDE_HSSI_PORT_%d ' % i)
+
+    # Enumerated type of the enabled ports for hssi_wrapper
+    of.puts('')
+    of.puts('`define ENUM_PORT_INDEX ', nonewline=True)
+    for i in enabled_ports:
+        of.puts('PORT_%d, ' % i, nonewline=True)
+
+    if num_eth_ports is None:
+        raise IPCfgError('can\'t read "num_eth_ports": no such variable')
+    of.puts('')
+    of.puts('')
+    of.puts('// Total number of ports, not necessarily dense (see MAX_PORT_NUM)')
+    of.puts('`define OFS_FIM_IP_CFG_%s_NUM_ETH_PORTS %s' % (ip_name, num_eth_ports))
+    of.puts('`define OFS_FIM_IP_CFG_%s_ETH_PACKET_WIDTH %d' % (ip_name, eth_packet_width))
+    of.puts('`define OFS_FIM_IP_CFG_%s_NUM_LANES %d' % (ip_name, lanes_per_port))
+
+    of.puts('')
+    of.puts('')
+    of.puts('`endif // `ifndef __OFS_FIM_IP_CFG_%s__' % ip_name)
+    return of.getvalue()
+
+
+def tcl_arrays_equal(a, b):
+    ''' lcompare in mem_ss_get_cfg.tcl '''
+    return len(a) == len(b) and all(key in b and tcl_compare(b[key], val) == 0 for key, val in a.items())
+
+
+def emit_mem_ss_cfg(ip, ip_name):
+    ''' mem_ss_get_cfg.tcl '''
+    of = HeaderWriter()
+    of.begin('mem_ss_get_cfg.tcl', ip_name)
+
+    inst_entity = ip.class_name
+
+    # Message for deprecated IP
+    if inst_entity == 'mem_ss_fm':
+        print('Warning: %s is provided by Quartus as a beta version and support in OFS '
+              'is subject to change in the future' % inst_entity)
+
+    num_mem_phy = None
+    channel_type = TclArray('channel_type')
+    channel_conns = TclArray('channel_conns')
+    mem_channels = None
+    app_channels = None
+    for p, value in get_instance_parameters(ip).items():
+        # Parameter parsing for deprecated IP
+        if p == 'NUM_OF_PHYSICAL_INTERFACES':
+            num_mem_phy = value
+
+        if p == 'DIAG_ENABLE_CSR' and tcl_bool(value):
+            of.puts('// Connect Memory Subsystem to AXI-Lite CSR fabric ')
+            of.puts('`define OFS_FIM_IP_CFG_%s_EN_CSR' % ip_name)
+
+        # HPS or EMIF?
+        match = re.match('^MEM_TYPE_ENUM_(.*)', p)
+        if match:
+            channel_type[match.group(1)] = value
+
+        # Parameter parsing for officially supported IP
+        if p == 'MEM_INTFS_TYPE':
+            # A space-separated list of memory PHY channel types
+            mem_channels = tcl_split(value)
+
+        if p == 'APP_INTFS_TYPE':
+            # A space-separated list of memory application channel types
+            app_channels = tcl_split(value)
+
+        if p == 'ENABLE_MEM_CSR_INTF' and value == 'ENABLED':
+            of.puts('// Connect Memory Subsystem to AXI-Lite CSR fabric ')
+            of.puts('`define OFS_FIM_IP_CFG_%s_EN_CSR' % ip_name)
+
+        match = re.match('^MEM_CH_(.*)_CONNS', p)
+        if match:
+            # The application->physical channel connections
+            channel_conns[match.group(1)] = value
+
+    # Map old IP param structures to new IP. The old IP only supports DDR4
+    # and 1-to-1 application-to-mem channel mapping.
+    if inst_entity == 'mem_ss_fm':
+        if num_mem_phy is None:
+            raise IPCfgError('can\'t read "num_mem_phy": no such variable')
+        app_channels = app_channels or []
+        mem_channels = mem_channels or []
+        channel = 0
+        while tcl_compare(channel, num_mem_phy) < 0:
+            if channel_type[str(channel)] == 'MEM_TYPE_HPS_EMIF_DDR4':
+                app_channels.append('HPS')
+                conns = ['0'] * int(tcl_number(num_mem_phy))
+                conns[channel] = '1'
+                channel_conns[str(channel)] = ' '.join(conns)
+            else:
+                app_channels.append('STORAGE')
+            mem_channels.append('DDR4')
+            channel += 1
+
+    of.puts('')
+    of.puts('//')
+    of.puts('// Flags to enable memory channel instantiation/configuration ')
+    of.puts('//')
+
+    of.puts('`define OFS_FIM_IP_CFG_%s_ENTITY %s' % (ip_name, inst_entity))
+
+    if app_channels is None:
+        raise IPCfgError('can\'t read "app_channels": no such variable')
+    if mem_channels is None:
+        raise IPCfgError('can\'t read "mem_channels": no such variable')
+
+    # Interpret mem_ss channel interface parameters
+    num_axi_channels = 0
+    axi_ch_width = {}
+    axi_width = None
+    hps_channel = None
+    for channel, channel_kind in enumerate(app_channels):
+        if channel_kind == 'ASSOCIATIVE_STORAGE':
+            raise IPCfgError('Memory Subsystem lookup interface is unsupported in the OFS reference FIM!')
+
+        if channel_kind == 'STORAGE':
+            interface = 'i%d_axi_mm' % channel
+            for port in get_interface_ports(ip, interface):
+                # Clean the AXI-MM port name of subsystem prefix (i#_ ss_ app_) mm_
+                axi_port = port.lstrip('i%dsap_' % channel).lstrip('m_')
+                axi_ch_width[axi_port] = get_port_width(ip, port)
+            if axi_width is not None:
+                if not tcl_arrays_equal(axi_width, axi_ch_width):
+                    raise IPCfgError('Mismatched Memory Subsystem channel settings are unsupported '
+                                     'in the OFS reference FIM!')
+            else:
+                axi_width = {key: axi_ch_width[key] for key in tcl_array_order(axi_ch_width)}
+            of.puts('`define OFS_FIM_IP_CFG_%s_EN_AXI_MM_%d' % (ip_name, channel))
+            num_axi_channels += 1
+        if channel_kind == 'HPS':
+            # Search channel connection map for the channel attached to HPS
+            # Agilex HPS only supports 1 HPS channel so no need to search all
+            conns = tcl_split(channel_conns[str(channel)])
+            hps_channel = conns.index('1') if '1' in conns else -1
+
+    # mem_ss interface ports
+    num_ddr4_channels = 0
+    ddr4_ch_width = {}
+    ddr4_width = None
+    hps_width = None
+    for channel, channel_kind in enumerate(mem_channels):
+        if channel_kind != 'DDR4':
+            raise IPCfgError('Unsupported memory type %s assigned to Memory Channel %d!' % (channel_kind, channel))
+
+        interface = 'mem%d_ddr4' % channel
+        if hps_channel is not None and hps_channel == channel:
+            hps_width = hps_width if hps_width is not None else {}
+            for port in get_interface_ports(ip, interface):
+                # Clean the DDR4 port name of subsystem prefix (mem#_ ddr4_)
+                mem_port = port.lstrip('mem%d_' % channel).lstrip('ddr4').lstrip('_')
+                hps_width[mem_port] = get_port_width(ip, port)
+            of.puts('`define OFS_FIM_IP_CFG_%s_HPS_EMIF_IS_MEM_%d' % (ip_name, channel))
+        else:
+            for port in get_interface_ports(ip, interface):
+                # Clean the DDR4 port name of subsystem prefix (mem#_ ddr4_)
+                mem_port = port.lstrip('mem%d_' % channel).lstrip('ddr4').lstrip('_')
+                ddr4_ch_width[mem_port] = get_port_width(ip, port)
+            if ddr4_width is not None:
+                if not tcl_arrays_equal(ddr4_width, ddr4_ch_width):
+                    raise IPCfgError('Mismatched memory subsystem channel settings are unsupported '
+                                     'in the OFS reference FIM!')
+            else:
+                ddr4_width = {key: ddr4_ch_width[key] for key in tcl_array_order(ddr4_ch_width)}
+
+            of.puts('`define OFS_FIM_IP_CFG_%s_EN_MEM_%d' % (ip_name, channel))
+            num_ddr4_channels += 1
+
+    # AXI-MM interface widths, for the user configurable AXI ports
+    if axi_width is not None:
+        axi_width = TclArray('axi_width', axi_width)
+        of.puts('')
+        of.puts('//')
+        of.puts('// AXI-MM user interface configuration ')
+        of.puts('//')
+        of.puts('`define OFS_FIM_IP_CFG_%s_DEFINES_USER_AXI' % ip_name)
+        of.puts('`define OFS_FIM_IP_CFG_%s_NUM_AXI_CHANNELS %d' % (ip_name, num_axi_channels))
+        for port in ['rdata', 'wdata', 'awlen', 'awuser', 'awid', 'awaddr', 'buser']:
+            if 'data' in port or 'buser' in port:
+                # Memory supports asymmetric read/write data widths
+                port_name = port.upper()
+            else:
+                # Otherwise clean the channel specific prefix from the AXI port
+                port_name = port.lstrip('a').lstrip('w').upper()
+            of.puts('`define OFS_FIM_IP_CFG_%s_AXI_%s_WIDTH %s' % (ip_name, port_name, axi_width[port]))
+
+    # Fabric EMIF DDR4 interface widths, in Tcl's 'array get' order
+    if ddr4_width is not None:
+        of.puts('')
+        of.puts('//')
+        of.puts('// Fabric EMIF interface configuration ')
+        of.puts('//')
+        of.puts('`define OFS_FIM_IP_CFG_%s_DEFINES_EMIF_DDR4' % ip_name)
+        of.puts('`define OFS_FIM_IP_CFG_%s_NUM_DDR4_CHANNELS %d' % (ip_name, num_ddr4_channels))
+        for port in tcl_array_order(ddr4_width):
+            of.puts('`define OFS_FIM_IP_CFG_%s_DDR4_%s_WIDTH %s' % (ip_name, port.upper(), ddr4_width[port]))
+
+    # HPS EMIF DDR4 interface widths
+    if hps_width is not None:
+        of.puts('')
+        of.puts('//')
+        of.puts('// HPS EMIF interface configuration ')
+        of.puts('//')
+        of.puts('`define OFS_FIM_IP_CFG_%s_DEFINES_HPS_DDR4' % ip_name)
+        for port in tcl_array_order(hps_width):
+            of.puts('`define OFS_FIM_IP_CFG_%s_HPS_%s_WIDTH %s' % (ip_name, port.upper(), hps_width[port]))
+
+    of.puts('')
+    of.puts('`endif // `ifndef __OFS_FIM_IP_CFG_%s__' % ip_name)
+    return of.getvalue()
+
+
+IP_SCRIPTS = {
+    'iopll_get_cfg.tcl': emit_iopll_cfg,
+    'pcie_ss_get_cfg.tcl': emit_pcie_ss_cfg,
+    'hssi_ss_get_cfg.tcl': emit_hssi_ss_cfg,
+    'mem_ss_get_cfg.tcl': emit_mem_ss_cfg,
+}
+
+
+#
+# ip_db: the IP files to process, as set up by the project's Tcl files
+#
+
+def expand_tcl_path(path):
+    '''
+    Strip Tcl quoting and substitute $::env(<var>) references
+    '''
+    path = path.strip('"{}')
+
+    def env_value(match):
+        if match.group(1) not in os.environ:
+            raise IPCfgError('%s: environment variable %s is not set' % (path, match.group(1)))
+        return os.environ[match.group(1)]
+
+    return TCL_ENV_RE.sub(env_value, path)
+
+
+def read_ip_db(tcl_files, ip_db=None, visited=None):
+    '''
+    Collect the "dict set ::ofs_ip_cfg_db::ip_db" entries of project Tcl or QSF
+    files, following SOURCE_TCL_SCRIPT_FILE assignments. Conditionals in the
+    Tcl are not evaluated: every assignment that isn't commented out counts.
+    Paths are relative to the project directory, as in Quartus.
+    '''
+    ip_db = {} if ip_db is None else ip_db
+    visited = set() if visited is None else visited
+    for tcl_file in tcl_files:
+        if os.path.abspath(tcl_file) in visited:
+            continue
+        visited.add(os.path.abspath(tcl_file))
+
+        with open(tcl_file) as infile:
+            for line in infile:
+                match = IP_DB_RE.match(line)
+                if match:
+                    ip_file, ip_name, ip_script = (expand_tcl_path(m) for m in match.groups())
+                    ip_db[ip_file] = (ip_name, ip_script)
+                    continue
+
+                match = SOURCE_TCL_RE.match(line)
+                if match:
+                    source_file = expand_tcl_path(match.group(1))
+                    if os.path.isfile(source_file):
+                        read_ip_db([source_file], ip_db, visited)
+                    else:
+                        print('Warning: %s sources missing file %s' % (tcl_file, source_file))
+
+    return ip_db
+
+
+def write_if_changed(path, content):
+    '''
+    Write 'path' only when its content changes, keeping its timestamp otherwise
+    '''
+    try:
+        with open(path) as infile:
+            if infile.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    with open(path, 'w') as outfile:
+        outfile.write(content)
+    return True
+
+
+def create_db():
+    '''
+    Create ofs_ip_cfg_db under the project if it doesn't exist
+    '''
+    if not os.path.exists(DB_DIR):
+        os.mkdir(DB_DIR)
+        # Empty wrapper .vh file that will be populated later
+        open(os.path.join(DB_DIR, WRAPPER), 'w').close()
+        with open(os.path.join(DB_DIR, 'README'), 'w') as outfile:
+            outfile.write(README)
+
+
+def generate(ip_db):
+    '''
+    Process the IP in ip_db and write the configuration header files.
+    A header only the Quartus flow can generate is skipped with a warning,
+    keeping any copy already written by that flow. Returns the headers that
+    were (re)written.
+    '''
+    create_db()
+
+    wrapper = ['//\n',
+               '// Generated by OFS script ofs_ip_cfg_db.tcl\n',
+               '//\n\n',
+               '// Include all generated configuration files\n']
+    updated = []
+    for ip_file, (ip_name, ip_script) in ip_db.items():
+        emit_ip_cfg = IP_SCRIPTS.get(os.path.basename(ip_script))
+        if emit_ip_cfg is None:
+            raise IPCfgError('No Python version of OFS IP script %s for %s. '
+                             'Use gen_ofs_ip_cfg_db.tcl.' % (ip_script, ip_file))
+        if not os.path.isfile(ip_file):
+            raise IPCfgError('IP file %s not found' % ip_file)
+
+        tgt_fname = 'ofs_ip_cfg_%s.vh' % ip_name
+        tgt_path = os.path.join(DB_DIR, tgt_fname)
+        try:
+            content = emit_ip_cfg(IPFile(ip_file), ip_name.upper())
+        except IPCfgSkip as e:
+            print('Warning: skipped %s, %s: %s' % (tgt_path, ip_file, e))
+            if os.path.exists(tgt_path):
+                wrapper.append('`include "%s"\n' % tgt_fname)
+            continue
+        except IPCfgError as e:
+            raise IPCfgError('%s: %s' % (ip_file, e))
+
+        wrapper.append('`include "%s"\n' % tgt_fname)
+        if write_if_changed(tgt_path, content):
+            print('Generated %s from %s' % (tgt_path, ip_file))
+            updated.append(tgt_path)
+        else:
+            print('%s is already up to date.' % tgt_path)
+
+    if write_if_changed(os.path.join(DB_DIR, WRAPPER), ''.join(wrapper)):
+        updated.append(os.path.join(DB_DIR, WRAPPER))
+
+    return updated
+
+
+def parse_arguments():
+    '''
+    Parse script arguments
+    '''
+    parser = argparse.ArgumentParser(
+        description='Generate ofs_ip_cfg_db headers from .ip files without Quartus')
+
+    parser.add_argument(
+        '--project-dir',
+        default='.',
+        help='Quartus project directory, where ofs_ip_cfg_db is written')
+
+    parser.add_argument(
+        '--tcl',
+        nargs='+',
+        default=[],
+        help='Project .qsf or .tcl files adding IP to ::ofs_ip_cfg_db::ip_db')
+
+    parser.add_argument(
+        '--ip',
+        nargs=3,
+        action='append',
+        default=[],
+        metavar=('IP_FILE', 'NAME', 'SCRIPT'),
+        help='IP file to process, as "dict set ::ofs_ip_cfg_db::ip_db IP_FILE [list NAME SCRIPT]"')
+
+    args = parser.parse_args()
+    if not args.tcl and not args.ip:
+        parser.error('no IP to process, use --tcl or --ip')
+
+    return args
+
+
+def main():
+    args = parse_arguments()
+    tcl_files = [os.path.abspath(f) for f in args.tcl]
+    os.chdir(args.project_dir)
+
+    try:
+        ip_db = read_ip_db(tcl_files)
+        for ip_file, ip_name, ip_script in args.ip:
+            ip_db[ip_file] = (ip_name, ip_script)
+        generate(ip_db)
+    except (IPCfgError, OSError) as e:
+        print('\nError: %s' % e)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,13 @@ import uuid
 import datetime
 import re
 import fileinput
+import argparse
+import fnmatch
+import hashlib
+import json
+import locale
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from shlex import quote as shell_quote  # pylint: disable=E0611
@@ -20,15 +27,328 @@ except ImportError:
     from pipes import quote as shell_quote
 
 
-def sha1_file_tree(base_path):
+HASH_CHUNK_SIZE = 1 << 20
+HASH_CACHE_NAME = '.fme_ifc_id.cache'
+HASH_CACHE_VERSION = 1
+# A file modified this close to the cache being written may change again
+# without its mtime moving, so its cached digest is not reused
+HASH_CACHE_RACY_NS = 2 * 1000 * 1000 * 1000
+EXCLUDED_NAMES = (b'update_fme_ifc_id.py', os.fsencode(HASH_CACHE_NAME))
+MANIFEST_ASSIGNMENT = re.compile(r'set_global_assignment\s+-name\s+\w+_FILE\s+(\S+)')
+# Files taken from the +incdir+ directories of a source manifest
+HEADER_EXTENSIONS = ('.svh', '.vh', '.h', '.inc')
+# Digest of no input, what "xargs -0 sha1sum" prints for an empty file list
+EMPTY_SHA1_LINE = b'da39a3ee5e6b4b0d3255bfef95601890afd80709  -\n'
+
+
+def find_files(base_path):
+    '''
+    Regular files under base_path, as "find base_path -type f" names them.
+    Symbolic links are not followed and unreadable directories are skipped.
+    '''
+    base = os.fsencode(base_path)
+    files = []
+    stack = [base]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    # find joins the start path and names without doubling a trailing "/"
+                    path = dir_path + entry.name if dir_path.endswith(b'/') \
+                        else dir_path + b'/' + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(path)
+                    elif entry.is_file(follow_symlinks=False) and \
+                            entry.name not in EXCLUDED_NAMES:
+                        files.append(path)
+        except OSError:
+            continue
+
+    return files
+
+
+def sort_paths(paths):
+    '''
+    Order paths like "sort -z" in the current LC_COLLATE locale, with ties
+    broken byte by byte. Like sort, a locale that isn't installed falls back
+    to byte order (C collation).
+    '''
+    try:
+        locale.setlocale(locale.LC_COLLATE, '')
+    except locale.Error as e:
+        print("Warning: {0}, sorting in the C locale".format(e))
+        return sorted(paths)
+    collate = locale.setlocale(locale.LC_COLLATE)
+    if collate in ('C', 'POSIX') or collate.startswith('C.'):
+        return sorted(paths)
+
+    return sorted(paths, key=lambda path: (locale.strxfrm(os.fsdecode(path)), path))
+
+
+def sha1_file(path):
+    '''
+    SHA1 of one file, or None if it can't be read. hashlib releases the GIL
+    on large updates, so several files hash in parallel across threads.
+    '''
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as infile:
+            for chunk in iter(lambda: infile.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def sha1sum_line(path, hexdigest):
+    '''
+    The line sha1sum prints for a file, escaping "\\", newline and carriage return
+    '''
+    escaped = path.replace(b'\\', b'\\\\').replace(b'\n', b'\\n').replace(b'\r', b'\\r')
+    prefix = b'\\' if escaped != path else b''
+    return prefix + hexdigest.encode() + b'  ' + escaped + b'\n'
+
+
+def load_hash_cache(cache_path):
+    '''
+    Digests saved by the previous run. Empty without a cache_path, if there
+    are none, or if the cache was written in the future, i.e. the clock went
+    back since.
+    '''
+    empty = {'written_ns': 0, 'files': {}}
+    if not cache_path:
+        return empty
+    try:
+        with open(cache_path) as infile:
+            cache = json.load(infile)
+    except (OSError, ValueError):
+        return empty
+
+    if cache.get('version') != HASH_CACHE_VERSION or \
+            not isinstance(cache.get('written_ns'), int) or \
+            cache['written_ns'] > time.time_ns():
+        return empty
+    return cache
+
+
+def write_hash_cache(cache_path, files):
+    '''
+    Save [size, mtime_ns, inode, sha1] of each file by relative path
+    '''
+    cache = {
+        'version': HASH_CACHE_VERSION,
+        'written_ns': time.time_ns(),
+        'files': files,
+    }
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as outfile:
+            json.dump(cache, outfile)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print("Warning: could not write hash cache {0}: {1}".format(cache_path, e))
+
+
+def hash_cached_file(path, cached, trusted_before_ns):
+    '''
+    [size, mtime_ns, inode, sha1] of a file, reusing the cached sha1 when the
+    file's stat is unchanged and older than the cache. None if it can't be read.
+    '''
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+
+    key = [st.st_size, st.st_mtime_ns, st.st_ino]
+    if cached and cached[:3] == key and st.st_mtime_ns < trusted_before_ns:
+        return cached
+    hexdigest = sha1_file(path)
+    return None if hexdigest is None else key + [hexdigest]
+
+
+def tree_digests(files):
+    '''
+    Merkle digest of each directory, by relative path ('' for the top), from
+    the (relative path, sha1) of every file below it
+    '''
+    children = {'': []}
+    for rel, hexdigest in files:
+        parts = rel.split('/')
+        for depth in range(1, len(parts)):
+            dir_rel = '/'.join(parts[:depth])
+            if dir_rel not in children:
+                children[dir_rel] = []
+                children['/'.join(parts[:depth - 1])].append(('d', parts[depth - 1], dir_rel))
+        children['/'.join(parts[:-1])].append(('f', parts[-1], hexdigest))
+
+    digests = {}
+    # Deepest first, so subdirectory digests are known before their parent's
+    for dir_rel in sorted(children, key=lambda d: d.count('/') + (d != ''), reverse=True):
+        digest = hashlib.sha1()
+        for kind, name, value in sorted(children[dir_rel], key=lambda child: child[1]):
+            child_digest = digests[value] if kind == 'd' else value
+            digest.update(os.fsencode('{0} {1}  {2}\n'.format(kind, child_digest, name)))
+        digests[dir_rel] = digest.hexdigest()
+
+    return digests
+
+
+def changed_dirs(old_files, new_files):
+    '''
+    Directories holding a file whose digest changed, or that was added or removed
+    '''
+    changed = set()
+    for rel in set(old_files) | set(new_files):
+        old, new = old_files.get(rel), new_files.get(rel)
+        if old is None or new is None or old[3] != new[3]:
+            changed.add(os.path.dirname(rel) or '.')
+    return sorted(changed)
+
+
+def hash_file_tree(base_path, jobs=None, cache_path=None):
+    '''
+    Hash the design source tree. Returns the aggregate SHA1 in the format of
+        find <base_path> -type f ! -name update_fme_ifc_id.py -print0 |
+            sort -z | xargs -0 sha1sum | sha1sum
+    the [size, mtime_ns, inode, sha1] of each file by relative path, and the
+    same for the previous run when cache_path names a hash cache, which is
+    then updated.
+    '''
+    cache = load_hash_cache(cache_path)
+    trusted_before_ns = cache['written_ns'] - HASH_CACHE_RACY_NS
+
+    base = os.fsencode(base_path)
+    prefix_len = len(base) if base.endswith(b'/') else len(base) + 1
+    paths = sort_paths(find_files(base_path))
+    rels = [os.fsdecode(path[prefix_len:]) for path in paths]
+
+    tree_digest = hashlib.sha1()
+    if not paths:
+        tree_digest.update(EMPTY_SHA1_LINE)
+    files = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        entries = executor.map(
+            lambda path, rel: hash_cached_file(path, cache['files'].get(rel), trusted_before_ns),
+            paths, rels)
+        for path, rel, entry in zip(paths, rels, entries):
+            if entry is not None:
+                tree_digest.update(sha1sum_line(path, entry[3]))
+                files[rel] = entry
+
+    if cache_path:
+        write_hash_cache(cache_path, files)
+
+    return tree_digest.hexdigest(), files, cache['files']
+
+
+def sha1_file_tree(base_path, compat=True, jobs=None, cache_path=None):
+    '''
+    Generate SHA1 hash for design source tree.
+    With compat, it is returned the way earlier versions of this script did,
+    as "b'<hex>", so FME interface IDs don't change.
+    '''
+    hexdigest = hash_file_tree(base_path, jobs, cache_path)[0]
+    if compat:
+        return "b'" + hexdigest
+    return hexdigest
+
+
+def read_source_manifest(manifest_path):
+    '''
+    Files named by a source manifest, such as the output of
+    emit_project_sources.tcl or emit_project_ip.tcl: one path per line,
+    "+incdir+<dir>" lines, or "set_global_assignment -name <type>_FILE <path>".
+    Returns (files, include directories) as written in the manifest.
+    '''
+    files = []
+    incdirs = []
+    with open(manifest_path) as infile:
+        for line in infile:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('+incdir+'):
+                incdirs.append(line[len('+incdir+'):])
+                continue
+            match = MANIFEST_ASSIGNMENT.match(line)
+            files.append(match.group(1) if match else line)
+
+    return files, incdirs
+
+
+def get_manifest_scope(base_path, tree_files, manifests, includes, excludes):
     '''
-    Generate SHA1 hash for design source tree
+    Relative paths, from base_path, of the files the manifests list, the
+    headers in their include directories and the tree files matching an
+    include glob, less those matching an exclude glob. Without manifests or
+    includes the scope starts from the whole tree.
+    '''
+    def relative(path):
+        return os.path.relpath(os.path.join(base_path, path), base_path)
+
+    scope = set()
+    for manifest in manifests:
+        files, incdirs = read_source_manifest(manifest)
+        for path in files:
+            scope.add(relative(path))
+        for incdir in incdirs:
+            incdir_path = os.path.join(base_path, incdir)
+            if not os.path.isdir(incdir_path):
+                continue
+            for name in os.listdir(incdir_path):
+                if name.endswith(HEADER_EXTENSIONS) and \
+                        os.path.isfile(os.path.join(incdir_path, name)):
+                    scope.add(relative(os.path.join(incdir, name)))
+
+    if includes:
+        scope.update(rel for rel in tree_files
+                     if any(fnmatch.fnmatch(rel, glob) for glob in includes))
+    if not manifests and not includes:
+        scope.update(tree_files)
+
+    return sorted(rel for rel in scope
+                  if not any(fnmatch.fnmatch(rel, glob) for glob in excludes))
+
+
+def hash_manifest_scope(base_path, scope, tree_files, jobs=None):
+    '''
+    SHA1 over "<relative path>\\0<sha1>\\n" of each file in scope, in path order,
+    reusing the digests of tree_files. Returns (sha1, bytes covered).
+    '''
+    def hash_rel(rel):
+        if rel in tree_files:
+            return tree_files[rel][0], tree_files[rel][3]
+        path = os.path.join(base_path, rel)
+        if not os.path.isfile(path):
+            return None
+        return os.path.getsize(path), sha1_file(path)
+
+    scope_digest = hashlib.sha1()
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for rel, result in zip(scope, executor.map(hash_rel, scope)):
+            if result is None or result[1] is None:
+                print("\nError: {0} in the FME interface manifest can't be read!".format(rel))
+                sys.exit(-1)
+            total_bytes += result[0]
+            scope_digest.update(os.fsencode(rel) + b'\0' + result[1].encode() + b'\n')
+
+    return scope_digest.hexdigest(), total_bytes
+
+
+def sha1_file_tree_find(base_path):
+    '''
+    Generate SHA1 hash for design source tree with find and sha1sum.
+    Kept to cross-check sha1_file_tree().
     '''
     sha1sum = subprocess.check_output(
-        ('find {base_path} -type f ! -name update_fme_ifc_id.py -print0 | '
+        ('find {base_path} -type f ! -name update_fme_ifc_id.py '
+         '! -name {cache_name} -print0 | '
          'sort -z | '
          'xargs -0 sha1sum | '
-         'sha1sum'.format(base_path=shell_quote(base_path))),
+         'sha1sum'.format(base_path=shell_quote(base_path),
+                          cache_name=HASH_CACHE_NAME)),
         shell=True)
     return str(sha1sum).split()[0]
 
@@ -79,7 +399,17 @@ def update_build_env_db(build_env_db_path, uuid_str):
         None
 
 
-def generate_fme_id_mif(platform_base_path, project):
+def write_tree_report(report_path, dirs):
+    '''
+    Write the Merkle digest of each directory, one "<sha1>  <directory>" per line
+    '''
+    with open(report_path, 'w') as outfile:
+        for dir_rel in sorted(dirs):
+            outfile.write("{0}  {1}\n".format(dirs[dir_rel], dir_rel or '.'))
+
+
+def generate_fme_id_mif(platform_base_path, project, hash_cache=True,
+                        tree_report=None, manifests=(), includes=(), excludes=()):
     '''
     Generate FME ID MIF
     '''
@@ -117,7 +447,33 @@ def generate_fme_id_mif(platform_base_path, project):
     #    sys.exit(-1)
 
     fme_afu_id = uuid.UUID('f9e17764-38f0-82fe-e346-524ae92aafbf')
-    uuid_str = str(uuid.uuid5(fme_afu_id, sha1_file_tree(platform_base_path)))
+    cache_path = os.path.join(platform_base_path, HASH_CACHE_NAME) if hash_cache else None
+    tree_hexdigest, files, old_files = hash_file_tree(platform_base_path,
+                                                      cache_path=cache_path)
+    if old_files:
+        for dir_rel in changed_dirs(old_files, files):
+            print("FME interface tree changed in: {0}".format(dir_rel))
+    if tree_report:
+        write_tree_report(
+            tree_report, tree_digests((rel, entry[3]) for rel, entry in files.items()))
+
+    tree_bytes = sum(entry[0] for entry in files.values())
+    print("FME interface tree: {0} files, {1} bytes hashed".format(len(files), tree_bytes))
+
+    # The "b'" prefix keeps the IDs of earlier versions of this script
+    uuid_str = str(uuid.uuid5(fme_afu_id, "b'" + tree_hexdigest))
+
+    if manifests or includes or excludes:
+        scope = get_manifest_scope(platform_base_path, files, manifests, includes, excludes)
+        if not scope:
+            print("\nError: no files in the FME interface manifest scope!")
+            sys.exit(-1)
+        scope_hexdigest, scope_bytes = hash_manifest_scope(platform_base_path, scope, files)
+        print("FME interface manifest scope: {0} files, {1} bytes hashed".format(
+            len(scope), scope_bytes))
+        print("FME_IFC_ID (legacy tree hash) = " + uuid_str)
+        uuid_str = str(uuid.uuid5(fme_afu_id, scope_hexdigest))
+        print("FME_IFC_ID (manifest scope) = " + uuid_str + " (used)")
 
     # Generate fme-ifc-id.txt for AFU compilation
     path = os.path.join(platform_base_path, 'fme-ifc-id.txt')
@@ -146,5 +502,32 @@ def generate_fme_id_mif(platform_base_path, project):
 # ----------------------------
 #  Main Entry
 # ----------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('platform_base_path',
+                        help='Directory hashed into the FME interface ID')
+    parser.add_argument('project')
+    parser.add_argument('--no-hash-cache', action='store_true',
+                        help='Rehash every file instead of reusing the digests '
+                             'saved in ' + HASH_CACHE_NAME)
+    parser.add_argument('--tree-report', metavar='FILE',
+                        help='Write the digest of every directory to FILE')
+    parser.add_argument('--manifest', action='append', default=[], metavar='FILE',
+                        help='Derive FME_IFC_ID from only the files in this source list, '
+                             'e.g. from emit_project_sources.tcl or emit_project_ip.tcl. '
+                             'Paths are relative to platform_base_path. May be repeated.')
+    parser.add_argument('--include', action='append', default=[], metavar='GLOB',
+                        help='Add the files under platform_base_path matching GLOB to '
+                             'the manifest scope. May be repeated.')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Drop the files matching GLOB from the manifest scope. '
+                             'May be repeated.')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    generate_fme_id_mif(sys.argv[1], sys.argv[2])
+    args = parse_args()
+    generate_fme_id_mif(args.platform_base_path, args.project,
+                        hash_cache=not args.no_hash_cache,
+                        tree_report=args.tree_report, manifests=args.manifest,
+                        includes=args.include, excludes=args.exclude)
@@ -1,28 +1,57 @@
-#!/usr/bin/python
+#!/usr/bin/env python3
 # Copyright 2020 Intel Corporation
 # SPDX-License-Identifier: MIT
 
 """ Generate a C header file containing IOPLL config data """
 
 
+import argparse
+import concurrent.futures
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
 
 
-def get_pll_settings(ref_freq, freq):
+def get_pll_settings(tcl_script, ref_freq, freq, work_dir="."):
     """ Generate pll config values for a given desired frequency """
-    ret = subprocess.call(["quartus_sh", "-t",
-                           "generate_pll_settings_s10.tcl",
-                           str(ref_freq) + ".0", str(freq) + ".0"])
+    ret = subprocess.call(["quartus_sh", "-t", tcl_script,
+                           str(ref_freq) + ".0", str(freq) + ".0"],
+                          cwd=work_dir)
     if ret:
         sys.exit(ret)
 
-    with file("pll_config.bin") as file_handle:
+    with open(os.path.join(work_dir, "pll_config.bin")) as file_handle:
         config_string = file_handle.read()
 
     return config_string.rstrip('\n')
 
 
+def get_pll_settings_isolated(tcl_script, ref_freq, freq):
+    """
+    Like get_pll_settings(), in a private temporary directory so that
+    concurrent runs don't share pll_config.bin or the Quartus database.
+    Quartus output goes to a log in that directory, which is kept if
+    the run fails.
+    """
+    work_dir = tempfile.mkdtemp(prefix="iopll_{0:d}_".format(freq))
+    log_file = os.path.join(work_dir, "quartus_sh.log")
+    with open(log_file, "w") as log:
+        ret = subprocess.call(["quartus_sh", "-t", tcl_script,
+                               str(ref_freq) + ".0", str(freq) + ".0"],
+                              cwd=work_dir, stdout=log,
+                              stderr=subprocess.STDOUT)
+    if ret:
+        return freq, ret, log_file
+
+    with open(os.path.join(work_dir, "pll_config.bin")) as file_handle:
+        config_string = file_handle.read()
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return freq, 0, config_string.rstrip('\n')
+
+
 def format_config(config_string):
     """ Create a C data structure with pll config values """
     return ('\t{{ {0:d}, {1:#x}, {2:#x}, {3:#x}, {4:#x}, {5:#x}, '
@@ -30,6 +59,106 @@ def format_config(config_string):
             *list([int(x) for x in config_string.split()]))
 
 
+def checkpoint_key(tcl_script, ref_freq):
+    """ First line of a checkpoint file, naming the run it belongs to """
+    return "# {0} {1:d}\n".format(os.path.basename(tcl_script), ref_freq)
+
+
+def read_checkpoint(checkpoint, tcl_script, ref_freq):
+    """
+    Return {freq: config string} of the frequencies already completed
+    in the checkpoint file. A partially written last line, from an
+    interrupted run, is ignored.
+    """
+    configs = {}
+    if not checkpoint or not os.path.exists(checkpoint):
+        return configs
+
+    with open(checkpoint) as file_handle:
+        lines = file_handle.readlines()
+
+    if lines and lines[0] != checkpoint_key(tcl_script, ref_freq):
+        sys.exit("Checkpoint {0} is from a different run ({1}), "
+                 "remove it to start over".format(checkpoint,
+                                                  lines[0].strip()))
+
+    for line in lines[1:]:
+        fields = line.split()
+        if not line.endswith("\n") or len(fields) != 9:
+            continue
+        configs[int(fields[0])] = " ".join(fields[1:])
+
+    return configs
+
+
+def open_checkpoint(checkpoint, tcl_script, ref_freq):
+    """ Open the checkpoint file for appending newly completed frequencies """
+    if not checkpoint:
+        return None
+
+    with open(checkpoint, "a+") as file_handle:
+        if file_handle.tell() == 0:
+            file_handle.write(checkpoint_key(tcl_script, ref_freq))
+        else:
+            # Terminate a partially written last line
+            file_handle.seek(file_handle.tell() - 1)
+            if file_handle.read(1) != "\n":
+                file_handle.write("\n")
+
+    return open(checkpoint, "a")
+
+
+def add_checkpoint(file_handle, freq, config_string):
+    """ Record one completed frequency """
+    if file_handle:
+        file_handle.write("{0:d} {1}\n".format(freq, config_string))
+        file_handle.flush()
+
+
+def generate_configs(tcl_script, ref_freq, freqs, jobs, checkpoint):
+    """
+    Return {freq: config string} for each frequency, skipping the
+    frequencies already in the checkpoint. With jobs > 1 each
+    frequency is generated in its own temporary directory.
+    """
+    configs = read_checkpoint(checkpoint, tcl_script, ref_freq)
+    todo = [freq for freq in freqs if freq not in configs]
+    if configs:
+        print("Resuming from {0}: {1:d} of {2:d} frequencies done".format(
+            checkpoint, len(freqs) - len(todo), len(freqs)))
+
+    done = open_checkpoint(checkpoint, tcl_script, ref_freq)
+    try:
+        if jobs <= 1:
+            for freq in todo:
+                configs[freq] = get_pll_settings(tcl_script, ref_freq, freq)
+                add_checkpoint(done, freq, configs[freq])
+            return configs
+
+        with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+            futures = [executor.submit(get_pll_settings_isolated,
+                                       tcl_script, ref_freq, freq)
+                       for freq in todo]
+            for future in concurrent.futures.as_completed(futures):
+                freq, ret, result = future.result()
+                if ret:
+                    for pending in futures:
+                        pending.cancel()
+                    print("quartus_sh failed for {0:d}MHz, see {1}".format(
+                        freq, result))
+                    sys.exit(ret)
+
+                configs[freq] = result
+                add_checkpoint(done, freq, result)
+                print("{0:d}MHz done ({1:d}/{2:d})".format(
+                    freq, len(configs), len(freqs)))
+    finally:
+        if done:
+            done.close()
+
+    return configs
+
+
 def file_header(file_handle, ref_freq, min_freq, max_freq):
     """ Add the C header file definitions to the top of the header file """
     file_handle.write("#define IOPLL_MIN_FREQ\t{0:d}\n".format(min_freq))
@@ -70,13 +199,27 @@ if __name__ == "__main__":
     MIN_FREQ = 10
     MAX_FREQ = 600
     C_HEADER = "user_clk_iopll_freq.h"
+    TCL_SCRIPT = "generate_pll_settings_s10.tcl"
+
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of quartus_sh runs at a time, each in "
+                        "its own temporary directory (default: 1, in the "
+                        "current directory)")
+    PARSER.add_argument("--checkpoint",
+                        help="Record each completed frequency in this file "
+                        "and skip the frequencies it already holds")
+    ARGS = PARSER.parse_args()
+
+    FREQS = range(MIN_FREQ, MAX_FREQ + 1)
+    CONFIGS = generate_configs(os.path.abspath(TCL_SCRIPT), REF_FREQ, FREQS,
+                               ARGS.jobs, ARGS.checkpoint)
 
     with open(C_HEADER, "w") as iopll_config:
         file_header(iopll_config, REF_FREQ, MIN_FREQ, MAX_FREQ)
 
-        for frequency in range(MIN_FREQ, MAX_FREQ + 1):
-            config = get_pll_settings(REF_FREQ, frequency)
-            init_struct = format_config(config)
+        for frequency in FREQS:
+            init_struct = format_config(CONFIGS[frequency])
             iopll_config.write(init_struct +
                                ("\n" if (frequency == MAX_FREQ)
                                 else ",\n"))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+"""
+Micro-benchmark for the axi4lite_shim rendering in fabric_gen.py
+
+Run Command "python3 bench_fabric_gen.py [--components 1000] [--repeat 5] [--baseline <git rev>]"
+
+Writes every shim of a synthetic fabric to /dev/null two ways: with the
+inst_if() methods of fabric_gen.py as of the given git revision, loaded with
+"git show", and with the ones in the working tree, which render through
+render_shim().
+"""
+
+import argparse
+import os
+import subprocess
+import timeit
+import types
+
+import fabric_gen
+
+BASELINE_REV = 'fb9599d'
+
+
+def load_baseline(rev):
+    source = subprocess.check_output(['git', 'show', f'{rev}:./fabric_gen.py'], text=True,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+    module = types.ModuleType(f'fabric_gen_{rev}')
+    exec(compile(source, f'{rev}:fabric_gen.py', 'exec'), module.__dict__)
+    return module
+
+
+def run_inst_if(module, components):
+    classes = {'mst': module.MasterReg, 'slv': module.SlaveReg}
+    for fab, dev, sfx, aw in components:
+        reg = types.SimpleNamespace(name=dev, fabric=fab, reg_type=sfx, addr_width=aw,
+                                    data_width=fabric_gen.DEFAULT_DW, capability=fabric_gen.DEFAULT_CAP)
+        classes[sfx].inst_if(reg)
+
+
+def synthetic_fabric(count):
+    return [('fab', f'dev{i}', 'mst' if i % 2 else 'slv', 16 + i % 8) for i in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--components', type=int, default=1000, help="Number of shims in the fabric")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing repetitions, the best one is reported")
+    parser.add_argument('--baseline', default=BASELINE_REV, help="Git revision of fabric_gen.py to compare against")
+
+    args = parser.parse_args()
+
+    components = synthetic_fabric(args.components)
+    baseline = load_baseline(args.baseline)
+    for module in (baseline, fabric_gen):
+        module.args = argparse.Namespace(tcl=os.devnull)
+
+    results = {}
+    for label, module in [('baseline', baseline), ('templates', fabric_gen)]:
+        best = min(timeit.repeat(lambda: run_inst_if(module, components), number=1, repeat=args.repeat))
+        results[label] = best
+        print(f"{label:<10} {best * 1e3:8.2f} ms total  {best / args.components * 1e6:8.2f} us/component")
+
+    print(f"speedup    {results['baseline'] / results['templates']:8.2f}x")
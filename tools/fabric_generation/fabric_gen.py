@@ -12,34 +12,230 @@ Run Command "python3 fabric_gen.py --cfg <fabric configuration file> --fabric ap
 
 """
 
-import abc
 import argparse
+import collections
+import functools
 import logging
 import logging.handlers
+import sys
 import yaml
 
+# Optional performance columns of the fabric definition. Every shim allows
+# 'capability' outstanding reads and 'capability/4' outstanding writes, so the
+# capability must be a multiple of 4. AXI4-Lite only allows 32 or 64 bit data.
+DEFAULT_CAP = 16
+MIN_CAP = 4
+MAX_CAP = 64
+DEFAULT_DW = 64
+AXI4LITE_DATA_WIDTHS = [32, 64]
+DEFAULT_PIPELINE = 1
+MAX_PIPELINE = 4
+DEFAULT_FIFO_TYPE = 'REGISTER_BASED'
+FIFO_TYPES = ['REGISTER_BASED', 'FIFO_BASED']
+
+ConnParams = collections.namedtuple('ConnParams', ['latency', 'all_pipelines', 'fifo_type'])
+DEFAULT_CONN = ConnParams(DEFAULT_PIPELINE, 'FALSE', DEFAULT_FIFO_TYPE)
+
+
+# axi4lite_shim signals as (signal, width, direction on the master interface).
+# Directions are flipped on the slave interface. Widths given as a template
+# field are filled in per component.
+AXI4LITE_SIGNALS = [
+    ('awaddr', '{aw}', 'Output'),
+    ('awprot', '3', 'Output'),
+    ('awvalid', '1', 'Output'),
+    ('awready', '1', 'Input'),
+    ('wdata', '{dw}', 'Output'),
+    ('wstrb', '{strb}', 'Output'),
+    ('wvalid', '1', 'Output'),
+    ('wready', '1', 'Input'),
+    ('bresp', '2', 'Input'),
+    ('bvalid', '1', 'Input'),
+    ('bready', '1', 'Output'),
+    ('araddr', '{aw}', 'Output'),
+    ('arprot', '3', 'Output'),
+    ('arvalid', '1', 'Output'),
+    ('arready', '1', 'Input'),
+    ('rdata', '{dw}', 'Input'),
+    ('rresp', '2', 'Input'),
+    ('rvalid', '1', 'Input'),
+    ('rready', '1', 'Output'),
+]
+
+AXI4LITE_SLAVE_PARAMS = [
+    ('associatedClock', 'clock'),
+    ('associatedReset', 'reset'),
+    ('bridgesToMaster', ''),
+    ('combinedAcceptanceCapability', '{cap}'),
+    ('maximumOutstandingReads', '{cap}'),
+    ('maximumOutstandingTransactions', '{cap}'),
+    ('maximumOutstandingWrites', '{wcap}'),
+    ('readAcceptanceCapability', '{cap}'),
+    ('writeAcceptanceCapability', '{wcap}'),
+    ('readDataReorderingDepth', '1'),
+    ('trustzoneAware', 'true'),
+]
+
+AXI4LITE_MASTER_PARAMS = [
+    ('associatedClock', 'clock'),
+    ('associatedReset', 'reset'),
+    ('combinedIssuingCapability', '{cap}'),
+    ('maximumOutstandingReads', '{cap}'),
+    ('maximumOutstandingTransactions', '{cap}'),
+    ('maximumOutstandingWrites', '{wcap}'),
+    ('readIssuingCapability', '{cap}'),
+    ('trustzoneAware', 'true'),
+    ('writeIssuingCapability', '{wcap}'),
+]
+
+
+def build_shim_templates(indent='        '):
+    """
+    Build the axi4lite_shim instantiation from the tables above as two
+    str.format() templates: the component header, which carries the
+    component name, and the interface body, which only depends on the
+    widths and capability.
+    """
+    header = [
+        'add_component {name} ip/{fab}/{name}.ip axi4lite_shim {name} 1.0',
+        'load_component {name}',
+        'set_component_parameter_value AW {{{aw}}}',
+        'set_component_parameter_value DW {{{dw}}}',
+        'set_component_project_property HIDE_FROM_IP_CATALOG {{false}}',
+        'save_component',
+        'load_instantiation {name}',
+    ]
+    lines = [
+        'remove_instantiation_interfaces_and_ports',
+        'add_instantiation_interface clock clock INPUT',
+        'set_instantiation_interface_parameter_value clock clockRate {{0}}',
+        'set_instantiation_interface_parameter_value clock externallyDriven {{false}}',
+        'set_instantiation_interface_parameter_value clock ptfSchematicName {{}}',
+        'add_instantiation_interface_port clock clk clk 1 STD_LOGIC Input',
+        'add_instantiation_interface reset reset INPUT',
+        'set_instantiation_interface_parameter_value reset associatedClock {{clock}}',
+        'set_instantiation_interface_parameter_value reset synchronousEdges {{DEASSERT}}',
+        'add_instantiation_interface_port reset rst_n reset_n 1 STD_LOGIC Input',
+    ]
+
+    flip = {'Input': 'Output', 'Output': 'Input'}
+    for itf, prefix, direction, params in [
+            ('altera_axi4lite_slave', 's_', 'INPUT', AXI4LITE_SLAVE_PARAMS),
+            ('altera_axi4lite_master', 'm_', 'OUTPUT', AXI4LITE_MASTER_PARAMS)]:
+        lines.append(f'add_instantiation_interface {itf} axi4lite {direction}')
+        for param, value in params:
+            lines.append(f'set_instantiation_interface_parameter_value {itf} {param} {{{{{value}}}}}')
+        for signal, width, mst_dir in AXI4LITE_SIGNALS:
+            port_type = 'STD_LOGIC' if width == '1' else 'STD_LOGIC_VECTOR'
+            port_dir = mst_dir if prefix == 'm_' else flip[mst_dir]
+            lines.append(f'add_instantiation_interface_port {itf} {prefix}{signal} {signal} {width} {port_type} {port_dir}')
+    lines.append('save_instantiation')
+
+    return ('\n' + ''.join(f'{indent}{line}\n' for line in header),
+            ''.join(f'{indent}{line}\n' for line in lines) + indent)
+
+
+SHIM_HEADER, SHIM_BODY = build_shim_templates()
+
+@functools.lru_cache(maxsize=None)
+def get_shim_blocks(fab, aw, dw, cap):
+    """
+    Format everything but the component name once per fabric, widths and
+    capability, split around the name so render_shim() only has to join.
+    """
+    blocks = [block.format(fab=fab, aw=aw, dw=dw) for block in SHIM_HEADER.split('{name}')]
+    blocks[-1] += SHIM_BODY.format(aw=aw, dw=dw, strb=dw // 8, cap=cap, wcap=f'{cap}/4')
+    return tuple(blocks)
+
+def render_shim(fab, dev, sfx, aw, dw, cap):
+    return f'{fab}_{dev}_{sfx}'.join(get_shim_blocks(fab, aw, dw, cap))
+
+def write_tcl(text):
+    with open(args.tcl, 'a') as fOut:
+        fOut.write(text)
+
+
+def fabric_config_error(msg):
+    sys.exit(f"!!Fabric Config Error!! {msg}")
+
+def is_unset(value):
+    return value is None or value.lower() == 'n/a'
+
+def parse_capability(name, value):
+    if is_unset(value):
+        return DEFAULT_CAP
+    try:
+        cap = int(value, 0)
+    except ValueError:
+        fabric_config_error(f"{name}: capability {value} is not an integer")
+    if cap < MIN_CAP or cap > MAX_CAP or cap % 4:
+        fabric_config_error(f"{name}: capability {cap} must be a multiple of 4 between {MIN_CAP} and {MAX_CAP}")
+    return cap
+
+def parse_data_width(name, value):
+    if is_unset(value):
+        return DEFAULT_DW
+    if not value.isdigit() or int(value) not in AXI4LITE_DATA_WIDTHS:
+        fabric_config_error(f"{name}: AXI4-Lite data width must be one of {AXI4LITE_DATA_WIDTHS}, not {value}")
+    return int(value)
+
+def parse_conn_params(name, pipeline, fifo_type, default=DEFAULT_CONN):
+    """
+    PIPELINE is the number of additional interconnect pipeline stages
+    (0..MAX_PIPELINE) or 'max' to pipeline every interconnect stage.
+    """
+    latency, all_pipelines = default.latency, default.all_pipelines
+    if not is_unset(pipeline):
+        if pipeline.lower() == 'max':
+            latency, all_pipelines = MAX_PIPELINE, 'TRUE'
+        elif pipeline.isdigit() and int(pipeline) <= MAX_PIPELINE:
+            latency, all_pipelines = int(pipeline), 'FALSE'
+        else:
+            fabric_config_error(f"{name}: pipeline stages must be 0..{MAX_PIPELINE} or 'max', not {pipeline}")
+
+    fifo = default.fifo_type
+    if not is_unset(fifo_type):
+        fifo = fifo_type.upper()
+        if fifo not in FIFO_TYPES:
+            fabric_config_error(f"{name}: FIFO type must be one of {FIFO_TYPES}, not {fifo_type}")
+
+    return ConnParams(latency, all_pipelines, fifo)
+
+
 class Register:
-    def __init__(self, name, base_addr, addr_width, fabric):
+    def __init__(self, name, base_addr, addr_width, fabric, capability=None, data_width=None):
         self.name = name
         self.base_addr = base_addr
         self.addr_width = addr_width
         self.fabric = fabric
+        self.capability = parse_capability(name, capability)
+        self.data_width = parse_data_width(name, data_width)
 
-    @abc.abstractmethod
     def inst_if(self):
-        #raise NotImplementedError()
-        pass
+        write_tcl(render_shim(self.fabric, self.name, self.reg_type,
+                              self.addr_width, self.data_width, self.capability))
 
 
 class MasterReg(Register):
     #def __init__(self, name, reg_type, base_addr, addr_width, fabric, slaves, enabled_ports):
-    def __init__(self, name, reg_type, base_addr, addr_width, fabric, slaves):
+    def __init__(self, name, reg_type, base_addr, addr_width, fabric, slaves,
+                 capability=None, data_width=None, pipeline=None, fifo_type=None):
         self.reg_type = 'mst'
-        all_slaves = slaves.split(',')
+        super(MasterReg, self).__init__(name, base_addr, addr_width, fabric, capability, data_width)
+        self.default_conn = parse_conn_params(name, pipeline, fifo_type)
+
+        # Each slave may override the master's connection settings with
+        # <slave>:<pipeline>:<fifo type>
+        all_slaves = []
+        self.conn_params = {}
+        for entry in slaves.split(','):
+            slave, *conn = entry.split(':')
+            conn += [None] * (2 - len(conn))
+            all_slaves.append(slave)
+            self.conn_params[slave] = parse_conn_params(f"{name}->{slave}", *conn[:2], default=self.default_conn)
         #self.slaves = all_slaves
         #self.slaves = self.enable_slaves_by_feature(enabled_ports, all_slaves)
         self.slaves = self.enable_slaves_by_feature(all_slaves)
-        super(MasterReg, self).__init__(name, base_addr, addr_width, fabric)
 
     #def enable_slaves_by_feature(self, enabled_ports, all_slaves):
     def enable_slaves_by_feature(self, all_slaves):
@@ -55,95 +251,7 @@ class MasterReg(Register):
         for slave in self.slaves:
             print(f'{slave}')
 
-    def inst_if(self):
-        dev = self.name 
-        fab = self.fabric
-        aw = self.addr_width
-        cap = 16
-        content = []
-        content.append(f'''
-        add_component {fab}_{dev}_mst ip/{fab}/{fab}_{dev}_mst.ip axi4lite_shim {fab}_{dev}_mst 1.0
-        load_component {fab}_{dev}_mst
-        set_component_parameter_value AW {{{aw}}}
-        set_component_parameter_value DW {{64}}
-        set_component_project_property HIDE_FROM_IP_CATALOG {{false}}
-        save_component
-        load_instantiation {fab}_{dev}_mst
-        remove_instantiation_interfaces_and_ports
-        add_instantiation_interface clock clock INPUT
-        set_instantiation_interface_parameter_value clock clockRate {{0}}
-        set_instantiation_interface_parameter_value clock externallyDriven {{false}}
-        set_instantiation_interface_parameter_value clock ptfSchematicName {{}}
-        add_instantiation_interface_port clock clk clk 1 STD_LOGIC Input
-        add_instantiation_interface reset reset INPUT
-        set_instantiation_interface_parameter_value reset associatedClock {{clock}}
-        set_instantiation_interface_parameter_value reset synchronousEdges {{DEASSERT}}
-        add_instantiation_interface_port reset rst_n reset_n 1 STD_LOGIC Input
-        add_instantiation_interface altera_axi4lite_slave axi4lite INPUT
-        set_instantiation_interface_parameter_value altera_axi4lite_slave associatedClock {{clock}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave associatedReset {{reset}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave bridgesToMaster {{}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave combinedAcceptanceCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingReads {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingTransactions {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingWrites {{{cap}/4}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave readAcceptanceCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave writeAcceptanceCapability {{{cap}/4}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave readDataReorderingDepth {{1}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave trustzoneAware {{true}}
-        add_instantiation_interface_port altera_axi4lite_slave s_awaddr awaddr {aw} STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awprot awprot 3 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awvalid awvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awready awready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_wdata wdata 64 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wstrb wstrb 8 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wvalid wvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wready wready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bresp bresp 2 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bvalid bvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bready bready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_araddr araddr {aw} STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arprot arprot 3 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arvalid arvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arready arready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rdata rdata 64 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rresp rresp 2 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rvalid rvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rready rready 1 STD_LOGIC Input
-        add_instantiation_interface altera_axi4lite_master axi4lite OUTPUT
-        set_instantiation_interface_parameter_value altera_axi4lite_master associatedClock {{clock}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master associatedReset {{reset}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master combinedIssuingCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingReads {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingTransactions {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingWrites {{{cap}/4}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master readIssuingCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master trustzoneAware {{true}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master writeIssuingCapability {{{cap}/4}}
-        add_instantiation_interface_port altera_axi4lite_master m_awaddr awaddr {aw} STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_awprot awprot 3 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_awvalid awvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_awready awready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_wdata wdata 64 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_wstrb wstrb 8 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_wvalid wvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_wready wready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_bresp bresp 2 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_bvalid bvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_bready bready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_araddr araddr {aw} STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_arprot arprot 3 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_arvalid arvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_arready arready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_rdata rdata 64 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_rresp rresp 2 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_rvalid rvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_rready rready 1 STD_LOGIC Output
-        save_instantiation
-        ''')
 
-        with open(args.tcl, 'a') as fOut:
-            fOut.write('\n'.join(content))
         
     def conn_dev_clkrst(self):
         dev = self.name
@@ -165,6 +273,7 @@ class MasterReg(Register):
             fOut.write('\n'.join(content))
 
     def conn_default_slv(self, fab, mst):
+        conn = self.default_conn
         content = []
         content.append(f'''
 	add_connection {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave
@@ -176,16 +285,16 @@ class MasterReg(Register):
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave domainAlias {{}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.burstAdapterImplementation {{GENERIC_CONVERTER}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.clockCrossingAdapter {{HANDSHAKE}}
-	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.enableAllPipelines {{FALSE}}
+	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.enableAllPipelines {{{conn.all_pipelines}}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.enableEccProtection {{FALSE}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.enableInstrumentation {{FALSE}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.insertDefaultSlave {{FALSE}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.interconnectResetSource {{DEFAULT}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.interconnectType {{STANDARD}}
-	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.maxAdditionalLatency {{1}}
+	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.maxAdditionalLatency {{{conn.latency}}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.optimizeRdFifoSize {{FALSE}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.piplineType {{PIPELINE_STAGE}}
-	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.responseFifoType {{REGISTER_BASED}}
+	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.responseFifoType {{{conn.fifo_type}}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.syncResets {{FALSE}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave qsys_mm.widthAdapterImplementation {{GENERIC_CONVERTER}}
 	set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_default_slv.altera_axi4lite_slave slaveDataWidthSysInfo {{-1}}''')
@@ -196,6 +305,7 @@ class MasterReg(Register):
    
 
     def conn_slv_dev(self, dev, fab, mst, addr):
+        conn = self.conn_params[dev]
         content = []
         content.append(f'''
         add_connection {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave
@@ -207,12 +317,14 @@ class MasterReg(Register):
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave domainAlias {{}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.burstAdapterImplementation {{GENERIC_CONVERTER}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.clockCrossingAdapter {{HANDSHAKE}}
+        set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.enableAllPipelines {{{conn.all_pipelines}}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.enableEccProtection {{FALSE}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.enableInstrumentation {{FALSE}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.insertDefaultSlave {{FALSE}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.interconnectResetSource {{DEFAULT}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.interconnectType {{STANDARD}}
-        set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.maxAdditionalLatency {{1}}
+        set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.maxAdditionalLatency {{{conn.latency}}}
+        set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.responseFifoType {{{conn.fifo_type}}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.syncResets {{FALSE}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave qsys_mm.widthAdapterImplementation {{GENERIC_CONVERTER}}
         set_connection_parameter_value {fab}_{mst}_mst.altera_axi4lite_master/{fab}_{dev}_slv.altera_axi4lite_slave slaveDataWidthSysInfo {{-1}}
@@ -223,101 +335,12 @@ class MasterReg(Register):
     
 
 class SlaveReg(Register):
-    def __init__(self, name, reg_type, base_addr, addr_width, fabric, slaves):
+    def __init__(self, name, reg_type, base_addr, addr_width, fabric, slaves,
+                 capability=None, data_width=None, pipeline=None, fifo_type=None):
+        # Connection settings belong to the masters, pipeline and FIFO type
+        # columns are ignored for slaves.
         self.reg_type = 'slv'
-        super(SlaveReg, self).__init__(name, base_addr, addr_width, fabric)
-
-    def inst_if(self):
-        dev = self.name 
-        fab = self.fabric
-        aw = self.addr_width
-        cap = 16
-        content = []
-        content.append(f'''
-        add_component {fab}_{dev}_slv ip/{fab}/{fab}_{dev}_slv.ip axi4lite_shim {fab}_{dev}_slv 1.0
-        load_component {fab}_{dev}_slv
-        set_component_parameter_value AW {{{aw}}}
-        set_component_parameter_value DW {{64}}
-        set_component_project_property HIDE_FROM_IP_CATALOG {{false}}
-        save_component
-        load_instantiation {fab}_{dev}_slv
-        remove_instantiation_interfaces_and_ports
-        add_instantiation_interface clock clock INPUT
-        set_instantiation_interface_parameter_value clock clockRate {{0}}
-        set_instantiation_interface_parameter_value clock externallyDriven {{false}}
-        set_instantiation_interface_parameter_value clock ptfSchematicName {{}}
-        add_instantiation_interface_port clock clk clk 1 STD_LOGIC Input
-        add_instantiation_interface reset reset INPUT
-        set_instantiation_interface_parameter_value reset associatedClock {{clock}}
-        set_instantiation_interface_parameter_value reset synchronousEdges {{DEASSERT}}
-        add_instantiation_interface_port reset rst_n reset_n 1 STD_LOGIC Input
-        add_instantiation_interface altera_axi4lite_slave axi4lite INPUT
-        set_instantiation_interface_parameter_value altera_axi4lite_slave associatedClock {{clock}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave associatedReset {{reset}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave bridgesToMaster {{}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave combinedAcceptanceCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingReads {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingTransactions {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingWrites {{{cap}/4}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave readAcceptanceCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave readDataReorderingDepth {{1}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave trustzoneAware {{true}}
-        set_instantiation_interface_parameter_value altera_axi4lite_slave writeAcceptanceCapability {{{cap}/4}}
-        add_instantiation_interface_port altera_axi4lite_slave s_awaddr awaddr {aw} STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awprot awprot 3 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awvalid awvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_awready awready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_wdata wdata 64 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wstrb wstrb 8 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wvalid wvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_wready wready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bresp bresp 2 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bvalid bvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_bready bready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_araddr araddr {aw} STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arprot arprot 3 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arvalid arvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_slave s_arready arready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rdata rdata 64 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rresp rresp 2 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rvalid rvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_slave s_rready rready 1 STD_LOGIC Input
-        add_instantiation_interface altera_axi4lite_master axi4lite OUTPUT
-        set_instantiation_interface_parameter_value altera_axi4lite_master associatedClock {{clock}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master associatedReset {{reset}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master combinedIssuingCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingReads {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingTransactions {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingWrites {{{cap}/4}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master readIssuingCapability {{{cap}}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master trustzoneAware {{true}}
-        set_instantiation_interface_parameter_value altera_axi4lite_master writeIssuingCapability {{{cap}/4}}
-        add_instantiation_interface_port altera_axi4lite_master m_awaddr awaddr {aw} STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_awprot awprot 3 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_awvalid awvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_awready awready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_wdata wdata 64 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_wstrb wstrb 8 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_wvalid wvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_wready wready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_bresp bresp 2 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_bvalid bvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_bready bready 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_araddr araddr {aw} STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_arprot arprot 3 STD_LOGIC_VECTOR Output
-        add_instantiation_interface_port altera_axi4lite_master m_arvalid arvalid 1 STD_LOGIC Output
-        add_instantiation_interface_port altera_axi4lite_master m_arready arready 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_rdata rdata 64 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_rresp rresp 2 STD_LOGIC_VECTOR Input
-        add_instantiation_interface_port altera_axi4lite_master m_rvalid rvalid 1 STD_LOGIC Input
-        add_instantiation_interface_port altera_axi4lite_master m_rready rready 1 STD_LOGIC Output
-        save_instantiation
-        ''')
-
-        with open(args.tcl, 'a') as fOut:
-            fOut.write('\n'.join(content))
-
-
+        super(SlaveReg, self).__init__(name, base_addr, addr_width, fabric, capability, data_width)
 
     def conn_dev_clkrst(self):
         dev = self.name
@@ -558,179 +581,11 @@ def exp_clk_rst(fab):
         fOut.write('\n'.join(content))
 
 def inst_mst_if(dev, fab, aw):
-    cap = 16
-    content = []
-    content.append(f'''
-	add_component {fab}_{dev}_mst ip/{fab}/{fab}_{dev}_mst.ip axi4lite_shim {fab}_{dev}_mst 1.0
-	load_component {fab}_{dev}_mst
-	set_component_parameter_value AW {{{aw}}}
-	set_component_parameter_value DW {{64}}
-          set_component_project_property HIDE_FROM_IP_CATALOG {{false}}
-	save_component
-	load_instantiation {fab}_{dev}_mst
-	remove_instantiation_interfaces_and_ports
-	add_instantiation_interface clock clock INPUT
-	set_instantiation_interface_parameter_value clock clockRate {{0}}
-	set_instantiation_interface_parameter_value clock externallyDriven {{false}}
-	set_instantiation_interface_parameter_value clock ptfSchematicName {{}}
-	add_instantiation_interface_port clock clk clk 1 STD_LOGIC Input
-	add_instantiation_interface reset reset INPUT
-	set_instantiation_interface_parameter_value reset associatedClock {{clock}}
-	set_instantiation_interface_parameter_value reset synchronousEdges {{DEASSERT}}
-	add_instantiation_interface_port reset rst_n reset_n 1 STD_LOGIC Input
-	add_instantiation_interface altera_axi4lite_slave axi4lite INPUT
-	set_instantiation_interface_parameter_value altera_axi4lite_slave associatedClock {{clock}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave associatedReset {{reset}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave bridgesToMaster {{}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave combinedAcceptanceCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingReads {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingTransactions {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingWrites {{{cap}/4}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave readAcceptanceCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave writeAcceptanceCapability {{{cap}/4}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave readDataReorderingDepth {{1}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave trustzoneAware {{true}}
-	add_instantiation_interface_port altera_axi4lite_slave s_awaddr awaddr {aw} STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awprot awprot 3 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awvalid awvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awready awready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_wdata wdata 64 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wstrb wstrb 8 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wvalid wvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wready wready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bresp bresp 2 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bvalid bvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bready bready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_araddr araddr {aw} STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arprot arprot 3 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arvalid arvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arready arready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rdata rdata 64 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rresp rresp 2 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rvalid rvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rready rready 1 STD_LOGIC Input
-	add_instantiation_interface altera_axi4lite_master axi4lite OUTPUT
-	set_instantiation_interface_parameter_value altera_axi4lite_master associatedClock {{clock}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master associatedReset {{reset}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master combinedIssuingCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingReads {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingTransactions {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingWrites {{{cap}/4}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master readIssuingCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master trustzoneAware {{true}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master writeIssuingCapability {{{cap}/4}}
-	add_instantiation_interface_port altera_axi4lite_master m_awaddr awaddr {aw} STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_awprot awprot 3 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_awvalid awvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_awready awready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_wdata wdata 64 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_wstrb wstrb 8 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_wvalid wvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_wready wready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_bresp bresp 2 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_bvalid bvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_bready bready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_araddr araddr {aw} STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_arprot arprot 3 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_arvalid arvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_arready arready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_rdata rdata 64 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_rresp rresp 2 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_rvalid rvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_rready rready 1 STD_LOGIC Output
-	save_instantiation
-    ''')
-
-    with open(args.tcl, 'a') as fOut:
-        fOut.write('\n'.join(content))
+    write_tcl(render_shim(fab, dev, 'mst', aw, DEFAULT_DW, DEFAULT_CAP))
 
 def inst_slv_if(dev, fab, aw):
-    cap = 16
-    content = []
-    content.append(f'''
-	add_component {fab}_{dev}_slv ip/{fab}/{fab}_{dev}_slv.ip axi4lite_shim {fab}_{dev}_slv 1.0
-	load_component {fab}_{dev}_slv
-	set_component_parameter_value AW {{{aw}}}
-	set_component_parameter_value DW {{64}}
-	set_component_project_property HIDE_FROM_IP_CATALOG {{false}}
-	save_component
-	load_instantiation {fab}_{dev}_slv
-	remove_instantiation_interfaces_and_ports
-	add_instantiation_interface clock clock INPUT
-	set_instantiation_interface_parameter_value clock clockRate {{0}}
-	set_instantiation_interface_parameter_value clock externallyDriven {{false}}
-	set_instantiation_interface_parameter_value clock ptfSchematicName {{}}
-	add_instantiation_interface_port clock clk clk 1 STD_LOGIC Input
-	add_instantiation_interface reset reset INPUT
-	set_instantiation_interface_parameter_value reset associatedClock {{clock}}
-	set_instantiation_interface_parameter_value reset synchronousEdges {{DEASSERT}}
-	add_instantiation_interface_port reset rst_n reset_n 1 STD_LOGIC Input
-	add_instantiation_interface altera_axi4lite_slave axi4lite INPUT
-	set_instantiation_interface_parameter_value altera_axi4lite_slave associatedClock {{clock}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave associatedReset {{reset}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave bridgesToMaster {{}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave combinedAcceptanceCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingReads {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingTransactions {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave maximumOutstandingWrites {{{cap}/4}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave readAcceptanceCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave readDataReorderingDepth {{1}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave trustzoneAware {{true}}
-	set_instantiation_interface_parameter_value altera_axi4lite_slave writeAcceptanceCapability {{{cap}/4}}
-	add_instantiation_interface_port altera_axi4lite_slave s_awaddr awaddr {aw} STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awprot awprot 3 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awvalid awvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_awready awready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_wdata wdata 64 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wstrb wstrb 8 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wvalid wvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_wready wready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bresp bresp 2 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bvalid bvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_bready bready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_araddr araddr {aw} STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arprot arprot 3 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arvalid arvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_slave s_arready arready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rdata rdata 64 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rresp rresp 2 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rvalid rvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_slave s_rready rready 1 STD_LOGIC Input
-	add_instantiation_interface altera_axi4lite_master axi4lite OUTPUT
-	set_instantiation_interface_parameter_value altera_axi4lite_master associatedClock {{clock}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master associatedReset {{reset}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master combinedIssuingCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingReads {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingTransactions {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master maximumOutstandingWrites {{{cap}/4}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master readIssuingCapability {{{cap}}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master trustzoneAware {{true}}
-	set_instantiation_interface_parameter_value altera_axi4lite_master writeIssuingCapability {{{cap}/4}}
-	add_instantiation_interface_port altera_axi4lite_master m_awaddr awaddr {aw} STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_awprot awprot 3 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_awvalid awvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_awready awready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_wdata wdata 64 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_wstrb wstrb 8 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_wvalid wvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_wready wready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_bresp bresp 2 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_bvalid bvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_bready bready 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_araddr araddr {aw} STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_arprot arprot 3 STD_LOGIC_VECTOR Output
-	add_instantiation_interface_port altera_axi4lite_master m_arvalid arvalid 1 STD_LOGIC Output
-	add_instantiation_interface_port altera_axi4lite_master m_arready arready 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_rdata rdata 64 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_rresp rresp 2 STD_LOGIC_VECTOR Input
-	add_instantiation_interface_port altera_axi4lite_master m_rvalid rvalid 1 STD_LOGIC Input
-	add_instantiation_interface_port altera_axi4lite_master m_rready rready 1 STD_LOGIC Output
-	save_instantiation
-    ''')
+    write_tcl(render_shim(fab, dev, 'slv', aw, DEFAULT_DW, DEFAULT_CAP))
 
-    with open(args.tcl, 'a') as fOut:
-        fOut.write('\n'.join(content))
-    
 
 def conn_dev_clkrst(dev, fab, itf):
     content = []
@@ -855,12 +710,12 @@ def find_fabric_ports(features):
 
     return enabled_ports
 
-def read_configuration():
+def read_configuration(fabric_def, fabric_name):
     reg_config = None
     design_config = None
 
-    with open(args.fabric_def) as fIn:
-        print(f"Reading {args.fabric_def} for Fabric {args.fabric_name} configuration")
+    with open(fabric_def) as fIn:
+        print(f"Reading {fabric_def} for Fabric {fabric_name} configuration")
         reg_config = fIn.readlines()
 
     #with open('features_config.yaml') as f:
@@ -874,22 +729,27 @@ def read_configuration():
     reg_mapping = {'mst':{}, 
                    'slv':{}}
 
-    fabric = args.fabric_name
+    fabric = fabric_name
     for entry in reg_config:
         if entry.startswith('#'):
             continue
 
-        reg_device, reg_type, base_addr, addr_width, slaves = entry.split()
+        fields = entry.split()
+        if not fields:
+            continue
+        if len(fields) < 5 or len(fields) > 9:
+            fabric_config_error(f"Expecting 5 to 9 columns, got: {entry.strip()}")
+        reg_device, reg_type, base_addr, addr_width, slaves, *perf = fields
         print(f"Processing {reg_device} {reg_type}")
         #if reg_device not in enabled_ports:
             #continue 
         if reg_type == 'mst':
             #master_reg = MasterReg(reg_device, reg_type, base_addr, addr_width, fabric, slaves, enabled_ports)
-            master_reg = MasterReg(reg_device, reg_type, base_addr, addr_width, fabric, slaves)
+            master_reg = MasterReg(reg_device, reg_type, base_addr, addr_width, fabric, slaves, *perf)
             master_reg.show_slaves()
             reg_mapping['mst'][master_reg.name] = master_reg
         else:
-            slave_reg = SlaveReg(reg_device, reg_type, base_addr, addr_width, fabric, slaves) 
+            slave_reg = SlaveReg(reg_device, reg_type, base_addr, addr_width, fabric, slaves, *perf)
             #if reg_device in enabled_ports:
             reg_mapping['slv'][slave_reg.name] = slave_reg
 
@@ -924,7 +784,7 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
     
-    reg_mapping = read_configuration()
+    reg_mapping = read_configuration(args.fabric_def, args.fabric_name)
     write_fabric_design_output(reg_mapping)
     write_qsys_output(reg_mapping, 'AGFB014R24A2E2V', 'Agilex')
 
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+"""
+Transaction-level throughput model for fabrics generated by fabric_gen.py
+
+input: <fabric connection>.txt file and, optionally, a request trace
+Run Command "python3 fabric_sim.py --fabric_def <fabric configuration file> --fabric_name <fabric> [--trace <trace file>]"
+>> python3 fabric_sim.py --fabric_def apf.txt --fabric_name apf --rate 0.25 --read_ratio 0.75
+>> python3 fabric_sim.py --fabric_def apf.txt --fabric_name apf --trace st2mm.csv --json apf_sim.json
+
+The model is cycle based and follows the Platform Designer system written by
+fabric_gen.py:
+  * every master and slave sits behind an axi4lite_shim that allows
+    CAPABILITY outstanding reads and CAPABILITY/4 outstanding writes,
+  * every master to slave connection adds its PIPELINE stages
+    (qsys_mm.maxAdditionalLatency) on the command and on the response path,
+  * each slave arbitrates round-robin between the masters targeting it and
+    grants one read and one write per cycle (AXI4-Lite is single beat and
+    the read and write channels are independent),
+  * addresses that do not decode to a connected slave go to the default slave.
+
+Trace file format (one request per line, '#' means comment):
+    <cycle>, <master>, <R|W>, <address>
+"""
+
+import argparse
+import collections
+import heapq
+import json
+import random
+
+from fabric_gen import read_configuration
+
+DEFAULT_SLV_CAP = 1
+DEFAULT_SLV_LATENCY = 1
+
+READ = 0
+WRITE = 1
+CHANNELS = (READ, WRITE)
+CHANNEL_NAMES = ('rd', 'wr')
+
+
+class Transaction:
+    __slots__ = ('master', 'slave', 'channel', 'created', 'issued', 'ready', 'done')
+
+    def __init__(self, master, slave, channel, created):
+        self.master = master
+        self.slave = slave
+        self.channel = channel
+        self.created = created
+        self.issued = None
+        self.ready = None
+        self.done = None
+
+
+class SimPort:
+    """
+    Common state for one side of an axi4lite_shim
+    """
+    def __init__(self, name, cap):
+        self.name = name
+        self.cap = cap
+        self.limit = (cap, max(1, cap // 4))
+        self.outstanding = [0, 0]
+        self.peak_outstanding = [0, 0]
+        self.completed = [0, 0]
+
+    def has_credit(self, channel):
+        return (self.outstanding[channel] < self.limit[channel] and
+                sum(self.outstanding) < self.cap)
+
+    def take_credit(self, channel):
+        self.outstanding[channel] += 1
+        self.peak_outstanding[channel] = max(self.peak_outstanding[channel],
+                                             self.outstanding[channel])
+
+    def release_credit(self, channel):
+        self.outstanding[channel] -= 1
+        self.completed[channel] += 1
+
+
+class SimMaster(SimPort):
+    def __init__(self, name, cap, data_width, slaves, pipeline, default_slave):
+        super(SimMaster, self).__init__(name, cap)
+        self.data_bytes = data_width // 8
+        self.slaves = slaves
+        self.pipeline = pipeline
+        self.default_slave = default_slave
+        self.pending = (collections.deque(), collections.deque())
+        self.offered = [0, 0]
+        self.issue_stalls = [0, 0]
+
+    def decode(self, address):
+        for slave in self.slaves:
+            if slave.base_addr <= address < slave.base_addr + slave.size:
+                return slave
+        return self.default_slave
+
+
+class SimSlave(SimPort):
+    def __init__(self, name, cap, base_addr, addr_width, latency):
+        super(SimSlave, self).__init__(name, cap)
+        self.base_addr = base_addr
+        self.size = 1 << addr_width
+        self.latency = latency
+        self.queues = ({}, {})
+        self.rr_last = [None, None]
+        self.arb_stalls = [0, 0]
+        self.accept_stalls = [0, 0]
+        self.bytes = 0
+        self.latencies = []
+
+    def enqueue(self, txn):
+        self.queues[txn.channel].setdefault(txn.master.name, collections.deque()).append(txn)
+
+    def arbitrate(self, channel, now):
+        """
+        Round-robin grant of one ready request on a channel. Returns None when
+        nothing is granted this cycle.
+        """
+        ready = [m for m, q in sorted(self.queues[channel].items())
+                 if q and q[0].ready <= now]
+        if not ready:
+            return None
+        if not self.has_credit(channel):
+            self.accept_stalls[channel] += len(ready)
+            return None
+
+        winner = ready[0]
+        if self.rr_last[channel] is not None:
+            for m in ready:
+                if m > self.rr_last[channel]:
+                    winner = m
+                    break
+        self.rr_last[channel] = winner
+        self.arb_stalls[channel] += len(ready) - 1
+
+        return self.queues[channel][winner].popleft()
+
+
+class FabricSim:
+    def __init__(self, reg_mapping, pipeline_latency, slave_latency, capability, seed):
+        self.rng = random.Random(seed)
+
+        self.default_slave = SimSlave('default', DEFAULT_SLV_CAP, 0, 0, DEFAULT_SLV_LATENCY)
+        self.slaves = {}
+        for slv in reg_mapping['slv'].values():
+            self.slaves[slv.name] = SimSlave(
+                slv.name,
+                capability.get(f'{slv.name}_slv', slv.capability),
+                int(slv.base_addr, 0),
+                int(slv.addr_width),
+                slave_latency.get(slv.name, slave_latency['*']))
+
+        self.masters = {}
+        for mst in reg_mapping['mst'].values():
+            # Cycles added by the interconnect in each direction, per target
+            pipeline = {s: c.latency for s, c in mst.conn_params.items()}
+            pipeline[self.default_slave.name] = mst.default_conn.latency
+            if pipeline_latency is not None:
+                pipeline = dict.fromkeys(pipeline, pipeline_latency)
+            self.masters[mst.name] = SimMaster(
+                mst.name,
+                capability.get(f'{mst.name}_mst', mst.capability),
+                mst.data_width,
+                [self.slaves[s] for s in mst.slaves],
+                pipeline,
+                self.default_slave)
+
+        self.in_flight = []
+        self.seq = 0
+        self.now = 0
+
+    def all_slaves(self):
+        return list(self.slaves.values()) + [self.default_slave]
+
+    def request(self, master, channel, address=None):
+        mst = self.masters[master]
+        if address is None:
+            slave = self.rng.choice(mst.slaves) if mst.slaves else self.default_slave
+        else:
+            slave = mst.decode(address)
+        mst.pending[channel].append(Transaction(mst, slave, channel, self.now))
+        mst.offered[channel] += 1
+
+    def step(self):
+        now = self.now
+
+        while self.in_flight and self.in_flight[0][0] <= now:
+            _, _, txn = heapq.heappop(self.in_flight)
+            txn.master.release_credit(txn.channel)
+            txn.slave.release_credit(txn.channel)
+            txn.slave.bytes += txn.master.data_bytes
+            txn.slave.latencies.append(txn.done - txn.created)
+
+        for mst in self.masters.values():
+            for channel in CHANNELS:
+                if not mst.pending[channel]:
+                    continue
+                if not mst.has_credit(channel):
+                    mst.issue_stalls[channel] += 1
+                    continue
+                txn = mst.pending[channel].popleft()
+                mst.take_credit(channel)
+                txn.issued = now
+                txn.ready = now + mst.pipeline[txn.slave.name]
+                txn.slave.enqueue(txn)
+
+        for slave in self.all_slaves():
+            for channel in CHANNELS:
+                txn = slave.arbitrate(channel, now)
+                if txn is None:
+                    continue
+                slave.take_credit(channel)
+                txn.done = now + slave.latency + txn.master.pipeline[slave.name]
+                heapq.heappush(self.in_flight, (txn.done, self.seq, txn))
+                self.seq += 1
+
+        self.now += 1
+
+    def busy(self):
+        if self.in_flight:
+            return True
+        for mst in self.masters.values():
+            if any(mst.pending):
+                return True
+        for slave in self.all_slaves():
+            for channel in CHANNELS:
+                if any(slave.queues[channel].values()):
+                    return True
+        return False
+
+    def run_synthetic(self, cycles, rates, read_ratio):
+        for _ in range(cycles):
+            for name, rate in rates.items():
+                if self.rng.random() < rate:
+                    channel = READ if self.rng.random() < read_ratio else WRITE
+                    self.request(name, channel)
+            self.step()
+
+    def run_trace(self, trace):
+        trace = collections.deque(sorted(trace, key=lambda t: t[0]))
+        while trace or self.busy():
+            while trace and trace[0][0] <= self.now:
+                _, master, channel, address = trace.popleft()
+                self.request(master, channel, address)
+            self.step()
+
+    def report(self, clk_mhz):
+        cycles = max(self.now, 1)
+        result = {'cycles': self.now, 'clk_mhz': clk_mhz, 'masters': {}, 'slaves': {}}
+
+        for mst in self.masters.values():
+            done = sum(mst.completed)
+            result['masters'][mst.name] = {
+                'capability': {'rd': mst.limit[READ], 'wr': mst.limit[WRITE]},
+                'offered': dict(zip(CHANNEL_NAMES, mst.offered)),
+                'completed': dict(zip(CHANNEL_NAMES, mst.completed)),
+                'txn_per_cycle': round(done / cycles, 4),
+                'mbps': round(done * mst.data_bytes * clk_mhz / cycles, 2),
+                'issue_stalls': dict(zip(CHANNEL_NAMES, mst.issue_stalls)),
+                'peak_outstanding': dict(zip(CHANNEL_NAMES, mst.peak_outstanding)),
+            }
+
+        for slave in self.all_slaves():
+            done = sum(slave.completed)
+            if not done and not any(slave.arb_stalls) and not any(slave.accept_stalls):
+                continue
+            lat = sorted(slave.latencies)
+            result['slaves'][slave.name] = {
+                'capability': {'rd': slave.limit[READ], 'wr': slave.limit[WRITE]},
+                'completed': dict(zip(CHANNEL_NAMES, slave.completed)),
+                'txn_per_cycle': round(done / cycles, 4),
+                'mbps': round(slave.bytes * clk_mhz / cycles, 2),
+                'arb_stalls': dict(zip(CHANNEL_NAMES, slave.arb_stalls)),
+                'accept_stalls': dict(zip(CHANNEL_NAMES, slave.accept_stalls)),
+                'peak_outstanding': dict(zip(CHANNEL_NAMES, slave.peak_outstanding)),
+                'latency': {
+                    'p50': percentile(lat, 50),
+                    'p90': percentile(lat, 90),
+                    'p99': percentile(lat, 99),
+                    'max': lat[-1] if lat else None,
+                },
+            }
+
+        return result
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a sorted list
+    """
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))
+    return values[int(rank) - 1]
+
+
+def read_trace(trace_file):
+    trace = []
+    with open(trace_file) as fIn:
+        for entry in fIn:
+            entry = entry.split('#')[0].strip()
+            if not entry:
+                continue
+            cycle, master, op, address = [e.strip() for e in entry.split(',')]
+            channel = READ if op.upper() == 'R' else WRITE
+            trace.append((int(cycle), master, channel, int(address, 0)))
+
+    return trace
+
+
+def parse_overrides(entries, value_type):
+    overrides = {}
+    for entry in entries or []:
+        name, value = entry.split('=')
+        overrides[name] = value_type(value)
+
+    return overrides
+
+
+def print_report(result):
+    print(f"Simulated {result['cycles']} cycles at {result['clk_mhz']} MHz")
+    print()
+    print(f"{'MASTER':<12}{'CAP rd/wr':>11}{'OFFERED':>10}{'DONE':>10}{'TXN/CYC':>9}"
+          f"{'MB/s':>10}{'ISSUE STALL rd/wr':>19}{'PEAK OUT rd/wr':>16}")
+    for name, m in result['masters'].items():
+        print(f"{name:<12}"
+              f"{m['capability']['rd']:>6}/{m['capability']['wr']:<4}"
+              f"{sum(m['offered'].values()):>10}"
+              f"{sum(m['completed'].values()):>10}"
+              f"{m['txn_per_cycle']:>9}"
+              f"{m['mbps']:>10}"
+              f"{m['issue_stalls']['rd']:>12}/{m['issue_stalls']['wr']:<6}"
+              f"{m['peak_outstanding']['rd']:>10}/{m['peak_outstanding']['wr']:<5}")
+    print()
+    print(f"{'SLAVE':<12}{'CAP rd/wr':>11}{'DONE':>10}{'TXN/CYC':>9}{'MB/s':>10}"
+          f"{'ARB STALL':>11}{'ACC STALL':>11}{'P50':>6}{'P90':>6}{'P99':>6}{'MAX':>6}")
+    for name, s in result['slaves'].items():
+        lat = s['latency']
+        print(f"{name:<12}"
+              f"{s['capability']['rd']:>6}/{s['capability']['wr']:<4}"
+              f"{sum(s['completed'].values()):>10}"
+              f"{s['txn_per_cycle']:>9}"
+              f"{s['mbps']:>10}"
+              f"{sum(s['arb_stalls'].values()):>11}"
+              f"{sum(s['accept_stalls'].values()):>11}"
+              f"{str(lat['p50']):>6}{str(lat['p90']):>6}{str(lat['p99']):>6}{str(lat['max']):>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fabric_def', required=True, help="Fabric definition")
+    parser.add_argument('--fabric_name', required=True, help="Fabric name")
+    parser.add_argument('--trace', help="Request trace file (cycle, master, R|W, address)")
+    parser.add_argument('--cycles', type=int, default=100000, help="Cycles to simulate for synthetic traffic")
+    parser.add_argument('--rate', type=float, default=0.1, help="Synthetic requests per cycle for every master")
+    parser.add_argument('--master_rate', action='append', help="Per master request rate, <master>=<rate>")
+    parser.add_argument('--read_ratio', type=float, default=0.5, help="Fraction of synthetic requests that are reads")
+    parser.add_argument('--slave_latency', type=int, default=2, help="Slave response latency in cycles")
+    parser.add_argument('--latency', action='append', help="Per slave response latency, <slave>=<cycles>")
+    parser.add_argument('--capability', action='append',
+                        help="Shim capability override, <name>_mst=<cap> or <name>_slv=<cap>")
+    parser.add_argument('--pipeline_latency', type=int,
+                        help="Override the fabric definition's interconnect pipeline cycles per direction")
+    parser.add_argument('--clk_mhz', type=float, default=100.0, help="Fabric clock used to report MB/s")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for synthetic traffic")
+    parser.add_argument('--json', help="Write the report to this JSON file")
+
+    args = parser.parse_args()
+
+    reg_mapping = read_configuration(args.fabric_def, args.fabric_name)
+
+    slave_latency = parse_overrides(args.latency, int)
+    slave_latency['*'] = args.slave_latency
+    sim = FabricSim(reg_mapping, args.pipeline_latency, slave_latency,
+                    parse_overrides(args.capability, int), args.seed)
+
+    if args.trace:
+        sim.run_trace(read_trace(args.trace))
+    else:
+        rates = {name: args.rate for name in sim.masters}
+        rates.update(parse_overrides(args.master_rate, float))
+        sim.run_synthetic(args.cycles, rates, args.read_ratio)
+
+    result = sim.report(args.clk_mhz)
+    print_report(result)
+
+    if args.json:
+        with open(args.json, 'w') as fOut:
+            json.dump(result, fOut, indent=4)
@@ -79,7 +79,11 @@ for FILE in "apf.txt" "soc_apf.txt" "bpf.txt"; do
             fi
             
             for ((j=2; j<${NUM_COLS}; j++)) ; do
-                if [ "${DATA[i+j]}" != "n/a" ] && [ "${COLUMNS[j],,}" != "slaves" ]; then
+                # Slave lists and the optional fabric_gen.py performance columns are not address info
+                case "${COLUMNS[j],,}" in
+                    slaves|capability|data_width|pipeline|fifo_type) continue ;;
+                esac
+                if [ "${DATA[i+j]}" != "n/a" ]; then
                     #Remove 0x prefix before inserting data
                     CLEAN_DATA=${DATA[i+j]}
                     if [[ ${DATA[i+j]} == 0x* ]] ; then
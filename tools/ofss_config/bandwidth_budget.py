@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+import logging.handlers
+import re
+
+import memory_ip
+
+
+# Per-lane signaling rate in GT/s, 128b/130b encoded from Gen3 on
+PCIE_GT_PER_LANE = {"3": 8.0, "4": 16.0, "5": 32.0}
+PCIE_ENCODING = 128 / 130
+# Share of the link carrying payload with 512 byte TLPs and about 24 bytes of
+# header, sequence number, LCRC and framing each. DLLP traffic is not modeled.
+PCIE_TLP_EFFICIENCY = 512 / (512 + 24)
+HSSI_PORT_GBPS = {
+    "10GbE": 10,
+    "25GbE": 25,
+    "100GAUI-2": 100,
+    "100GCAUI-4": 100,
+    "200GAUI-4": 200,
+    "400GAUI-8": 400,
+}
+# A shortfall this small is within what the model leaves out (DLLPs, flow control)
+MARGINAL = 0.02
+
+STATUS_OK = "ok"
+STATUS_MARGINAL = "marginal"
+STATUS_BOTTLENECK = "bottleneck"
+
+
+class Interface:
+    """
+    Theoretical bandwidth of one IP interface, in Gbps per direction
+    """
+    def __init__(self, ip, name, gbps, basis):
+        self.ip = ip
+        self.name = name
+        self.gbps = gbps
+        self.basis = basis
+
+
+class Check:
+    """
+    Whether one interface ('supply') can carry the traffic of others ('demand')
+    """
+    def __init__(self, name, supply, demand):
+        self.name = name
+        self.supply = supply
+        self.demand = demand
+        self.headroom = (supply - demand) / demand
+        if self.headroom >= 0:
+            self.status = STATUS_OK
+        elif self.headroom >= -MARGINAL:
+            self.status = STATUS_MARGINAL
+        else:
+            self.status = STATUS_BOTTLENECK
+
+
+def parse_mhz(freq):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*MHz\s*", str(freq))
+    return float(match.group(1)) if match else None
+
+
+def parse_topology(topology):
+    """
+    (gen, lanes per link) from a top_topology_hwtcl value such as 'Gen4 1x16', or None
+    """
+    match = re.fullmatch(r"Gen(\d) (\d+)x(\d+)", str(topology))
+    if match is None or match.group(1) not in PCIE_GT_PER_LANE:
+        return None
+    return match.group(1), int(match.group(3))
+
+
+def get_pcie_link_gbps(gen, lanes, links):
+    return PCIE_GT_PER_LANE[gen] * lanes * PCIE_ENCODING * PCIE_TLP_EFFICIENCY * links
+
+
+def get_hssi_gbps(data_rate, num_channels):
+    return HSSI_PORT_GBPS.get(data_rate, 0) * int(num_channels)
+
+
+def get_pcie_interfaces(pcie):
+    """
+    The PCIe link's payload bandwidth and the AXI-ST datapath's capacity, from the
+    computed top_topology_hwtcl and AXI-ST clock. Nothing is known for a preset.
+    """
+    topology = parse_topology(pcie.ip_component_params.get("top_topology_hwtcl", ""))
+    if pcie.ip_preset or topology is None:
+        return [Interface(pcie, f"PCIe {pcie.ip_output_name} link", None, f"preset {pcie.ip_preset}, not modeled")]
+
+    gen, lanes = topology
+    links = int(pcie.pcie_instances_enabled)
+    link_gbps = get_pcie_link_gbps(gen, lanes, links)
+    interfaces = [
+        Interface(
+            pcie,
+            f"PCIe {pcie.ip_output_name} link",
+            link_gbps,
+            f"Gen{gen} x{lanes}, {links} link(s), 128b/130b, 512B payloads",
+        )
+    ]
+
+    # The AXI-ST data width is a property of the subsystem, declared with its parameters
+    data_width = getattr(pcie.PCIE_SS_PARAM, "axi_st_data_width", None)
+    clk_mhz = parse_mhz(pcie.ip_component_params.get("axi_st_clk_freq_user_hwtcl", ""))
+    if data_width and clk_mhz:
+        interfaces.append(
+            Interface(
+                pcie,
+                f"PCIe {pcie.ip_output_name} AXI-ST",
+                clk_mhz * data_width * links / 1000,
+                f"{clk_mhz:g} MHz x {data_width} bits x {links} link(s)",
+            )
+        )
+
+    return interfaces
+
+
+def get_interfaces(ips):
+    interfaces = []
+    for ip in ips:
+        if ip.ip_type == "IOPLL":
+            interfaces.append(Interface(ip, "IOPLL p_clk", None, f"{ip.p_clk} MHz"))
+        elif ip.ip_type == "PCIe":
+            interfaces.extend(get_pcie_interfaces(ip))
+        elif ip.ip_type == "HSSI":
+            if ip.data_rate in HSSI_PORT_GBPS:
+                interfaces.append(
+                    Interface(
+                        ip,
+                        f"HSSI {ip.ip_output_name}",
+                        get_hssi_gbps(ip.data_rate, ip.num_channels),
+                        f"{ip.num_channels} x {ip.data_rate}",
+                    )
+                )
+        elif ip.ip_type == "Memory":
+            if ip.ip_preset:
+                interfaces.append(
+                    Interface(ip, f"Memory {ip.ip_output_name}", None, f"preset {ip.ip_preset}, not modeled")
+                )
+            else:
+                settings = ip.memory_settings
+                interfaces.append(
+                    Interface(
+                        ip,
+                        f"Memory {ip.ip_output_name}",
+                        memory_ip.get_channel_gbps(settings) * int(settings["num_channels"]),
+                        f"{settings['num_channels']} x DDR4-{settings['memory_rate']} x{settings['data_width']}, reads and writes",
+                    )
+                )
+
+    return interfaces
+
+
+def get_checks(interfaces):
+    checks = []
+    links = {}
+    for interface in interfaces:
+        if interface.gbps is None or interface.ip.ip_type != "PCIe":
+            continue
+        if interface.name.endswith(" link"):
+            links[id(interface.ip)] = interface
+        elif id(interface.ip) in links:
+            link = links[id(interface.ip)]
+            checks.append(Check(f"{interface.name} carries the link", interface.gbps, link.gbps))
+
+    hssi_gbps = sum(i.gbps for i in interfaces if i.ip.ip_type == "HSSI" and i.gbps is not None)
+    pcie_gbps = sum(link.gbps for link in links.values())
+    if hssi_gbps and pcie_gbps:
+        checks.append(Check("PCIe links carry all HSSI ports", pcie_gbps, hssi_gbps))
+
+    return checks
+
+
+def get_required_p_clk(ips):
+    """
+    Lowest p_clk, in MHz, at which the PCIe AXI-ST datapaths carry both the PCIe links
+    and the HSSI ports at line rate. Read from the OFSS settings, so it can run before
+    any IP is processed. Returns (MHz, what needs it), or None without a datapath to size.
+    """
+    datapath_bits = 0
+    pcie_gbps = 0
+    for ip in ips:
+        if ip.ip_type != "PCIe":
+            continue
+        topology = parse_topology(ip.get_top_topology())
+        data_width = getattr(ip.PCIE_SS_PARAM, "axi_st_data_width", None)
+        if topology is None or not data_width:
+            continue
+        links = int(ip.pcie_config["settings"].get("pcie_instances_enabled", 1))
+        datapath_bits += data_width * links
+        pcie_gbps += get_pcie_link_gbps(*topology, links)
+
+    hssi_gbps = sum(
+        get_hssi_gbps(ip.hssi_config["settings"]["data_rate"], ip.hssi_config["settings"]["num_channels"])
+        for ip in ips
+        if ip.ip_type == "HSSI" and "preset" not in ip.hssi_config["settings"]
+    )
+    if not datapath_bits:
+        return None
+
+    if hssi_gbps > pcie_gbps:
+        return hssi_gbps * 1000 / datapath_bits, f"{hssi_gbps:.1f} Gbps of HSSI ports"
+    return pcie_gbps * 1000 / datapath_bits, f"{pcie_gbps:.1f} Gbps of PCIe links"
+
+
+def analyze(ips):
+    """
+    Bandwidth of each interface of the configured IPs, and the checks between them
+    """
+    interfaces = get_interfaces(ips)
+    return interfaces, get_checks(interfaces)
+
+
+def summarize_budget(interfaces, checks):
+    logging.info("=========================")
+    logging.info("Bandwidth Budget (Gbps per direction)")
+    logging.info("=========================")
+    for interface in interfaces:
+        gbps = "-" if interface.gbps is None else f"{interface.gbps:.1f}"
+        logging.info(f"{interface.name:<32}{gbps:>8}  {interface.basis}")
+    logging.info("")
+    for check in checks:
+        logging.info(
+            f"{check.name:<40}{check.supply:>8.1f} / {check.demand:<8.1f}"
+            f"{check.headroom:>+8.1%}  {check.status}"
+        )
+    logging.info("")
+
+
+def write_budget(report_file, interfaces, checks):
+    report = {
+        "interfaces": [
+            {
+                "ip_type": interface.ip.ip_type,
+                "ip_file": interface.ip.ip_file,
+                "interface": interface.name,
+                "gbps": interface.gbps,
+                "basis": interface.basis,
+            }
+            for interface in interfaces
+        ],
+        "checks": [
+            {
+                "check": check.name,
+                "supply_gbps": check.supply,
+                "demand_gbps": check.demand,
+                "headroom": check.headroom,
+                "status": check.status,
+            }
+            for check in checks
+        ],
+    }
+    with open(report_file, "w") as fOut:
+        json.dump(report, fOut, indent=4)
+        fOut.write("\n")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import logging
+import logging.handlers
+import os
+import re
+
+import deploy_runner
+import deploy_scheduler
+import ip_store
+
+
+BATCH_SCRIPT = "ofss_batch_deploy.tcl"
+BATCH_LOG = "ofss_batch_deploy.log"
+BATCH_RESULT_RE = re.compile(r"^OFSS_BATCH_RESULT (\d+) (OK|FAIL)\s*(.*)$")
+
+
+def get_batch_search_string(ips):
+    """
+    Union of the IPs' Quartus search paths, in first-seen order
+    """
+    search_paths = []
+    for ip in ips:
+        for path in ip.get_quartus_search_string().split(","):
+            if path not in search_paths:
+                search_paths.append(path)
+
+    # '$' (the default search path) goes last, as it does for ip-deploy
+    if "$" in search_paths:
+        search_paths.remove("$")
+        search_paths.append("$")
+
+    return ",".join(search_paths)
+
+
+def write_batch_script(ips, script_file):
+    """
+    One qsys-script session creating every IP file, each IP guarded separately
+    """
+    lines = []
+    lines.append("# Generated by OFSS Config Tool (gen_ofs_settings.py --backend batch)")
+    lines.append("package require qsys")
+    lines.append("")
+    for tag, ip in enumerate(ips):
+        lines.extend(ip.get_batch_tcl(tag))
+        lines.append("")
+
+    with open(script_file, "w") as fOut:
+        fOut.write("\n".join(lines))
+
+
+def parse_batch_results(output):
+    """
+    Map each IP tag reported by the batch session to (success, message)
+    """
+    batch_results = {}
+    for line in output.splitlines():
+        match = BATCH_RESULT_RE.match(line.strip())
+        if match:
+            tag, status, msg = match.groups()
+            batch_results[int(tag)] = (status == "OK", msg)
+
+    return batch_results
+
+
+def run_batch_session(ips, log_dir=".", timeout=None):
+    """
+    Generate all IP files in a single qsys-script session.
+    Returns the session's RunRecord and the per-IP (success, message) results,
+    keyed by index in 'ips'.
+    """
+    script_file = os.path.join(log_dir, BATCH_SCRIPT)
+    log_file = os.path.join(log_dir, BATCH_LOG)
+    write_batch_script(ips, script_file)
+
+    batch_cmd = [
+        "qsys-script",
+        f"--search-path={os.path.expandvars(get_batch_search_string(ips))}",
+        f"--script={script_file}",
+    ]
+    logging.info("Batch Deploy Command:")
+    logging.info(" ".join(batch_cmd))
+
+    record = deploy_runner.run_logged(batch_cmd, log_file, timeout)
+    if record.timed_out:
+        logging.info(f"Batch deploy timed out after {timeout}s")
+
+    with open(log_file) as fIn:
+        return record, parse_batch_results(fIn.read())
+
+
+def run_batch(ips, jobs=1, log_dir=".", force=False, timeout=None):
+    """
+    Deploy IPs through one Platform Designer scripting session.
+    IPs that fail in the session, or produce no IP file, fall back to
+    their own ip-deploy run. Results are returned in IP order.
+    """
+    results = [
+        deploy_scheduler.DeployResult(ip, os.path.join(log_dir, BATCH_LOG)) for ip in ips
+    ]
+
+    to_batch = []
+    deploy_hashes = {}
+    for idx, ip in enumerate(ips):
+        deploy_hashes[idx] = ip.get_deploy_hash()
+        if ip.check_deploy_cache(deploy_hashes[idx], force):
+            results[idx].status = deploy_scheduler.DEPLOY_CACHED
+            results[idx].log_file = ""
+        else:
+            ip.prepare_deploy()
+            if ip_store.get_store_dir() and ip_store.fetch(ip, ip.get_store_key()):
+                ip.write_deploy_sidecar(deploy_hashes[idx])
+                results[idx].status = deploy_scheduler.DEPLOY_OK
+                results[idx].log_file = ""
+                continue
+            to_batch.append(idx)
+
+    if not to_batch:
+        return results
+
+    record, batch_results = run_batch_session(
+        [ips[idx] for idx in to_batch], log_dir, timeout
+    )
+
+    fallback = []
+    for tag, idx in enumerate(to_batch):
+        ip = ips[idx]
+        success, msg = batch_results.get(tag, (False, "no result reported by the batch session"))
+        if success and os.path.isfile(ip.ip_file):
+            ip.deploy_record = record
+            ip.deploy_script = (os.path.join(log_dir, BATCH_SCRIPT), ip.get_batch_tcl(tag))
+            ip.write_deploy_sidecar(deploy_hashes[idx])
+            if ip_store.get_store_dir():
+                ip_store.populate(ip, ip.get_store_key())
+            results[idx].status = deploy_scheduler.DEPLOY_OK
+            results[idx].record = record
+        else:
+            logging.info(f"Batch deploy of {ip.ip_file} failed: {msg or 'no IP file'}")
+            logging.info("Falling back to ip-deploy")
+            fallback.append(idx)
+
+    if fallback:
+        # Deployed, cached and stored as ip-deploy output from here on
+        for idx in fallback:
+            ips[idx].deploy_backend = "ip-deploy"
+        fallback_results = deploy_scheduler.run_deploys(
+            [ips[idx] for idx in fallback], jobs, log_dir, force=True, timeout=timeout
+        )
+        for idx, result in zip(fallback, fallback_results):
+            results[idx] = result
+
+    return results
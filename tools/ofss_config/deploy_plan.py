@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import time
+
+
+PLAN_VERSION = 2
+PLAN_DEPLOY = "deploy"
+PLAN_UNCHANGED = "unchanged"
+# Options that change what a plan deploys; 'apply' takes them from the plan
+PLAN_OPTIONS = ["backend", "param_transport", "sparse", "verify", "force"]
+
+
+def get_ip_plan(ip, force=False):
+    """
+    What deploying one configured IP will run, delete and create.
+    Only reads the tree: an IP whose file is up to date is planned as unchanged.
+    """
+    deploy_hash = ip.get_deploy_hash()
+    current = not force and ip.is_deploy_current(deploy_hash)
+    log_file = ip.get_deploy_log()
+
+    entry = {
+        "ip_type": ip.ip_type,
+        "target": ip.target_rootdir,
+        "ip_file": ip.ip_file,
+        "component": ip.ip_component,
+        "preset": ip.ip_preset,
+        "action": PLAN_UNCHANGED if current else PLAN_DEPLOY,
+        "deploy_hash": deploy_hash,
+        "deploy_args": ip.set_deploy_cmd_args(),
+        "component_params": ip.ip_component_params,
+        # The component parameters are sent sparse once --apply has the IP's defaults
+        "sparse_pending": ip.sparse_pending,
+        "log_file": log_file,
+        "delete": [],
+        "create": [],
+    }
+    if ip.param_transport == "script":
+        script_file = ip.get_deploy_script_file()
+        entry["deploy_args"] = ip.get_script_deploy_args(script_file)
+        entry["deploy_script"] = script_file
+        entry["deploy_script_lines"] = ip.get_deploy_script_lines()
+
+    if not current:
+        sidecar = ip.get_deploy_sidecar()
+        entry["delete"] = [
+            path for path in [sidecar] + ip.artifacts_to_clean if os.path.exists(path)
+        ]
+        entry["create"] = [ip.ip_file, sidecar, log_file]
+        if "deploy_script" in entry:
+            entry["create"].append(entry["deploy_script"])
+
+    return entry
+
+
+def get_derived_values(ips):
+    """
+    Component parameters an IP takes from another IP's configuration, e.g. PCIe's AXI-ST clock from p_clk
+    """
+    derived = []
+    for ip in ips:
+        for param, source in ip.derived_params.items():
+            derived.append({
+                "ip_type": ip.ip_type,
+                "ip_file": ip.ip_file,
+                "param": param,
+                "value": ip.ip_component_params.get(param),
+                "source": source,
+            })
+
+    return derived
+
+
+def build_plan(ips, targets, options):
+    return {
+        "version": PLAN_VERSION,
+        "created": time.time(),
+        # OFSS includes and deploy logs are relative to the directory the plan was made in
+        "cwd": os.getcwd(),
+        "targets": [
+            {"name": name, "ofss": ofss, "target": target} for name, ofss, target in targets
+        ],
+        "options": options,
+        "ips": [get_ip_plan(ip, options.get("force", False)) for ip in ips],
+        "derived": get_derived_values(ips),
+    }
+
+
+def write_plan(plan_file, plan):
+    with open(plan_file, "w") as fOut:
+        json.dump(plan, fOut, indent=4)
+        fOut.write("\n")
+
+
+def read_plan(plan_file):
+    try:
+        with open(plan_file) as fIn:
+            plan = json.load(fIn)
+    except (OSError, ValueError) as e:
+        logging.info(f"!!Error!! Cannot read plan {plan_file}: {e}")
+        sys.exit(1)
+
+    if plan.get("version") != PLAN_VERSION:
+        logging.info(f"!!Error!! {plan_file} is a version {plan.get('version')} plan, expected {PLAN_VERSION}")
+        sys.exit(1)
+
+    return plan
+
+
+def check_plan(plan, ips):
+    """
+    Differences between a saved plan and what the IPs would deploy now.
+    Any difference means the OFSS files, the IP files or the tools changed since planning.
+    """
+    force = plan["options"].get("force", False)
+    planned = {entry["ip_file"]: entry for entry in plan["ips"]}
+    current = {ip.ip_file: get_ip_plan(ip, force) for ip in ips}
+
+    stale = []
+    for ip_file in sorted(planned.keys() - current.keys()):
+        stale.append(f"{ip_file} is no longer configured")
+    for ip_file in sorted(current.keys() - planned.keys()):
+        stale.append(f"{ip_file} was not planned")
+    for ip_file in sorted(planned.keys() & current.keys()):
+        for key in ["deploy_hash", "action"]:
+            if planned[ip_file][key] != current[ip_file][key]:
+                stale.append(f"{ip_file}: {key} changed since the plan was made")
+
+    return stale
+
+
+def summarize_plan(plan):
+    logging.info("=========================")
+    logging.info("Deploy Plan")
+    logging.info("=========================")
+    for entry in plan["ips"]:
+        logging.info(f"{entry['ip_type']:<10}{entry['action']:<10}{entry['ip_file']}")
+        for path in entry["delete"]:
+            logging.info(f"\tdelete {path}")
+    for derived in plan["derived"]:
+        logging.info(
+            f"{derived['ip_type']} {derived['param']} = {derived['value']} (from {derived['source']})"
+        )
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+
+class RunRecord:
+    """
+    Timing and exit status of one deploy command
+    """
+    def __init__(self, argv, log_file):
+        self.argv = list(argv)
+        self.log_file = log_file
+        self.start = None
+        self.end = None
+        self.exit_status = None
+        self.timed_out = False
+
+    @property
+    def elapsed(self):
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    def to_dict(self):
+        return {
+            "cmd": self.argv,
+            "log": self.log_file,
+            "start": self.start,
+            "end": self.end,
+            "elapsed": round(self.elapsed, 3),
+            "exit_status": self.exit_status,
+            "timed_out": self.timed_out,
+        }
+
+
+def run_logged(argv, log_file, timeout=None, echo=False):
+    """
+    Run a command from its argument vector, streaming its output to 'log_file'
+    (and to stdout when 'echo' is set). The command is killed after 'timeout'
+    seconds. Returns the command's RunRecord.
+    """
+    record = RunRecord(argv, log_file)
+
+    with open(log_file, "w") as fOut:
+        fOut.write(f"{shlex.join(record.argv)}\n\n")
+        fOut.flush()
+
+        record.start = time.time()
+        try:
+            proc = subprocess.Popen(  # nosec
+                record.argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                start_new_session=True,
+            )
+        except OSError as e:
+            fOut.write(f"{e}\n")
+            record.end = time.time()
+            record.exit_status = 127
+            return record
+
+        def _kill(timed_out=True):
+            # ip-deploy is a wrapper script; kill the whole process group
+            record.timed_out = timed_out
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                proc.kill()
+
+        timer = threading.Timer(timeout, _kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in proc.stdout:
+                fOut.write(line)
+                if echo:
+                    sys.stdout.write(line)
+            proc.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            # Don't leave the deploy running if we were interrupted
+            if proc.poll() is None:
+                _kill(timed_out=False)
+
+        record.end = time.time()
+        record.exit_status = proc.returncode
+        if record.timed_out:
+            fOut.write(f"\nKilled after the {timeout}s timeout\n")
+
+    return record
+
+
+def write_run_report(report_file, results, **run_info):
+    """
+    Dump the per-IP deploy status and timing of this run as JSON
+    """
+    report = dict(run_info)
+    report["ips"] = []
+    for result in results:
+        entry = {
+            "ip_type": result.ip.ip_type,
+            "ip_file": result.ip.ip_file,
+            "status": result.status,
+            "error": result.error,
+        }
+        if result.record is not None:
+            entry.update(result.record.to_dict())
+        report["ips"].append(entry)
+
+    with open(report_file, "w") as fOut:
+        json.dump(report, fOut, indent=4)
+        fOut.write("\n")
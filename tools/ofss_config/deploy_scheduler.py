@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import concurrent.futures
+import logging
+import logging.handlers
+
+
+DEPLOY_OK = "OK"
+DEPLOY_CACHED = "CACHED"
+DEPLOY_FAILED = "FAILED"
+DEPLOY_SKIPPED = "SKIPPED"
+
+
+class DeployResult:
+    """
+    Outcome of a single IP's deploy, reported in the original IP order
+    """
+    def __init__(self, ip, log_file):
+        self.ip = ip
+        self.log_file = log_file
+        self.status = None
+        self.error = ""
+        # deploy_runner.RunRecord of the command that produced the IP file
+        self.record = None
+
+    @property
+    def elapsed(self):
+        return self.record.elapsed if self.record is not None else 0.0
+
+
+def result_from_ip(ip, log_file, status):
+    result = DeployResult(ip, log_file)
+    result.status = status
+    result.record = ip.deploy_record
+    return result
+
+
+def build_deploy_graph(ips):
+    """
+    Map each IP (by index) to the indices of the IPs its deploy depends on.
+    Dependencies are declared by IP type in each IP's 'deploy_depends_on',
+    and only hold between IPs of the same target root directory;
+    types that are not part of this run are ignored.
+    """
+    graph = {}
+    for idx, ip in enumerate(ips):
+        graph[idx] = [
+            dep_idx
+            for dep_idx, dep in enumerate(ips)
+            if dep_idx != idx
+            and dep.ip_type in ip.deploy_depends_on
+            and dep.target_rootdir == ip.target_rootdir
+        ]
+
+    return graph
+
+
+def run_deploys(ips, jobs, log_dir=None, force=False, timeout=None):
+    """
+    Deploy IPs with up to 'jobs' concurrent ip-deploy runs.
+    Logs go to 'log_dir', or to each IP's own log directory.
+    An IP is started once all the IPs it depends on deployed successfully,
+    and skipped if any of them failed. Results are returned in IP order.
+    """
+    graph = build_deploy_graph(ips)
+    results = [DeployResult(ip, ip.get_deploy_log(log_dir)) for ip in ips]
+    pending = set(graph)
+    running = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            progress = False
+            for idx in sorted(pending):
+                dep_status = [results[dep].status for dep in graph[idx]]
+                if any(s in (DEPLOY_FAILED, DEPLOY_SKIPPED) for s in dep_status):
+                    results[idx].status = DEPLOY_SKIPPED
+                    results[idx].error = "dependency failed"
+                elif all(s in (DEPLOY_OK, DEPLOY_CACHED) for s in dep_status):
+                    logging.info(f"Starting IP-Deploy for {ips[idx].ip_component}")
+                    future = pool.submit(
+                        ips[idx].deploy, results[idx].log_file, force, timeout
+                    )
+                    running[future] = idx
+                else:
+                    continue
+                pending.remove(idx)
+                progress = True
+
+            if not running:
+                if not progress:
+                    for idx in pending:
+                        results[idx].status = DEPLOY_SKIPPED
+                        results[idx].error = "dependency cycle"
+                    pending.clear()
+                continue
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                idx = running.pop(future)
+                results[idx].record = ips[idx].deploy_record
+                try:
+                    future.result()
+                    results[idx].status = DEPLOY_CACHED if ips[idx].deploy_cached else DEPLOY_OK
+                except SystemExit:
+                    # _errorExit() already reported it; the details are in the log
+                    results[idx].status = DEPLOY_FAILED
+                except Exception as e:
+                    results[idx].status = DEPLOY_FAILED
+                    results[idx].error = str(e) or type(e).__name__
+
+    return results
+
+
+def deploys_failed(results):
+    return any(r.status in (DEPLOY_FAILED, DEPLOY_SKIPPED) for r in results)
+
+
+def summarize_deploys(results):
+    """
+    Deploy Summary, in IP order
+    """
+    logging.info("")
+    logging.info("=========================")
+    logging.info("IP-Deploy Summary")
+    logging.info("=========================")
+    for result in results:
+        logging.info(
+            f"{result.ip.ip_type:<10} {result.status:<8} {result.elapsed:7.1f}s  {result.log_file}"
+        )
+        if result.error:
+            logging.info(f"\t{result.error}")
+    logging.info("")
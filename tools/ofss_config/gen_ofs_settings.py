@@ -6,10 +6,20 @@
 import argparse
 import logging
 import logging.handlers
+import os
 import sys
+import time
 
+import bandwidth_budget
+import batch_deploy
+import deploy_plan
+import deploy_runner
+import deploy_scheduler
 from hssi_ip import HSSI as HSSI
+import ip_defaults
+import ip_verify
 from iopll_ip import IOPLL as IOPLL
+import iopll_ip
 from memory_ip import Memory as Memory, SimMemory as SimMemory
 import ofs_parser
 from pcie_ip import PCIe as PCIe
@@ -38,15 +48,27 @@ def configure_logging():
 
 def process_input_arguments():
     parser = argparse.ArgumentParser()
-    parser.add_argument(
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
         "--ofss",
         "--ini",
         dest="ofss",
         nargs="+",
         type=str,
-        required=True,
         help="Input OFSS config file",
     )
+    inputs.add_argument(
+        "--manifest",
+        help="""Configure several target trees in one run. Each section of the manifest names
+                                its 'ofss' files and its 'target' root directory. Deploy logs go to
+                                a directory named after the section.""",
+    )
+    inputs.add_argument(
+        "--apply",
+        metavar="PLAN",
+        help="""Deploy a plan saved by --plan. Fails without deploying anything if the OFSS
+                                files, IP files or tools changed since the plan was made.""",
+    )
     parser.add_argument(
         "--target",
         help="""Destination root directory (a work directory or OFS_ROOTDIR).
@@ -56,8 +78,82 @@ def process_input_arguments():
         "--platform", default="n6001", help="Platform tool is running for"
     )
     parser.add_argument("--debug", action="store_true", help="Dumps IP Deploy Commands into 'ip_deploy_cmds.log' file")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run ip-deploy even for IP files that are up to date with the OFSS configuration",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["ip-deploy", "batch"],
+        default="ip-deploy",
+        help="""'ip-deploy' runs one ip-deploy per IP. 'batch' creates all IP files in a
+                                single qsys-script session, falling back to ip-deploy for IPs that fail.""",
+    )
+    parser.add_argument(
+        "--sparse",
+        action="store_true",
+        help="""Only send component parameters that differ from the IP's defaults. Defaults are
+                                read from a parameter-less ip-deploy of each IP and cached.""",
+    )
+    parser.add_argument(
+        "--param-transport",
+        choices=["args", "script"],
+        default="args",
+        help="""How component parameters reach the deploy step: 'args' passes them on the
+                                ip-deploy command line, 'script' writes them to '<output_name>.deploy.tcl'
+                                and creates the IP file by running that script with qsys-script.""",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Kill a deploy command (or the batch session) after this many seconds",
+    )
+    parser.add_argument(
+        "--report",
+        default="ip_deploy_report.json",
+        help="JSON run report with the status, timing and log of each IP's deploy",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="""Compare each existing IP file with the OFSS configuration before deploying, and
+                                only deploy the IPs that are missing or whose parameters drifted.""",
+    )
+    parser.add_argument(
+        "--verify-only",
+        action="store_true",
+        help="Report the --verify comparison and exit with an error if any IP differs, without deploying",
+    )
+    parser.add_argument(
+        "--bandwidth-report",
+        metavar="FILE",
+        help="""Before deploying, log the theoretical bandwidth of the PCIe, HSSI and AXI-ST
+                                interfaces and any bottlenecks between them, and write it to this JSON file.""",
+    )
+    parser.add_argument(
+        "--plan",
+        metavar="PLAN",
+        help="""Configure and validate every IP, then write the deploy plan to this JSON file
+                                and stop. Nothing in the target tree is cleaned or deployed.""",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="""Number of IP deploys to run concurrently. With more than one job,
+                                deploy output is only written to '<output_name>.deploy.log'.""",
+    )
+
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.verify_only:
+        args.verify = True
+    if args.plan and args.apply:
+        parser.error("--plan and --apply cannot be used together")
 
-    return parser.parse_args()
+    return args
 
 
 def instantiate_ips(ofs_ip_configurations, target_dir):
@@ -87,9 +183,104 @@ def instantiate_ips(ofs_ip_configurations, target_dir):
             elif ip == "hssi":
                 to_config.append(HSSI(ofs_config, ip_instance, target_dir))
 
+    if ofs_config["settings"].get("p_clk") == "auto":
+        set_auto_p_clk(ofs_config, to_config)
+
     return to_config
 
 
+def set_auto_p_clk(ofs_config, ips):
+    """
+    Resolve 'p_clk = auto' to the lowest IOPLL output at which the PCIe AXI-ST
+    datapath carries the PCIe links and HSSI ports at line rate
+    """
+    required = bandwidth_budget.get_required_p_clk(ips)
+    if required is None:
+        logging.info("!!IOPLL Config Error!! p_clk = auto needs a PCIe configuration with a known AXI-ST data width")
+        sys.exit(1)
+
+    required_mhz, driver = required
+    # The IOPLL check's lower bound still applies
+    required_mhz = max(required_mhz, 250)
+    output = iopll_ip.get_achievable_output(required_mhz)
+    if output is None:
+        logging.info(f"!!IOPLL Config Error!! No IOPLL output reaches the {required_mhz:.2f} MHz p_clk needed for {driver}")
+        sys.exit(1)
+
+    p_clk, vco, c = output
+    ofs_config["settings"]["p_clk"] = iopll_ip.format_mhz(p_clk)
+    logging.info(
+        f"p_clk = auto: {required_mhz:.2f} MHz needed for {driver}, "
+        f"using {ofs_config['settings']['p_clk']} MHz (VCO {iopll_ip.format_mhz(vco)} MHz / {c})"
+    )
+    # The IPs read p_clk from the project settings when they were created
+    for ip in ips:
+        ip.get_project_settings()
+
+
+def load_targets(args):
+    """
+    (name, OFSS files, target root) of each configuration in this run
+    """
+    if args.apply:
+        return [(t["name"], t["ofss"], t["target"]) for t in args.apply_plan["targets"]]
+    if args.manifest:
+        return ofs_parser.process_manifest(args.manifest)
+
+    return [("", args.ofss, args.target)]
+
+
+def run_batch_by_target(ips, args):
+    """
+    One batch session per target root, with its script and log in that target's log directory
+    """
+    results = []
+    for target in dict.fromkeys(ip.target_rootdir for ip in ips):
+        target_ips = [ip for ip in ips if ip.target_rootdir == target]
+        results.extend(
+            batch_deploy.run_batch(
+                target_ips, args.jobs, target_ips[0].log_dir, force=args.force, timeout=args.timeout
+            )
+        )
+
+    return results
+
+
+def merge_verified_results(verify_results, deploy_results):
+    """
+    Deploy results in IP order, with the IPs --verify found identical reported as unchanged
+    """
+    deployed = {id(result.ip): result for result in deploy_results}
+    merged = []
+    for verify_result in verify_results:
+        ip = verify_result.ip
+        if id(ip) in deployed:
+            merged.append(deployed[id(ip)])
+        elif verify_result.status == ip_verify.VERIFY_IDENTICAL:
+            ip.deploy_cached = True
+            merged.append(
+                deploy_scheduler.result_from_ip(ip, ip.get_deploy_log(), deploy_scheduler.DEPLOY_CACHED)
+            )
+
+    return merged
+
+
+def configure_ip(ip, args, process=True):
+    """
+    Process and summarize one IP's configuration, ahead of its deploy
+    """
+    if process:
+        ip.process_configuration()
+    if args.sparse:
+        # Planning never deploys, IPs whose defaults aren't cached yet are made sparse by --apply
+        if args.plan and ip_defaults.is_sparse_pending(ip):
+            ip.sparse_pending = True
+            logging.info(f"{ip.ip_type}: {ip.ip_component} defaults are not cached, --apply will make the parameters sparse")
+        elif not ip.sparse_pending:
+            ip_defaults.apply_sparse_params(ip, args.timeout)
+    ip.summarize_configuration()
+
+
 def main():
     # Setup Procedures
     configure_logging()
@@ -99,30 +290,168 @@ def main():
         with open("ip_deploy_cmds.log", "w") as fOut:
             pass
 
-    ofs_ip_configurations = ofs_parser.process_ofss_configs(args.ofss)
-    ips_to_config = instantiate_ips(ofs_ip_configurations, args.target)
+    if args.apply:
+        args.apply_plan = deploy_plan.read_plan(args.apply)
+        args.report = os.path.abspath(args.report)
+        if args.bandwidth_report:
+            args.bandwidth_report = os.path.abspath(args.bandwidth_report)
+        os.chdir(args.apply_plan["cwd"])
+        for option in deploy_plan.PLAN_OPTIONS:
+            setattr(args, option, args.apply_plan["options"][option])
+
+    targets = load_targets(args)
+    resolved_targets = []
+    ips_to_config = []
+    for name, ofss, target in targets:
+        ofs_ip_configurations = ofs_parser.process_ofss_configs(ofss)
+        target_ips = instantiate_ips(ofs_ip_configurations, target)
+        for ip in target_ips:
+            ip.param_transport = args.param_transport
+            ip.deploy_backend = args.backend
+            if name:
+                ip.log_dir = name
+        if name:
+            if not args.plan:
+                os.makedirs(name, exist_ok=True)
+            logging.info(f"[{name}] {target}")
+        ips_to_config.extend(target_ips)
+
+        # Absolute paths, so a plan can be applied from anywhere
+        ofss_files = [os.path.abspath(f) for ofss_string in ofss for f in ofss_string.split(",") if f]
+        target_root = target_ips[0].target_rootdir if target_ips else target
+        resolved_targets.append((name, ofss_files, target_root))
 
-    for ip, ip_configurations in ofs_ip_configurations.items():
-        logging.info(f"{ip}")
-        for ip_config in ip_configurations:
-            ofs_parser.print_ip_config(ip_config)
+        for ip, ip_configurations in ofs_ip_configurations.items():
+            logging.info(f"{ip}")
+            for ip_config in ip_configurations:
+                ofs_parser.print_ip_config(ip_config)
 
     logging.info("=============================================")
     logging.info("Beginning OFS IP Configuration Tool")
     logging.info("=============================================")
 
+    # Everything is configured before the first deploy when the result has to be checked first
+    preconfigure = args.verify or args.plan or args.apply or args.bandwidth_report
+    if preconfigure:
+        for ip in ips_to_config:
+            ip.process_configuration()
+
+    if args.bandwidth_report:
+        interfaces, checks = bandwidth_budget.analyze(ips_to_config)
+        bandwidth_budget.summarize_budget(interfaces, checks)
+        bandwidth_budget.write_budget(args.bandwidth_report, interfaces, checks)
+        logging.info(f"Bandwidth budget written to {args.bandwidth_report}")
+
+    ips_to_deploy = ips_to_config
+    verify_results = []
+    if args.verify:
+        verify_results = ip_verify.verify_ips(ips_to_config)
+        ip_verify.summarize_verify(verify_results)
+        if args.verify_only:
+            if ip_verify.verify_failed(verify_results):
+                logging.info("!!FAIL!! IP files differ from the OFSS configuration. See the IP Verify Summary above")
+                sys.exit(1)
+            return
+        ips_to_deploy = [
+            result.ip for result in verify_results if result.status != ip_verify.VERIFY_IDENTICAL
+        ]
+
+    if preconfigure:
+        if args.apply:
+            pending = {entry["ip_file"] for entry in args.apply_plan["ips"] if entry["sparse_pending"]}
+            for ip in ips_to_deploy:
+                ip.sparse_pending = ip.ip_file in pending
+        for ip in ips_to_deploy:
+            configure_ip(ip, args, process=False)
+
+    if args.plan:
+        options = {option: getattr(args, option) for option in deploy_plan.PLAN_OPTIONS}
+        plan = deploy_plan.build_plan(ips_to_deploy, resolved_targets, options)
+        deploy_plan.write_plan(args.plan, plan)
+        deploy_plan.summarize_plan(plan)
+        logging.info(f"Deploy plan written to {args.plan}")
+        return
+
+    if args.apply:
+        stale = deploy_plan.check_plan(args.apply_plan, ips_to_deploy)
+        if stale:
+            for msg in stale:
+                logging.info(f"\t{msg}")
+            logging.info(f"!!FAIL!! {args.apply} is out of date, nothing was deployed. Run --plan again")
+            sys.exit(1)
+        for ip in ips_to_deploy:
+            if ip.sparse_pending:
+                ip_defaults.apply_sparse_params(ip, args.timeout)
+                ip.sparse_pending = False
+
+    run_info = {
+        "ofss": args.ofss,
+        "manifest": args.manifest,
+        "plan": args.apply,
+        "backend": args.backend,
+        "jobs": args.jobs,
+        "start": time.time(),
+    }
+    deploy_results = []
+    try:
+        if (args.jobs > 1 or args.backend == "batch") and ips_to_deploy:
+            if not preconfigure:
+                for ip in ips_to_deploy:
+                    configure_ip(ip, args)
+
+            if args.backend == "batch":
+                deploy_results = run_batch_by_target(ips_to_deploy, args)
+            else:
+                deploy_results = deploy_scheduler.run_deploys(
+                    ips_to_deploy, args.jobs, force=args.force, timeout=args.timeout
+                )
+            deploy_scheduler.summarize_deploys(deploy_results)
+
+            if args.debug:
+                for result in deploy_results:
+                    result.ip.dump_ip_deploy_cmd()
+        else:
+            for ip in ips_to_deploy:
+                if not preconfigure:
+                    configure_ip(ip, args)
+                try:
+                    ip.deploy(force=args.force, timeout=args.timeout)
+                except SystemExit:
+                    deploy_results.append(
+                        deploy_scheduler.result_from_ip(
+                            ip, ip.get_deploy_log(), deploy_scheduler.DEPLOY_FAILED
+                        )
+                    )
+                    raise
+                deploy_status = (
+                    deploy_scheduler.DEPLOY_CACHED if ip.deploy_cached else deploy_scheduler.DEPLOY_OK
+                )
+                deploy_results.append(
+                    deploy_scheduler.result_from_ip(ip, ip.get_deploy_log(), deploy_status)
+                )
+                if args.debug:
+                    ip.dump_ip_deploy_cmd()
+    finally:
+        if args.verify:
+            deploy_results = merge_verified_results(verify_results, deploy_results)
+        run_info["end"] = time.time()
+        deploy_runner.write_run_report(args.report, deploy_results, **run_info)
+
+    if deploy_scheduler.deploys_failed(deploy_results):
+        logging.info("!!FAIL!! IP Deploy Failed!! See the IP-Deploy Summary above")
+        sys.exit(1)
+
     updated_ip_files = []
-    for ip in ips_to_config:
-        ip.process_configuration()
-        ip.summarize_configuration()
-        ip.deploy()
-        if args.debug:
-            ip.dump_ip_deploy_cmd()
-        updated_ip_files.append(f"{ip.ip_file}")
+    for result in deploy_results:
+        if result.status == deploy_scheduler.DEPLOY_CACHED:
+            updated_ip_files.append(f"{result.ip.ip_file} (unchanged)")
+        else:
+            updated_ip_files.append(f"{result.ip.ip_file}")
 
     logging.info("=============================================")
     logging.info("OFS IP Configuration Tool Complete for:")
-    logging.info(f"{args.ofss}")
+    for name, ofss, target in targets:
+        logging.info(f"{name}: {ofss}" if name else f"{ofss}")
     logging.info("Updated the following:")
     for ip_file in updated_ip_files:
         logging.info(f"\t - {ip_file}")
@@ -6,9 +6,85 @@
 import os
 import logging
 import logging.handlers
-from importlib.machinery import SourceFileLoader
+import math
+from fractions import Fraction
 
-from ofs_ip import OFS
+from ofs_ip import OFS, load_ip_params
+
+
+def get_fixed_outputs(iopll_param):
+    """
+    Frequencies of the IOPLL outputs that don't follow p_clk
+    """
+    params = iopll_param.component_params
+    return [
+        Fraction(str(params[f"gui_output_clock_frequency{idx}"]))
+        for idx in range(int(params["gui_number_of_clocks"]))
+        if idx not in iopll_param.p_clk_outputs
+    ]
+
+
+def divides_exactly(vco, freq, c_max):
+    """
+    Some counter C gives 'freq' from 'vco', to the micro-Hz precision IOPLL frequencies are given in
+    """
+    c = round(vco / freq)
+    return 1 <= c <= c_max and format_mhz(vco / c) == format_mhz(freq)
+
+
+def get_vco_outputs():
+    """
+    (p_clk MHz, VCO MHz, C) of every p_clk the IOPLL can produce, as Fractions.
+    p_clk/2 and p_clk/4 use counters 2C and 4C, and every fixed output divides
+    exactly from the same VCO.
+    """
+    iopll_param = load_ip_params("iopll_component_parameters")
+    limits = iopll_param.pll_limits
+    ref = Fraction(str(iopll_param.component_params["gui_reference_clock_frequency"]))
+    fixed_outputs = get_fixed_outputs(iopll_param)
+    max_div = max(iopll_param.p_clk_outputs.values())
+
+    vcos = set()
+    for n in range(1, math.floor(ref / limits["pfd_min"]) + 1):
+        pfd = ref / n
+        if pfd > limits["pfd_max"]:
+            continue
+        for m in range(math.ceil(limits["vco_min"] / pfd), math.floor(limits["vco_max"] / pfd) + 1):
+            vcos.add(pfd * m)
+
+    outputs = []
+    for vco in sorted(vcos):
+        if not all(divides_exactly(vco, freq, limits["c_max"]) for freq in fixed_outputs):
+            continue
+        for c in range(1, limits["c_max"] // max_div + 1):
+            outputs.append((vco / c, vco, c))
+
+    return outputs
+
+
+def get_achievable_output(required_mhz):
+    """
+    Lowest IOPLL output at or above 'required_mhz', from get_vco_outputs().
+    Returns (output MHz, VCO MHz, C) as Fractions, or None if out of range.
+    """
+    required = Fraction(required_mhz)
+    candidates = [output for output in get_vco_outputs() if output[0] >= required]
+    return min(candidates, default=None)
+
+
+def get_p_clk_output(p_clk):
+    """
+    (output MHz, VCO MHz, C) producing 'p_clk' as given, e.g. by p_clk = auto, or None
+    """
+    for output in get_vco_outputs():
+        if format_mhz(output[0]) == format_mhz(p_clk):
+            return output
+
+    return None
+
+
+def format_mhz(freq):
+    return f"{float(freq):.6f}".rstrip("0").rstrip(".")
 
 
 class IOPLL(OFS):
@@ -52,12 +128,7 @@ class IOPLL(OFS):
         self.artifacts_to_clean.append(self.ip_file)
         self.artifacts_to_clean.append(self.ip_output_base)
 
-        iopll_default_path = os.path.join(
-            os.path.dirname(__file__), "ip_params/iopll_component_parameters.py"
-        )
-        self.IOPLL_PARAM = SourceFileLoader(
-            "iopll_component_parameters", iopll_default_path
-        ).load_module()
+        self.IOPLL_PARAM = load_ip_params("iopll_component_parameters")
 
         for iopll_param, iopll_param_value in self.IOPLL_PARAM.component_params.items():
             self.ip_component_params[iopll_param] = iopll_param_value
@@ -68,8 +139,16 @@ class IOPLL(OFS):
         Check and set up logic for IP component param configuration
         """
         self.get_ip_settings()
-        self.p_clk_div_2 = round(float(self.p_clk) / 2, 2)
-        self.p_clk_div_4 = round(float(self.p_clk) / 4, 2)
+        # When p_clk comes from a VCO shared with the fixed outputs, such as
+        # p_clk = auto's, the divided clocks are what that VCO produces
+        output = get_p_clk_output(Fraction(str(self.p_clk)))
+        if output is not None:
+            _, vco, c = output
+            self.p_clk_div_2 = format_mhz(vco / (2 * c))
+            self.p_clk_div_4 = format_mhz(vco / (4 * c))
+        else:
+            self.p_clk_div_2 = round(float(self.p_clk) / 2, 2)
+            self.p_clk_div_4 = round(float(self.p_clk) / 4, 2)
 
         self.check_configuration()
 
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import tempfile
+
+import deploy_runner
+from ofs_ip import get_ip_deploy_version
+from utils.ip_reader import IPFile
+
+
+DEFAULTS_NAME = "ofss_defaults"
+BIT_VALUES = {"1": True, "true": True, "0": False, "false": False}
+NUMERIC_TYPES = ["int", "integer", "long", "real", "float", "double"]
+
+
+def get_defaults_cache_dir():
+    """
+    Cached IP default tables live under $OFS_IP_DEFAULTS_CACHE, or ~/.cache/ofss_config/ip_defaults
+    """
+    return os.environ.get(
+        "OFS_IP_DEFAULTS_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "ofss_config", "ip_defaults"),
+    )
+
+
+def get_defaults_deploy_args(ip, output_dir):
+    """
+    IP Deploy command creating the IP with its preset, if any, and no component parameters
+    """
+    deploy_args = ["ip-deploy"]
+    deploy_args.append(f"--family={ip.fpga_family}")
+    deploy_args.append(f"--part={ip.part}")
+    deploy_args.append(ip.get_quartus_search_string_arg())
+    deploy_args.append(f"--output-name={DEFAULTS_NAME}")
+    deploy_args.append(f"--component-name={ip.ip_component}")
+    deploy_args.append(f"--output-directory={output_dir}")
+    if ip.ip_preset:
+        deploy_args.append(f"--preset={ip.ip_preset}")
+
+    return deploy_args
+
+
+def get_defaults_file(ip):
+    """
+    Cache file for the IP's defaults, keyed on everything that can change them,
+    including the content of the preset files when a preset is configured
+    """
+    key = hashlib.sha256(get_ip_deploy_version().encode())
+    for arg in get_defaults_deploy_args(ip, ""):
+        key.update(b"\0")
+        key.update(arg.encode())
+    if ip.ip_preset:
+        key.update(b"\0")
+        key.update(ip.get_preset_hash().encode())
+
+    return os.path.join(get_defaults_cache_dir(), f"{ip.ip_component}-{key.hexdigest()[:16]}.json")
+
+
+def read_ip_defaults(ip_file):
+    """
+    {parameter: [value, type]} for every module parameter of an IP file
+    """
+    ip = IPFile(ip_file)
+    return {
+        name: [param.value, param.type]
+        for name, param in ip.altera_module_parameters.items()
+    }
+
+
+def generate_ip_defaults(ip, timeout=None):
+    """
+    Deploy the IP with no component parameters into a scratch directory and read back its values
+    """
+    with tempfile.TemporaryDirectory(prefix="ofss_defaults_") as tmp_dir:
+        log_file = os.path.join(tmp_dir, f"{DEFAULTS_NAME}.deploy.log")
+        record = deploy_runner.run_logged(
+            get_defaults_deploy_args(ip, tmp_dir), log_file, timeout
+        )
+        ip_file = os.path.join(tmp_dir, f"{DEFAULTS_NAME}.ip")
+        if record.exit_status != 0 or not os.path.isfile(ip_file):
+            with open(log_file) as fIn:
+                logging.debug(fIn.read())
+            return None
+
+        return read_ip_defaults(ip_file)
+
+
+def load_ip_defaults(ip, timeout=None):
+    """
+    The IP's default parameter values, from the cache or generated once and cached.
+    Returns None if they can't be determined.
+    """
+    defaults_file = get_defaults_file(ip)
+    try:
+        with open(defaults_file) as fIn:
+            return json.load(fIn)
+    except (OSError, ValueError):
+        pass
+
+    logging.info(f"Generating default parameter values for {ip.ip_component}")
+    defaults = generate_ip_defaults(ip, timeout)
+    if defaults is None:
+        return None
+
+    os.makedirs(os.path.dirname(defaults_file), exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=os.path.dirname(defaults_file), delete=False
+    ) as fOut:
+        json.dump(defaults, fOut, indent=1, sort_keys=True)
+    os.replace(fOut.name, defaults_file)
+
+    return defaults
+
+
+def values_equal(value, default, param_type):
+    """
+    Compare a configured value with an IP default the way the IP would interpret it
+    """
+    value = str(value).strip()
+    default = "" if default is None else str(default).strip()
+    if value == default:
+        return True
+
+    param_type = (param_type or "").lower()
+    if param_type in ["bit", "boolean"]:
+        return (
+            value.lower() in BIT_VALUES
+            and default.lower() in BIT_VALUES
+            and BIT_VALUES[value.lower()] == BIT_VALUES[default.lower()]
+        )
+    if param_type in NUMERIC_TYPES:
+        try:
+            return float(value) == float(default)
+        except ValueError:
+            return False
+
+    return False
+
+
+def get_sparse_params(params, defaults):
+    """
+    Only the parameters whose value differs from the IP's default
+    """
+    sparse = {}
+    for param, value in params.items():
+        if param in defaults and values_equal(value, *defaults[param]):
+            continue
+        sparse[param] = value
+
+    return sparse
+
+
+def is_sparse_pending(ip):
+    """
+    Whether --sparse would have to deploy the IP to learn its defaults
+    """
+    return bool(ip.ip_component_params) and not os.path.isfile(get_defaults_file(ip))
+
+
+def apply_sparse_params(ip, timeout=None):
+    """
+    Drop the IP's component parameters that are already at their default value
+    """
+    if not ip.ip_component_params:
+        return
+
+    defaults = load_ip_defaults(ip, timeout)
+    if defaults is None:
+        logging.info(
+            f"Could not determine {ip.ip_component} defaults, sending all {len(ip.ip_component_params)} parameters"
+        )
+        return
+
+    sparse = get_sparse_params(ip.ip_component_params, defaults)
+    logging.info(
+        f"{ip.ip_type}: sending {len(sparse)} of {len(ip.ip_component_params)} component parameters, "
+        f"the rest match the {ip.ip_component} defaults"
+    )
+    ip.ip_component_params = sparse
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+"""
+Registry of the ip_params/*.py parameter tables.
+
+Each table module is loaded once per process, from the bytecode Python
+caches in ip_params/__pycache__, and its component and func_params
+tables are checked when it is loaded. Per-function expansions of the
+func_params templates are computed once and shared by every IP.
+"""
+
+import functools
+import importlib.util
+import logging
+import logging.handlers
+import os
+import string
+import sys
+
+
+IP_PARAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ip_params")
+# Tables of component parameter: value
+SCALAR_TABLES = ["component_params", "default_component_params"]
+# Tables of '{func_num}' template: value or [default, ofss key]
+FUNC_TABLE_SUFFIX = "func_params"
+# 'AUTO_' ofss keys, each derived from other PF settings by PCIe.override_pf_param_from_ofss()
+AUTO_OFSS_KEYS = ["AUTO_pasid_cap_max_pasid_width"]
+
+
+def _tableError(module_name, msg):
+    logging.info(f"!!Error!! ip_params/{module_name}.py: {msg}")
+    sys.exit(1)
+
+
+def is_scalar(value):
+    return isinstance(value, (str, int, float))
+
+
+def check_scalar_table(module_name, table_name, table):
+    for param, value in table.items():
+        if not isinstance(param, str) or not is_scalar(value):
+            _tableError(module_name, f"{table_name}[{param!r}] should map a name to a single value")
+
+
+def check_func_table(module_name, table_name, table):
+    """
+    Each entry is a template with a single '{func_num}' field, and a value that is
+    either a single object or [default, ofss key]. An 'AUTO_' ofss key is derived
+    by the script and can't be set in an .ofss file, so it must be one the script derives.
+    """
+    for param, value in table.items():
+        fields = {field for _, field, _, _ in string.Formatter().parse(param) if field is not None}
+        if fields != {"func_num"}:
+            _tableError(module_name, f"{table_name}[{param!r}] should have one {{func_num}} field")
+        if isinstance(value, list):
+            if len(value) != 2 or not is_scalar(value[0]) or not isinstance(value[1], str) or not value[1]:
+                _tableError(module_name, f"{table_name}[{param!r}] should be [default, ofss key]")
+            if value[1].startswith("AUTO_") and value[1] not in AUTO_OFSS_KEYS:
+                _tableError(
+                    module_name, f"{table_name}[{param!r}] has {value[1]}, which is not one of {AUTO_OFSS_KEYS}"
+                )
+        elif not is_scalar(value):
+            _tableError(module_name, f"{table_name}[{param!r}] should be a value or [default, ofss key]")
+
+
+def check_ip_params(module_name, module):
+    for table_name, table in vars(module).items():
+        if table_name in SCALAR_TABLES:
+            check_scalar_table(module_name, table_name, table)
+        elif table_name.endswith(FUNC_TABLE_SUFFIX) and isinstance(table, dict):
+            check_func_table(module_name, table_name, table)
+
+
+@functools.lru_cache(maxsize=None)
+def load_ip_params(module_name):
+    """
+    ip_params/<module_name>.py, loaded and checked once and shared by every IP using it.
+    The IPs only read these tables.
+    """
+    param_file = os.path.join(IP_PARAMS_DIR, f"{module_name}.py")
+    spec = importlib.util.spec_from_file_location(module_name, param_file)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except FileNotFoundError:
+        _tableError(module_name, "does not exist")
+
+    check_ip_params(module_name, module)
+    return module
+
+
+@functools.lru_cache(maxsize=None)
+def expand_func_params(module_name, table_name, func_num):
+    """
+    (component parameter, default, ofss key or None) of each entry of a func_params
+    table, with '{func_num}' replaced by 'func_num', e.g. 'pf0'
+    """
+    table = getattr(load_ip_params(module_name), table_name)
+    expanded = []
+    for param, value in table.items():
+        default, ofss_key = value if isinstance(value, list) else (value, None)
+        expanded.append((param.format(func_num=func_num), default, ofss_key))
+
+    return tuple(expanded)
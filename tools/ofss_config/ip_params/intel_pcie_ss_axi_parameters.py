@@ -100,3 +100,31 @@ multi_vfs_func_params = {
     "core16_exvf_msixpba_bir_{func_num}": 4,
     "core16_exvf_msixpba_offset_{func_num}": 1550,
 }
+
+#
+# Link-level tuning that can be set in the .ofss [settings] section.
+# Each entry maps the .ofss key to the component parameter it sets and
+# the values it accepts. An empty list accepts any value.
+#
+link_params = {
+    "tag_10bit": ["core16_enable_10bit_tag_support_intf_hwtcl", ["0", "1"]],
+    "comp_timeout": ["core16_comp_timeout_en_hwtcl", ["0", "1"]],
+}
+
+#
+# [settings] perf_profile. This IP has no completion reorder buffer
+# setting, so 'latency' can't change anything and isn't offered.
+# 'throughput' is the defaults, 10-bit tags on, stated explicitly.
+#
+perf_profiles = {
+    "throughput": {"tag_10bit": "1"},
+    "custom": {},
+}
+
+#
+# link_params values each PCIe generation accepts, as for pcie_ss.
+#
+gen_link_params = {
+    "4": {"tag_10bit": ["0", "1"], "comp_timeout": ["0", "1"]},
+    "5": {"tag_10bit": ["1"], "comp_timeout": ["1"]},
+}
@@ -19,3 +19,21 @@ component_params = {
     "gui_output_clock_frequency4": 50,
     "gui_output_clock_frequency5": 100,
 }
+
+#
+# IOPLL limits used to pick an achievable output for p_clk = auto.
+# An output is reference * M / (N * C), with the PFD (reference / N)
+# and the VCO (reference * M / N) kept within range. p_clk/2 and
+# p_clk/4 come from the same VCO with counters 2C and 4C, and every
+# other output of component_params must divide from it exactly.
+#
+pll_limits = {
+    "pfd_min": 10,
+    "pfd_max": 325,
+    "vco_min": 600,
+    "vco_max": 1600,
+    "c_max": 512,
+}
+
+# Outputs that follow p_clk, as {output index: divisor of p_clk}
+p_clk_outputs = {0: 1, 2: 2, 5: 4}
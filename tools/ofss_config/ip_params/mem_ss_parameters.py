@@ -0,0 +1,68 @@
+# Copyright (C) 2023 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+#
+# Memory settings that can be given in the .ofss [settings] section
+# instead of a preset. Each entry maps the .ofss key to the values it
+# accepts; Memory.check_configuration() applies them.
+#
+memory_settings = {
+    # DDR4 speed bin, MT/s. Each has a memory clock in mem_clk_freqs.
+    "memory_rate": ["1600", "1866", "2133", "2400", "2666", "2933", "3200"],
+    "num_channels": ["1", "2", "3", "4"],
+    # User data bits per channel. ECC adds 8 check bits to the DQ width.
+    "data_width": ["16", "32", "64"],
+    "ecc": ["0", "1"],
+    # Controller clock relative to the memory clock
+    "controller_rate": ["quarter", "half"],
+}
+
+default_settings = {
+    "num_channels": "1",
+    "data_width": "64",
+    "ecc": "0",
+    "controller_rate": "quarter",
+}
+
+ecc_data_widths = ["32", "64"]
+
+controller_rates = {"quarter": "RATE_QUARTER", "half": "RATE_HALF"}
+
+#
+# Memory clock of each DDR4 speed bin in MHz, half the JEDEC data rate
+# (e.g. 2666.667 MT/s for DDR4-2666), to the kHz as the EMIF IP stores it.
+#
+mem_clk_freqs = {
+    "1600": "800.0",
+    "1866": "933.333",
+    "2133": "1066.667",
+    "2400": "1200.0",
+    "2666": "1333.333",
+    "2933": "1466.667",
+    "3200": "1600.0",
+}
+
+#
+# mem_ss channel lists, read by mem_ss_get_cfg.tcl: one space-separated
+# entry per channel. Each channel is a DDR4 PHY with an AXI-MM (STORAGE)
+# application interface.
+#
+mem_intfs_param = "MEM_INTFS_TYPE"
+mem_intf_type = "DDR4"
+app_intfs_param = "APP_INTFS_TYPE"
+app_intf_type = "STORAGE"
+
+#
+# DDR4 EMIF parameters, set the same way on mem_ss, whose channels are
+# all configured identically, and on the altera_emif_mem_model simulation
+# model. The names are the EMIF IP's, as stored in the in-tree
+# hps_ss_emif_fm_hps_0.ip and mem_ss_tg.ip. To list them:
+#   utils/ip_param_db.py query 'MEM_DDR4_*' 'PHY_DDR4_*' 'CTRL_DDR4_*'
+#
+emif_params = {
+    "speedbin": "MEM_DDR4_SPEEDBIN_ENUM",
+    "mem_clk": "PHY_DDR4_MEM_CLK_FREQ_MHZ",
+    "controller_rate": "PHY_DDR4_RATE_ENUM",
+    "dq_width": "MEM_DDR4_DQ_WIDTH",
+    "ecc": "CTRL_DDR4_ECC_EN",
+}
@@ -110,3 +110,50 @@ multi_vfs_func_params = {
     "core16_exvf_msixpba_bir_{func_num}": 4,
     "core16_exvf_msixpba_offset_{func_num}": 1550,
 }
+
+#
+# Link-level tuning that can be set in the .ofss [settings] section.
+# Each entry maps the .ofss key to the component parameter it sets and
+# the values it accepts. An empty list accepts any value, checked by
+# PCIe.check_link_settings().
+#
+link_params = {
+    "tag_10bit": ["core16_enable_10bit_tag_support_intf_hwtcl", ["0", "1"]],
+    "cpl_reordering": ["core16_cpl_reordering_en_hwtcl", ["0", "1"]],
+    "comp_timeout": ["core16_comp_timeout_en_hwtcl", ["0", "1"]],
+    "axi_st_clk_freq": ["axi_st_clk_freq_user_hwtcl", []],
+    "msix_table_size": ["core16_msix_table_size_hwtcl", []],
+}
+
+#
+# [settings] perf_profile. Each profile is a set of link_params values
+# applied over default_component_params; link_params keys in the .ofss
+# file still take precedence. 'throughput' is the defaults, 10-bit tags
+# and completion reordering on, stated explicitly. 'latency' turns
+# completion reordering off, so completions reach the AFU as they arrive
+# instead of waiting in the reorder buffer. The AFU must then accept
+# out-of-order completions.
+#
+perf_profiles = {
+    "throughput": {"tag_10bit": "1", "cpl_reordering": "1"},
+    "latency": {"cpl_reordering": "0"},
+    "custom": {},
+}
+
+#
+# link_params values each PCIe generation accepts, checked against the
+# link's top_topology_hwtcl by PCIe.check_link_settings(). At 32 GT/s
+# (Gen5) a function must be a 10-bit tag requester. With 10-bit tags up
+# to 768 reads are outstanding, and only the completion timeout frees the
+# tag of a completion that never arrives, so it can't be turned off.
+#
+gen_link_params = {
+    "4": {"tag_10bit": ["0", "1"], "comp_timeout": ["0", "1"]},
+    "5": {"tag_10bit": ["1"], "comp_timeout": ["1"]},
+}
+
+#
+# Width in bits of the AXI-ST data bus of each link. With the AXI-ST clock
+# it gives the datapath capacity used by bandwidth_budget.py.
+#
+axi_st_data_width = 512
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+"""
+Content-addressed store of deployed IP files shared between work trees.
+
+Enabled by setting $OFS_IP_STORE. Entries are keyed on the IP's deploy
+command with its target root directory taken out, and on the preset files
+it can read, so the same IP configuration deployed into another work tree
+is taken from the store instead of running ip-deploy again. The IP file is
+hardlinked and checked against its hash on use; generated directories are
+copied, so editing one in a work tree never reaches the store.
+
+Run Command "python3 ip_store.py [--store <dir>] list|prune --max-size 20G"
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+ENTRY_MANIFEST = "entry.json"
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def get_store_dir():
+    """
+    Root of the IP store, or None when the store is not enabled
+    """
+    return os.environ.get("OFS_IP_STORE") or None
+
+
+def get_entry_dir(store_dir, key):
+    return os.path.join(store_dir, key[:2], key)
+
+
+def hash_file(path):
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as fIn:
+        for chunk in iter(lambda: fIn.read(1 << 20), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def get_search_root(entry):
+    """
+    Directory a search path entry ('<dir>', '<dir>/*' or '<dir>/**/*') looks in
+    """
+    parts = []
+    for part in entry.split("/"):
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+
+    return "/".join(parts) or "."
+
+
+@functools.lru_cache(maxsize=None)
+def get_preset_files(search_string):
+    """
+    (path under its search path entry, sha256) of each .qprs preset file on an
+    expanded ip-deploy search path. '$', the Quartus installation, is covered by
+    the ip-deploy version.
+    """
+    presets = []
+    for entry in search_string.split(","):
+        if entry in ("", "$"):
+            continue
+        root = get_search_root(entry)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(".qprs"):
+                    path = os.path.join(dirpath, name)
+                    presets.append((os.path.relpath(path, root), hash_file(path)))
+
+    return tuple(presets)
+
+
+def link_file(src, dst):
+    """
+    Hardlink 'src' to 'dst', or copy it when they are on different file systems
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def copy_tree(src, dst):
+    shutil.copytree(src, dst, symlinks=True, dirs_exist_ok=True)
+
+
+def get_ip_outputs(ip):
+    """
+    (path in the work tree, name in a store entry) of each output of the IP's deploy
+    """
+    name = os.path.basename(ip.ip_output_base)
+    return [(ip.ip_file, f"{name}.ip"), (ip.ip_output_base, name)]
+
+
+def fetch(ip, key, store_dir=None):
+    """
+    Link a stored IP file, and copy its generated directory if it was stored, into the work tree.
+    Returns False if the store has no valid entry for 'key'.
+    """
+    store_dir = store_dir or get_store_dir()
+    entry_dir = get_entry_dir(store_dir, key)
+    try:
+        with open(os.path.join(entry_dir, ENTRY_MANIFEST)) as fIn:
+            manifest = json.load(fIn)
+    except (OSError, ValueError):
+        return False
+
+    outputs = get_ip_outputs(ip)
+    stored_ip = os.path.join(entry_dir, outputs[0][1])
+    if not os.path.isfile(stored_ip) or hash_file(stored_ip) != manifest.get("ip_hash"):
+        # Modified through one of its links; drop it, the next deploy stores a fresh copy
+        logging.info(f"Discarding modified IP store entry {entry_dir}")
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        return False
+
+    os.makedirs(os.path.dirname(ip.ip_file), exist_ok=True)
+    for path, name in outputs:
+        stored = os.path.join(entry_dir, name)
+        if os.path.isdir(stored):
+            copy_tree(stored, path)
+        elif os.path.isfile(stored):
+            link_file(stored, path)
+
+    # Last use, for prune()
+    os.utime(entry_dir)
+    logging.info(f"{ip.ip_file} linked from IP store entry {key}")
+    return True
+
+
+def populate(ip, key, store_dir=None):
+    """
+    Add a freshly deployed IP to the store. The entry is assembled in a
+    temporary directory and renamed into place, so readers never see a
+    partial entry; if another work tree stored it first, that entry is kept.
+    """
+    store_dir = store_dir or get_store_dir()
+    entry_dir = get_entry_dir(store_dir, key)
+    if os.path.isdir(entry_dir):
+        return
+
+    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{key[:16]}.", dir=os.path.dirname(entry_dir))
+    try:
+        for path, name in get_ip_outputs(ip):
+            if os.path.isdir(path):
+                copy_tree(path, os.path.join(tmp_dir, name))
+            elif os.path.isfile(path):
+                link_file(path, os.path.join(tmp_dir, name))
+
+        manifest = {
+            "ip_hash": hash_file(ip.ip_file),
+            "component": ip.ip_component,
+            "ip_file": ip.ip_file,
+            "stored": time.time(),
+        }
+        with open(os.path.join(tmp_dir, ENTRY_MANIFEST), "w") as fOut:
+            json.dump(manifest, fOut, indent=4)
+            fOut.write("\n")
+
+        os.rename(tmp_dir, entry_dir)
+    except OSError as e:
+        if not os.path.isdir(entry_dir):
+            logging.info(f"Could not add {ip.ip_file} to the IP store: {e}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def get_entries(store_dir):
+    """
+    (last use, size in bytes, entry directory) of each complete store entry
+    """
+    entries = []
+    for prefix in sorted(os.listdir(store_dir)):
+        prefix_dir = os.path.join(store_dir, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for key in os.listdir(prefix_dir):
+            entry_dir = os.path.join(prefix_dir, key)
+            if key.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = 0
+            for dirpath, _, filenames in os.walk(entry_dir):
+                size += sum(os.lstat(os.path.join(dirpath, f)).st_size for f in filenames)
+            entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+
+    return entries
+
+
+def prune(store_dir, max_size):
+    """
+    Remove the least recently used entries until the store fits in 'max_size' bytes.
+    Returns the removed entry directories.
+    """
+    entries = sorted(get_entries(store_dir))
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, entry_dir in entries:
+        if total <= max_size:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed.append(entry_dir)
+
+    return removed
+
+
+def parse_size(size):
+    """
+    '500M', '20G' or a plain byte count
+    """
+    size = size.strip().upper().rstrip("B")
+    unit = size[-1:] if size[-1:] in SIZE_UNITS else ""
+    return int(float(size[: len(size) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def process_input_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default=get_store_dir(), help="IP store directory, defaults to $OFS_IP_STORE")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Show the store entries, least recently used first")
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used entries")
+    prune_parser.add_argument("--max-size", required=True, help="Size to shrink the store to, e.g. 500M or 20G")
+
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("no store directory, set $OFS_IP_STORE or use --store")
+    if args.command == "prune":
+        try:
+            args.max_size = parse_size(args.max_size)
+        except ValueError:
+            parser.error(f"invalid --max-size {args.max_size}")
+
+    return args
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    args = process_input_arguments()
+    if not os.path.isdir(args.store):
+        logging.info(f"{args.store} does not exist")
+        return
+
+    if args.command == "list":
+        entries = sorted(get_entries(args.store))
+        for last_use, size, entry_dir in entries:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_use))
+            logging.info(f"{stamp}  {size / (1 << 20):9.1f} MiB  {entry_dir}")
+        logging.info(f"{len(entries)} entries, {sum(e[1] for e in entries) / (1 << 20):.1f} MiB")
+    else:
+        removed = prune(args.store, args.max_size)
+        for entry_dir in removed:
+            logging.info(f"Removed {entry_dir}")
+        logging.info(f"Removed {len(removed)} entries")
+
+
+if __name__ == "__main__":
+    main()
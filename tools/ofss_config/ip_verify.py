@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+import logging
+import logging.handlers
+import os
+import xml.etree.ElementTree as ET
+
+from ip_defaults import values_equal
+from utils.ip_reader import IPFile
+
+
+VERIFY_IDENTICAL = "identical"
+VERIFY_DRIFT = "drift"
+VERIFY_MISSING = "missing"
+
+
+class VerifyResult:
+    """
+    How an IP's existing .ip file compares with its OFSS configuration
+    """
+    def __init__(self, ip, status, diffs=None, error=""):
+        self.ip = ip
+        self.status = status
+        # (parameter, configured value, value in the .ip file or None if absent)
+        self.diffs = diffs or []
+        self.error = error
+
+
+def verify_ip(ip):
+    """
+    Compare the component and component parameters computed by process_configuration()
+    with the module parameters of the IP file currently in the tree.
+    A preset leaves no trace in the IP file, so an IP configured from one is only
+    identical when its deploy sidecar shows it was deployed from the current
+    command and preset files.
+    """
+    if not os.path.isfile(ip.ip_file):
+        return VerifyResult(ip, VERIFY_MISSING, error="no IP file")
+
+    try:
+        ip_file = IPFile(ip.ip_file, groups=("altera_module_parameters",))
+        existing = ip_file.altera_module_parameters
+        class_name = ip_file.class_name
+    except (ET.ParseError, KeyError) as e:
+        return VerifyResult(ip, VERIFY_MISSING, error=f"unreadable IP file: {e}")
+
+    diffs = []
+    if ip.ip_component and class_name != ip.ip_component:
+        diffs.append(("component", ip.ip_component, class_name))
+    for param, value in ip.ip_component_params.items():
+        if param not in existing:
+            diffs.append((param, value, None))
+        elif not values_equal(value, existing[param].value, existing[param].type):
+            diffs.append((param, value, existing[param].value))
+
+    if ip.ip_preset and not ip.is_deploy_current(ip.get_deploy_hash()):
+        return VerifyResult(
+            ip, VERIFY_DRIFT, diffs, error=f"preset {ip.ip_preset} not verified, no current deploy record"
+        )
+
+    return VerifyResult(ip, VERIFY_DRIFT if diffs else VERIFY_IDENTICAL, diffs)
+
+
+def verify_ips(ips):
+    return [verify_ip(ip) for ip in ips]
+
+
+def verify_failed(results):
+    return any(result.status != VERIFY_IDENTICAL for result in results)
+
+
+def summarize_verify(results):
+    """
+    Log each IP's verification status, with the parameters that drifted
+    """
+    logging.info("=========================")
+    logging.info("IP Verify Summary")
+    logging.info("=========================")
+    for result in results:
+        msg = f"{result.ip.ip_type:<10}{result.status:<10} {result.ip.ip_file}"
+        if result.error:
+            msg += f" ({result.error})"
+        logging.info(msg)
+        for param, value, existing in result.diffs:
+            existing = "<not set>" if existing is None else existing
+            logging.info(f"\t{param}: {existing} -> {value}")
@@ -7,14 +7,77 @@ import os
 import logging
 import logging.handlers
 
-from ofs_ip import OFS
+from ofs_ip import OFS, load_ip_params
+
+
+def get_memory_settings(memory_config, mem_param):
+    """
+    Parameter-level memory settings from [settings] over their defaults, or {} if none are given
+    """
+    settings = memory_config["settings"]
+    given = {key: str(settings[key]) for key in mem_param.memory_settings if key in settings}
+    if not given:
+        return {}
+
+    return {**mem_param.default_settings, **given}
+
+
+def get_channel_values(memory_settings, mem_param):
+    """
+    Value of each per-channel parameter ('speedbin', 'dq_width', ...) for the memory settings
+    """
+    rate = int(memory_settings["memory_rate"])
+    data_width = int(memory_settings["data_width"])
+    ecc = memory_settings["ecc"] == "1"
+    return {
+        "speedbin": f"DDR4_SPEEDBIN_{rate}",
+        "mem_clk": mem_param.mem_clk_freqs[memory_settings["memory_rate"]],
+        "controller_rate": mem_param.controller_rates[memory_settings["controller_rate"]],
+        "dq_width": data_width + 8 if ecc else data_width,
+        "ecc": "true" if ecc else "false",
+    }
+
+
+def get_channel_gbps(memory_settings):
+    """
+    Theoretical bandwidth of one channel in Gbps, shared by reads and writes.
+    ECC check bits carry no user data.
+    """
+    return int(memory_settings["memory_rate"]) * int(memory_settings["data_width"]) / 1000
+
+
+def check_memory_settings(ip):
+    """
+    Ensure a Memory or SimMemory configuration has either a preset or valid memory settings
+    """
+    if ip.ip_preset:
+        if ip.memory_settings:
+            ip._errorExit(
+                f"!!Memory Config Error!! memory settings can't be combined with preset {ip.ip_preset}"
+            )
+        return
+
+    if "memory_rate" not in ip.memory_settings:
+        ip._errorExit(
+            "!!Memory Config Error!! Memory configuration needs a preset or a memory_rate"
+        )
+
+    for key, value in ip.memory_settings.items():
+        allowed = ip.MEM_SS_PARAM.memory_settings[key]
+        if value not in allowed:
+            ip._errorExit(f"!!Memory Config Error!! {key} should be one of {allowed}, not {value}")
+
+    if ip.memory_settings["ecc"] == "1" and ip.memory_settings["data_width"] not in ip.MEM_SS_PARAM.ecc_data_widths:
+        ip._errorExit(
+            f"!!Memory Config Error!! ecc needs a data_width of {ip.MEM_SS_PARAM.ecc_data_widths}, not {ip.memory_settings['data_width']}"
+        )
 
 
 class Memory(OFS):
     """
-    Class used for configuring Memory. Inherits from OFS class 
+    Class used for configuring Memory. Inherits from OFS class
     Contains logic for generating IP files for Memory
-    Currently supporting configuration with presets
+    Configured with a preset, or with the memory settings in ip_params/mem_ss_parameters.py
     """
     def __init__(self, ofs_config, memory_config, target):
         super().__init__(ofs_config, target)
@@ -24,15 +87,15 @@ class Memory(OFS):
         self.ip_instance_name = "mem_ss"
         self.ip_path = os.path.join(self.target_rootdir, "ipss", "mem", "qip", "mem_ss")
 
+        self.memory_settings = {}
+        self.MEM_SS_PARAM = None
+
     def check_configuration(self):
         """
         Ensure configuration is valid. Refer to README or design specs for more info
         Abort if violation
         """
-        if self.ip_preset not in ["n6001", "f2000x", "fseries-dk"]:
-            self._errorExit(
-                f'!!Memory Config Error!! Currently only supporting "--preset" values of "n6001", "f2000x", or "fseries-dk"'
-            )
+        check_memory_settings(self)
 
     def get_ip_settings(self):
         """
@@ -44,14 +107,33 @@ class Memory(OFS):
         self.artifacts_to_clean.append(self.ip_file)
         self.artifacts_to_clean.append(self.ip_output_base)
 
-        self.ip_preset = self.memory_config["settings"]["preset"]
+        self.MEM_SS_PARAM = load_ip_params(f"{self.ip_component}_parameters")
+        self.ip_preset = self.memory_config["settings"].get("preset", "")
+        self.memory_settings = get_memory_settings(self.memory_config, self.MEM_SS_PARAM)
 
     def process_configuration(self):
         """
         Check and set up logic for IP component param configuration
         """
         self.get_ip_settings()
-        #self.check_configuration()
+        self.check_configuration()
+
+        if not self.ip_preset:
+            self.set_component_params()
+
+    def set_component_params(self):
+        """
+        Update IP component parameters, the same for every channel
+        """
+        num_channels = int(self.memory_settings["num_channels"])
+        self.ip_component_params[self.MEM_SS_PARAM.mem_intfs_param] = " ".join(
+            [self.MEM_SS_PARAM.mem_intf_type] * num_channels
+        )
+        self.ip_component_params[self.MEM_SS_PARAM.app_intfs_param] = " ".join(
+            [self.MEM_SS_PARAM.app_intf_type] * num_channels
+        )
+        for key, value in get_channel_values(self.memory_settings, self.MEM_SS_PARAM).items():
+            self.ip_component_params[self.MEM_SS_PARAM.emif_params[key]] = value
 
     def summarize_configuration(self):
         """
@@ -61,15 +143,26 @@ class Memory(OFS):
         logging.info("=========================")
         logging.info("Memory Summary")
         logging.info("=========================")
-        logging.info(f"Preset = {self.ip_preset}")
+        if self.ip_preset:
+            logging.info(f"Preset = {self.ip_preset}")
+        else:
+            ecc = " + 8 ECC" if self.memory_settings["ecc"] == "1" else ""
+            channel_gbps = get_channel_gbps(self.memory_settings)
+            num_channels = int(self.memory_settings["num_channels"])
+            logging.info(f"Memory Rate = DDR4-{self.memory_settings['memory_rate']}")
+            logging.info(f"Channels = {num_channels}")
+            logging.info(f"Data Width = {self.memory_settings['data_width']}{ecc} bits")
+            logging.info(f"Controller Rate = {self.memory_settings['controller_rate']}")
+            logging.info(f"Bandwidth per channel = {channel_gbps:.1f} Gbps ({channel_gbps / 8:.1f} GB/s)")
+            logging.info(f"Total bandwidth = {channel_gbps * num_channels:.1f} Gbps")
         logging.info("")
 
 
 class SimMemory(OFS):
     """
-    Class used for configuring Memory. Inherits from OFS class 
+    Class used for configuring Memory. Inherits from OFS class
     Contains logic for generating IP file for SimMemory
-    Currently supporting configuration with presets
+    Follows the Memory configuration: its preset, or one channel's memory settings
     """
     def __init__(self, ofs_config, memory_config, target):
         super().__init__(ofs_config, target)
@@ -78,15 +171,15 @@ class SimMemory(OFS):
         self.ip_component = "altera_emif_mem_model"
         self.ip_path = os.path.join(self.target_rootdir, "ipss", "mem", "qip", "ed_sim")
 
+        self.memory_settings = {}
+        self.MEM_SS_PARAM = None
+
     def check_configuration(self):
         """
         Ensure configuration is valid. Refer to README or design specs for more info
         Abort if violation
         """
-        if self.ip_preset not in ["n6001", "f2000x", "fseries-dk"]:
-            self._errorExit(
-                f'!!Memory Config Error!! Currently only supporting "--preset" values of "n6001", "f2000x", or "fseries-dk"'
-            )
+        check_memory_settings(self)
 
     def get_ip_settings(self):
         """
@@ -98,14 +191,26 @@ class SimMemory(OFS):
         self.artifacts_to_clean.append(self.ip_file)
         self.artifacts_to_clean.append(self.ip_output_base)
 
-        self.ip_preset = self.memory_config["settings"]["preset"]
+        self.MEM_SS_PARAM = load_ip_params("mem_ss_parameters")
+        self.ip_preset = self.memory_config["settings"].get("preset", "")
+        self.memory_settings = get_memory_settings(self.memory_config, self.MEM_SS_PARAM)
 
     def process_configuration(self):
         """
         Check and set up logic for IP component param configuration
         """
         self.get_ip_settings()
-        #self.check_configuration()
+        self.check_configuration()
+
+        if not self.ip_preset:
+            self.set_component_params()
+
+    def set_component_params(self):
+        """
+        Update IP component parameters
+        """
+        for key, value in get_channel_values(self.memory_settings, self.MEM_SS_PARAM).items():
+            self.ip_component_params[self.MEM_SS_PARAM.emif_params[key]] = value
 
     def summarize_configuration(self):
         """
@@ -115,5 +220,8 @@ class SimMemory(OFS):
         logging.info("=========================")
         logging.info("SimMemory Summary")
         logging.info("=========================")
-        logging.info(f"Preset = {self.ip_preset}")
+        if self.ip_preset:
+            logging.info(f"Preset = {self.ip_preset}")
+        else:
+            logging.info(f"Memory Rate = DDR4-{self.memory_settings['memory_rate']}, as Memory")
         logging.info("")
@@ -3,12 +3,37 @@
 # Copyright 2020 Intel Corporation
 # SPDX-License-Identifier: MIT
 
+import functools
+import hashlib
+import json
 import logging
 import logging.handlers
 import os
+import shlex
 import shutil
+import subprocess
 import sys
 
+import deploy_runner
+from ip_param_tables import load_ip_params
+import ip_store
+
+
+@functools.lru_cache(maxsize=None)
+def get_ip_deploy_version():
+    """
+    Version banner of the ip-deploy found on PATH. Part of the deploy cache key,
+    so a Quartus update re-deploys every IP.
+    """
+    try:
+        result = subprocess.run(  # nosec
+            ["ip-deploy", "--version"], capture_output=True, text=True, timeout=300
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+    return result.stdout.strip() or "unknown"
+
 
 class OFS:
     """
@@ -40,7 +65,27 @@ class OFS:
         self.ip_preset = ""
 
         self.ip_component_params = {}
+        # {component parameter: source} for parameters taken from another IP's configuration
+        self.derived_params = {}
         self.artifacts_to_clean = []
+        # Set when --sparse is left to --apply, because planning found no cached defaults
+        self.sparse_pending = False
+
+        # IP types whose deploy has to finish before this IP's deploy starts
+        self.deploy_depends_on = []
+        # Set when deploy() found the IP file up to date and skipped ip-deploy
+        self.deploy_cached = False
+        # deploy_runner.RunRecord of the last deploy command
+        self.deploy_record = None
+        # 'args' passes component parameters on the ip-deploy command line.
+        # 'script' writes them to a Platform Designer script run by qsys-script.
+        self.param_transport = "args"
+        # 'ip-deploy', or 'batch' when the IP file is created in a shared qsys-script session
+        self.deploy_backend = "ip-deploy"
+        # (script file, lines for this IP) when the IP was created from a script
+        self.deploy_script = None
+        # Directory for the IP's deploy log and deploy script
+        self.log_dir = "."
 
     def _check_config_enable(self, config_param_value):
         """
@@ -95,7 +140,7 @@ class OFS:
         """
         Provide path to quartus
         """
-        return f'--search-path="{self.get_quartus_search_string()}"'
+        return f"--search-path={os.path.expandvars(self.get_quartus_search_string())}"
 
     def get_quartus_search_string(self):
         return "$OFS_ROOTDIR/ipss/**/*,$"
@@ -106,28 +151,29 @@ class OFS:
         """
         ip_args = []
         if self.ip_output_name:
-            ip_args.append(f'--output-name="{self.ip_output_name}"')
+            ip_args.append(f"--output-name={self.ip_output_name}")
         if self.ip_component:
-            ip_args.append(f'--component-name="{self.ip_component}"')
+            ip_args.append(f"--component-name={self.ip_component}")
         if self.ip_instance_name:
-            ip_args.append(f'--instance-name="{self.ip_instance_name}"')
+            ip_args.append(f"--instance-name={self.ip_instance_name}")
         if self.ip_path:
             ip_args.append(f"--output-directory={self.ip_path}")
         if self.ip_preset:
-            ip_args.append(f'--preset="{self.ip_preset}"')
+            ip_args.append(f"--preset={self.ip_preset}")
 
         for param, value in self.ip_component_params.items():
-            ip_args.append(f'--component-parameter={param}="{value}"')
+            ip_args.append(f"--component-parameter={param}={value}")
 
         return ip_args
 
     def set_deploy_cmd_args(self):
         """
-        Set up IP Deploy command
+        Set up IP Deploy command as an argument vector. No shell is involved,
+        so values are not quoted and environment variables are already expanded.
         """
         deploy_args = ["ip-deploy"]
         deploy_args.append(f"--family={self.fpga_family}")
-        deploy_args.append(f'--part="{self.part}"')
+        deploy_args.append(f"--part={self.part}")
         deploy_args.append(self.get_quartus_search_string_arg())
 
         ip_args = self.set_ip_deploy_args()
@@ -135,15 +181,261 @@ class OFS:
 
         return deploy_args
 
-    def deploy(self):
+    def get_deploy_method(self):
+        """
+        How the IP file is created: 'ip-deploy', 'script' (qsys-script running
+        the IP's own deploy script) or 'batch' (a shared qsys-script session).
+        IP files created one way are never taken for the output of another.
+        """
+        if self.deploy_backend == "batch":
+            return "batch"
+        if self.param_transport == "script":
+            return "script"
+        return "ip-deploy"
+
+    def get_deploy_hash(self):
+        """
+        Hash of the IP Deploy argument vector, of the deploy method and of the ip-deploy version
+        """
+        deploy_hash = hashlib.sha256(get_ip_deploy_version().encode())
+        deploy_hash.update(b"\0")
+        deploy_hash.update(self.get_deploy_method().encode())
+        for arg in self.set_deploy_cmd_args():
+            deploy_hash.update(b"\0")
+            deploy_hash.update(arg.encode())
+
+        return deploy_hash.hexdigest()
+
+    def _mask_target_path(self, path):
+        """
+        'path' with a leading target root directory replaced by '{target}'
+        """
+        root = os.path.normpath(self.target_rootdir)
+        norm_path = os.path.normpath(path)
+        if norm_path == root or norm_path.startswith(root.rstrip(os.sep) + os.sep):
+            return "{target}" + norm_path[len(root):]
+        return path
+
+    def get_store_arg(self, arg):
+        """
+        Deploy argument with the target root directory taken out of its paths
+        """
+        option, _, value = arg.partition("=")
+        if option == "--output-directory":
+            return f"{option}={self._mask_target_path(value)}"
+        if option == "--search-path":
+            return f"{option}=" + ",".join(self._mask_target_path(path) for path in value.split(","))
+        return arg
+
+    def get_store_key(self):
+        """
+        Deploy hash with the target root directory taken out, so the same IP
+        configuration has the same key in every work tree. The preset files on
+        the search path are hashed in, so trees with different presets don't
+        share IP files.
+        """
+        store_key = hashlib.sha256(get_ip_deploy_version().encode())
+        store_key.update(b"\0")
+        store_key.update(self.get_deploy_method().encode())
+        for arg in self.set_deploy_cmd_args():
+            store_key.update(b"\0")
+            store_key.update(self.get_store_arg(arg).encode())
+
+        if self.ip_preset:
+            store_key.update(b"\0")
+            store_key.update(self.get_preset_hash().encode())
+
+        return store_key.hexdigest()
+
+    def get_preset_hash(self):
+        """
+        Hash of the .qprs preset files on the IP's search path, or None when no preset is configured
+        """
+        if not self.ip_preset:
+            return None
+
+        preset_hash = hashlib.sha256()
+        search_string = os.path.expandvars(self.get_quartus_search_string())
+        for preset_file, file_hash in ip_store.get_preset_files(search_string):
+            preset_hash.update(f"{preset_file}={file_hash}\0".encode())
+
+        return preset_hash.hexdigest()
+
+    def get_deploy_sidecar(self):
+        """
+        File next to the IP file recording what it was deployed from
+        """
+        ip_dir, ip_name = os.path.split(self.ip_file)
+        return os.path.join(ip_dir, f".{ip_name}.deploy")
+
+    def _hash_file(self, path):
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as fIn:
+            for chunk in iter(lambda: fIn.read(1 << 20), b""):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    def is_deploy_current(self, deploy_hash):
+        """
+        The IP file was produced by the same deploy command and has not been modified since
+        """
+        try:
+            with open(self.get_deploy_sidecar()) as fIn:
+                sidecar = json.load(fIn)
+            return (
+                sidecar.get("deploy_hash") == deploy_hash
+                and sidecar.get("ip_hash") == self._hash_file(self.ip_file)
+                and sidecar.get("preset_hash") == self.get_preset_hash()
+            )
+        except (OSError, ValueError):
+            return False
+
+    def write_deploy_sidecar(self, deploy_hash):
+        sidecar = {"deploy_hash": deploy_hash, "ip_hash": self._hash_file(self.ip_file)}
+        if self.ip_preset:
+            sidecar["preset_hash"] = self.get_preset_hash()
+        with open(self.get_deploy_sidecar(), "w") as fOut:
+            json.dump(sidecar, fOut, indent=4)
+            fOut.write("\n")
+
+    def check_deploy_cache(self, deploy_hash, force=False, log_file=None):
         """
-        Execute IP Deploy command.
+        Returns True, and marks the IP as cached, when the deploy can be skipped
         """
+        if force or not self.is_deploy_current(deploy_hash):
+            return False
+
+        msg = f"IP-Deploy for {self.ip_component} skipped, {self.ip_file} is up to date"
+        if log_file:
+            with open(log_file, "w") as fOut:
+                fOut.write(f"{msg}\n")
+        logging.info(msg)
+        self.deploy_cached = True
+        return True
+
+    def prepare_deploy(self):
+        """
+        Remove the IP file, its generated tree and its sidecar before regenerating them
+        """
+        sidecar = self.get_deploy_sidecar()
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
         self.clean()
 
-        deploy_status = os.system(self.get_deploy_cmd())  # nosec
-        if deploy_status != 0:
-            raise self._errorExit("IP Deploy Failed!!")
+    def get_batch_tcl(self, tag, exit_on_fail=False):
+        """
+        Platform Designer script creating the IP file in a shared qsys-script session,
+        from the same family, part, preset and component parameters as the ip-deploy
+        command. The IP file is written with add_component/save_component from a scratch
+        system, the way fabric_gen.py writes its component IP files, with every
+        interface of the instance exported.
+        Prints an OFSS_BATCH_RESULT line tagged with 'tag' reporting success or failure,
+        and exits with an error on failure if 'exit_on_fail' is set.
+        """
+        inst = self.ip_instance_name or self.ip_output_name
+        lines = [f"# {self.ip_type}: {self.ip_file}"]
+        lines.append("if {[catch {")
+        lines.append(f"    create_system {{{self.ip_output_name}}}")
+        lines.append(f"    set_project_property DEVICE_FAMILY {{{self.fpga_family}}}")
+        lines.append(f"    set_project_property DEVICE {{{self.part}}}")
+        lines.append(f"    add_component {{{inst}}} {{{self.ip_file}}} {{{self.ip_component}}} {{{inst}}}")
+        lines.append(f"    set_instance_property {{{inst}}} AUTO_EXPORT {{true}}")
+        lines.append(f"    load_component {{{inst}}}")
+        if self.ip_preset:
+            lines.append(f"    apply_component_preset {{{self.ip_preset}}}")
+        for param, value in self.ip_component_params.items():
+            lines.append(f"    set_component_parameter_value {{{param}}} {{{value}}}")
+        lines.append("    set_component_project_property HIDE_FROM_IP_CATALOG {true}")
+        lines.append("    save_component")
+        lines.append("} err]} {")
+        lines.append(f'    puts "OFSS_BATCH_RESULT {tag} FAIL [string map {{"\\n" " "}} $err]"')
+        if exit_on_fail:
+            lines.append("    exit 1")
+        lines.append("} else {")
+        lines.append(f'    puts "OFSS_BATCH_RESULT {tag} OK"')
+        lines.append("}")
+
+        return lines
+
+    def get_deploy_log(self, log_dir=None):
+        """
+        Per-IP log file capturing the output of its ip-deploy run
+        """
+        return os.path.join(log_dir or self.log_dir, f"{self.ip_output_name}.deploy.log")
+
+    def get_deploy_script_file(self, log_file=None):
+        """
+        Script written next to the deploy log for '--param-transport script'
+        """
+        log_dir = os.path.dirname(log_file) if log_file else self.log_dir
+        return os.path.join(log_dir, f"{self.ip_output_name}.deploy.tcl")
+
+    def get_deploy_script_lines(self):
+        lines = ["package require qsys", ""]
+        lines.extend(self.get_batch_tcl(0, exit_on_fail=True))
+
+        return lines
+
+    def get_script_deploy_args(self, script_file):
+        return [
+            "qsys-script",
+            self.get_quartus_search_string_arg(),
+            f"--script={script_file}",
+        ]
+
+    def write_deploy_script(self, script_file):
+        """
+        Write the component parameters to a qsys-script script creating the IP file.
+        Returns the deploy command running it.
+        """
+        lines = self.get_deploy_script_lines()
+        with open(script_file, "w") as fOut:
+            fOut.write("\n".join(lines) + "\n")
+        self.deploy_script = (script_file, lines)
+
+        return self.get_script_deploy_args(script_file)
+
+    def deploy(self, log_file=None, force=False, timeout=None):
+        """
+        Execute IP Deploy command, killing it after 'timeout' seconds.
+        Output always goes to the IP's deploy log. Without an explicit log file,
+        it is also echoed to stdout.
+        Unless forced, the deploy is skipped when the IP file is up to date.
+        """
+        echo = log_file is None
+        if echo:
+            log_file = self.get_deploy_log()
+
+        deploy_hash = self.get_deploy_hash()
+        if self.check_deploy_cache(deploy_hash, force, log_file):
+            return
+
+        self.prepare_deploy()
+
+        store_key = self.get_store_key() if ip_store.get_store_dir() else None
+        if store_key and ip_store.fetch(self, store_key):
+            with open(log_file, "w") as fOut:
+                fOut.write(f"IP-Deploy for {self.ip_component} skipped, {self.ip_file} linked from the IP store\n")
+            self.write_deploy_sidecar(deploy_hash)
+            return
+
+        if self.param_transport == "script":
+            deploy_args = self.write_deploy_script(self.get_deploy_script_file(log_file))
+        else:
+            deploy_args = self.set_deploy_cmd_args()
+
+        self.get_deploy_cmd(deploy_args)
+        self.deploy_record = deploy_runner.run_logged(deploy_args, log_file, timeout, echo)
+        if self.deploy_record.timed_out:
+            raise self._errorExit(f"IP Deploy timed out after {timeout}s!! See {log_file}")
+        if self.deploy_record.exit_status != 0:
+            raise self._errorExit(f"IP Deploy Failed!! See {log_file}")
+
+        if os.path.isfile(self.ip_file):
+            self.write_deploy_sidecar(deploy_hash)
+            if store_key:
+                ip_store.populate(self, store_key)
 
         logging.info("=========================")
         logging.info(f"IP-Deploy for {self.ip_component} COMPLETED")
@@ -159,19 +451,28 @@ class OFS:
         msg.append("*********************************************")
         msg.append(f"{self.ip_type} IP Deploy Command:")
         msg.append("*********************************************")
-        msg.extend(self.set_deploy_cmd_args())
+        # Log the command that actually ran, if any, and the script it was given
+        if self.deploy_record is not None:
+            msg.extend(self.deploy_record.argv)
+        else:
+            msg.extend(self.set_deploy_cmd_args())
+        if self.deploy_script is not None:
+            script_file, script_lines = self.deploy_script
+            msg.append(f"--- {script_file} ---")
+            msg.extend(script_lines)
         msg.append("=============================================")
 
         msg_string = "\n".join(msg)
         with open("ip_deploy_cmds.log", "a+") as fOut:
             fOut.write(msg_string)
 
-    def get_deploy_cmd(self):
+    def get_deploy_cmd(self, deploy_args=None):
         """
         Fetch the IP Deploy Command
         """
-        deploy_args = self.set_deploy_cmd_args()
-        deploy_cmd = " ".join(deploy_args)
+        if deploy_args is None:
+            deploy_args = self.set_deploy_cmd_args()
+        deploy_cmd = shlex.join(deploy_args)
 
         logging.info("Deploy Command:")
         logging.info(f"{deploy_cmd}")
@@ -6,6 +6,8 @@
 import argparse
 import collections
 import configparser
+import copy
+import functools
 import logging
 import logging.handlers
 import os
@@ -48,13 +50,61 @@ def process_config_sections(ofss_config):
     return curr_ip_config
 
 
-def process_config_includes(ofss_config_files_queue, ofss_config):
+def process_config_includes(ofss_config):
     """
     Gather all subsequent OFSS files to be processed
     """
+    includes = []
     if "include" in ofss_config:
         for elem in ofss_config["include"]:
-            ofss_config_files_queue.append(os.path.expandvars(elem).replace('"', ""))
+            includes.append(os.path.abspath(os.path.expandvars(elem).replace('"', "")))
+
+    return includes
+
+
+@functools.lru_cache(maxsize=None)
+def read_ofss_file(ofss_file):
+    """
+    Parse one OFSS file into (ip type, sections, included files).
+    Memoized: an OFSS file shared by several configurations is only read once.
+    Callers must not modify the sections, see process_ofss_configs().
+    """
+    if not os.path.exists(ofss_file):
+        raise FileNotFoundError(f"{ofss_file} not found")
+
+    curr_config = configparser.ConfigParser(allow_no_value=True)
+    curr_config.optionxform = str
+    curr_config.read(ofss_file)
+
+    ip_type = None
+    if "ip" in curr_config:
+        ip_type = curr_config["ip"]["type"].lower()
+
+    return ip_type, process_config_sections(curr_config), process_config_includes(curr_config)
+
+
+def check_include_cycles(ofss_files):
+    """
+    Abort if any OFSS file includes itself, directly or through other includes
+    """
+    done = set()
+
+    def visit(ofss_file, include_chain):
+        if ofss_file in include_chain:
+            cycle = include_chain[include_chain.index(ofss_file):] + [ofss_file]
+            logging.info("!!Error!! OFSS include cycle:")
+            logging.info(" -> ".join(cycle))
+            sys.exit(1)
+        if ofss_file in done:
+            return
+
+        _, _, includes = read_ofss_file(ofss_file)
+        for include in includes:
+            visit(include, include_chain + [ofss_file])
+        done.add(ofss_file)
+
+    for ofss_file in ofss_files:
+        visit(ofss_file, [])
 
 
 def check_ofs_config(ofs_config):
@@ -114,28 +164,21 @@ def process_ofss_configs(ofss_list):
                 ofss_abs_path = os.path.abspath(ofss)
                 ofss_config_files_queue.append(ofss_abs_path)
 
+    check_include_cycles(ofss_config_files_queue)
+
     ofs_ip_configurations = collections.defaultdict(list)
     already_processed_configs = set()
     while ofss_config_files_queue:
-        curr_config = configparser.ConfigParser(allow_no_value=True)
-        curr_config.optionxform = str
-
         curr_ofss_file = ofss_config_files_queue.popleft()
 
-        if not os.path.exists(curr_ofss_file):
-            raise FileNotFoundError(f"{curr_ofss_file} not found")
-
         if curr_ofss_file in already_processed_configs:
             continue
 
-        ip_type = None
-        curr_config.read(curr_ofss_file)
-        if "ip" in curr_config:
-            ip_type = curr_config["ip"]["type"].lower()
-
-        process_config_includes(ofss_config_files_queue, curr_config)
+        ip_type, sections, includes = read_ofss_file(curr_ofss_file)
+        ofss_config_files_queue.extend(includes)
         if ip_type is not None:
-            ofs_ip_configurations[ip_type].append(process_config_sections(curr_config))
+            # The parsed sections are shared between configurations, and the IPs update theirs
+            ofs_ip_configurations[ip_type].append(copy.deepcopy(sections))
             check_num_ip_configs(ip_type, ofs_ip_configurations[ip_type])
 
         already_processed_configs.add(curr_ofss_file)
@@ -145,6 +188,42 @@ def process_ofss_configs(ofss_list):
     return ofs_ip_configurations
 
 
+def process_manifest(manifest_file):
+    """
+    Each section of a manifest is one configuration: its 'ofss' files
+    and the 'target' root directory its IP files are written to.
+    Returns [(name, ofss list, target)] in manifest order.
+    """
+    if not os.path.exists(manifest_file):
+        raise FileNotFoundError(f"{manifest_file} not found")
+
+    manifest = configparser.ConfigParser()
+    manifest.read(manifest_file)
+
+    targets = []
+    target_dirs = {}
+    for name in manifest.sections():
+        for key in ["ofss", "target"]:
+            if key not in manifest[name]:
+                logging.info(f"!!Error!! Manifest entry '{name}' has no '{key}'")
+                sys.exit(1)
+
+        target = os.path.abspath(os.path.expandvars(manifest[name]["target"]))
+        if target in target_dirs:
+            logging.info(f"!!Error!! Manifest entries '{target_dirs[target]}' and '{name}' share target {target}")
+            sys.exit(1)
+        target_dirs[target] = name
+
+        ofss_list = [os.path.expandvars(ofss) for ofss in manifest[name]["ofss"].split()]
+        targets.append((name, ofss_list, target))
+
+    if not targets:
+        logging.info(f"!!Error!! No configurations in manifest {manifest_file}")
+        sys.exit(1)
+
+    return targets
+
+
 def main():
     args = process_input_arguments()
     ofs_ip_configurations = process_ofss_configs(args.ofss)
@@ -7,9 +7,9 @@ import re
 import os
 import logging
 import logging.handlers
-from importlib.machinery import SourceFileLoader
 
-from ofs_ip import OFS
+from ip_param_tables import AUTO_OFSS_KEYS, expand_func_params
+from ofs_ip import OFS, load_ip_params
 
 
 class PCIe(OFS):
@@ -23,6 +23,8 @@ class PCIe(OFS):
         self.pcie_config = pcie_config
         self.ip_component = pcie_config["settings"].get("ip_component", "pcie_ss")
         self.ip_path = os.path.join(self.target_rootdir, "ipss", "pcie", "qip")
+        # axi_st_clk_freq_user_hwtcl follows IOPLL's p_clk
+        self.deploy_depends_on = ["IOPLL"]
 
         self.pf_vf_count = {}
         self.num_pfs = 0
@@ -34,6 +36,10 @@ class PCIe(OFS):
         self.PCIE_AVAILABLE_LANES = 16
         self.pcie_instances_enabled = 1
 
+        # perf_profile and link-level tuning from the [settings] section
+        self.perf_profile = None
+        self.link_settings = {}
+
         self.PCIE_SS_PARAM = None
         self.set_ip_params()
 
@@ -43,9 +49,7 @@ class PCIe(OFS):
         )
         logging.info(f"{self.ip_component} source file: {param_default_path}")
 
-        self.PCIE_SS_PARAM = SourceFileLoader(
-            f"{self.ip_component}_parameters", param_default_path
-        ).load_module()
+        self.PCIE_SS_PARAM = load_ip_params(f"{self.ip_component}_parameters")
 
     def check_configuration(self):
         """
@@ -96,6 +100,64 @@ class PCIe(OFS):
                 self._errorExit(
                     f"!!PCIe Config Error!! pcie_instances_enabled should be less than or equal to pcie_instances"
                 )
+
+        self.check_link_settings()
+
+    def get_link_gen(self):
+        """
+        PCIe generation of the link, e.g. '4', from top_topology_hwtcl
+        """
+        match = re.match(r"Gen(\d+)", self.get_top_topology() or "")
+        return match.group(1) if match else None
+
+    def check_link_settings(self):
+        """
+        Check the effective link-level values, from the defaults, the perf_profile
+        or the .ofss file, and the link they apply to
+        """
+        link_params = getattr(self.PCIE_SS_PARAM, "link_params", {})
+        gen = self.get_link_gen()
+        gen_link_params = getattr(self.PCIE_SS_PARAM, "gen_link_params", {}).get(gen, {})
+        for key, (param, allowed) in link_params.items():
+            if param not in self.ip_component_params:
+                continue
+            value = str(self.ip_component_params[param])
+            if allowed and value not in allowed:
+                self._errorExit(
+                    f"!!PCIe Config Error!! {key} should be one of {allowed}, not {value}"
+                )
+            if key in gen_link_params and value not in gen_link_params[key]:
+                self._errorExit(
+                    f"!!PCIe Config Error!! {key} should be one of {gen_link_params[key]} on a Gen{gen} link, not {value}"
+                )
+
+        if str(self.pcie_lane_width) not in ["1", "2", "4", "8", "16"]:
+            self._errorExit(
+                f"!!PCIe Config Error!! pcie_lane_width should be 1, 2, 4, 8 or 16, not {self.pcie_lane_width}"
+            )
+        if int(self.pcie_lane_width) * int(self.pcie_instances or 1) > self.PCIE_AVAILABLE_LANES:
+            self._errorExit(
+                f"!!PCIe Config Error!! {self.pcie_instances} x{self.pcie_lane_width} links need more than {self.PCIE_AVAILABLE_LANES} lanes"
+            )
+
+        if "axi_st_clk_freq" in link_params and link_params["axi_st_clk_freq"][0] in self.ip_component_params:
+            axi_st_clk_freq = str(self.ip_component_params[link_params["axi_st_clk_freq"][0]])
+            if not re.fullmatch(r"\d+(\.\d+)?MHz", axi_st_clk_freq):
+                self._errorExit(
+                    f"!!PCIe Config Error!! axi_st_clk_freq should be a frequency such as 470MHz, not {axi_st_clk_freq}"
+                )
+            # p_clk replaces the default, so only an explicit value can disagree with it
+            if "axi_st_clk_freq" in self.link_settings and self.p_clk and axi_st_clk_freq != f"{self.p_clk}MHz":
+                self._errorExit(
+                    f"!!PCIe Config Error!! axi_st_clk_freq {axi_st_clk_freq} conflicts with IOPLL p_clk {self.p_clk}MHz, which drives it"
+                )
+
+        if "msix_table_size" in link_params and link_params["msix_table_size"][0] in self.ip_component_params:
+            msix_table_size = str(self.ip_component_params[link_params["msix_table_size"][0]])
+            if not msix_table_size.isdigit() or int(msix_table_size) >= 2048:
+                self._errorExit(
+                    f"!!PCIe Config Error!! msix_table_size should be an integer below 2048, not {msix_table_size}"
+                )
              
              
 
@@ -126,9 +188,15 @@ class PCIe(OFS):
         if "pcie_lane_width" in self.pcie_config["settings"]:
             self.pcie_lane_width = self.pcie_config["settings"]["pcie_lane_width"]
 
+        self.get_link_settings()
+
         if "preset" in self.pcie_config["settings"]:
             self.ip_preset = self.pcie_config["settings"]["preset"]
             print(f"{self.ip_preset}")
+            if self.perf_profile or self.link_settings:
+                self._errorExit(
+                    f"!!PCIe Config Error!! perf_profile and link settings can't be combined with preset {self.ip_preset}"
+                )
         else:
             for (
                 pcie_param,
@@ -137,6 +205,47 @@ class PCIe(OFS):
                 self.ip_component_params[pcie_param] = pcie_param_value
                 logging.debug(f"Setting pcie config {pcie_param} to {pcie_param_value}")
 
+            link_params = getattr(self.PCIE_SS_PARAM, "link_params", {})
+            for key, value in self.link_settings.items():
+                self.ip_component_params[link_params[key][0]] = value
+                logging.debug(f"Setting pcie config {link_params[key][0]} to {value}")
+
+    def get_top_topology(self):
+        """
+        top_topology_hwtcl for this configuration, e.g. 'Gen4 1x16', or None for a preset.
+        Only reads the settings, so it can be used before process_configuration().
+        """
+        settings = self.pcie_config["settings"]
+        if "preset" in settings:
+            return None
+        if "pcie_gen" not in settings or "pcie_instances" not in settings:
+            return self.PCIE_SS_PARAM.default_component_params.get("top_topology_hwtcl")
+
+        lane_width = settings.get(
+            "pcie_lane_width", int(self.PCIE_AVAILABLE_LANES / int(settings["pcie_instances"]))
+        )
+        return f"Gen{settings['pcie_gen']} {settings['pcie_instances']}x{lane_width}"
+
+    def get_link_settings(self):
+        """
+        Link-level tuning: the perf_profile's values, overridden by any link_params keys in [settings]
+        """
+        settings = self.pcie_config["settings"]
+        link_params = getattr(self.PCIE_SS_PARAM, "link_params", {})
+        perf_profiles = getattr(self.PCIE_SS_PARAM, "perf_profiles", {})
+
+        self.perf_profile = settings.get("perf_profile")
+        if self.perf_profile is not None:
+            if self.perf_profile not in perf_profiles:
+                self._errorExit(
+                    f"!!PCIe Config Error!! perf_profile {self.perf_profile} is not one of {list(perf_profiles)} for {self.ip_component}"
+                )
+            self.link_settings.update(perf_profiles[self.perf_profile])
+
+        for key in link_params:
+            if key in settings:
+                self.link_settings[key] = settings[key]
+
     def override_pf_param_from_ofss(self, pf, param):
         """Update individual parameters from values in the OFSS file. Returns None
         if the value is not specified in the OFSS file."""
@@ -151,6 +260,10 @@ class PCIe(OFS):
 
             return None
 
+        # Every key in AUTO_OFSS_KEYS is derived above, never read from the OFSS file
+        if param in AUTO_OFSS_KEYS:
+            self._errorExit(f"!!PCIe Config Error!! {param} is listed in AUTO_OFSS_KEYS but not derived")
+
         return self.pcie_config[pf].get(param, None)
 
     def process_configuration(self):
@@ -173,9 +286,10 @@ class PCIe(OFS):
             # Update PCIe's IP file's `axi_st_clk_freq_user_hwtcl` parameter
             if self.p_clk:
                 self.ip_component_params["axi_st_clk_freq_user_hwtcl"] = f"{self.p_clk}MHz"
+                self.derived_params["axi_st_clk_freq_user_hwtcl"] = "IOPLL p_clk"
 
             if self.pcie_gen is not None and self.pcie_instances is not None:
-                self.ip_component_params["top_topology_hwtcl"] = f"Gen{self.pcie_gen} {self.pcie_instances}x{self.pcie_lane_width}"
+                self.ip_component_params["top_topology_hwtcl"] = self.get_top_topology()
 
             for pf in self.all_pfs:
                 self.process_pfs(pf)
@@ -199,7 +313,7 @@ class PCIe(OFS):
         """
         Configure PCIe's PF
         """
-        self.set_func_params(self.PCIE_SS_PARAM.func_params, pf)
+        self.set_func_params("func_params", pf)
         self.process_vfs(pf)
 
         self.ip_component_params[f"core16_{pf}_vf_count_hwtcl"] = self.pf_vf_count[pf]
@@ -221,21 +335,17 @@ class PCIe(OFS):
         self.pf_vf_count[pf] = num_vfs_in_curr_pf
 
         if num_vfs_in_curr_pf > 0:
-            self.set_func_params(self.PCIE_SS_PARAM.multi_vfs_func_params, pf)
+            self.set_func_params("multi_vfs_func_params", pf)
 
-    def set_func_params(self, param_dict, pf):
+    def set_func_params(self, table_name, pf):
         """
-        Update IP component parameters
+        Update IP component parameters from one of the func_params tables
         """
-        for param, default_value in param_dict.items():
-            pf_param = f"{param.format(func_num=pf)}"
-            # "value" will either be a list or single object. When it is a list,
-            # element 0 is the default value of the parameter. Element 1 is the
-            # name of the field in the .ofss file that can be set to override
-            # the default.
-            param_value = default_value
-            if isinstance(default_value, list):
-                param_value, ofss_param = default_value
+        expanded = expand_func_params(f"{self.ip_component}_parameters", table_name, pf)
+        for pf_param, param_value, ofss_param in expanded:
+            # An entry with an ofss key is the default value of the parameter,
+            # which that field in the .ofss file can override.
+            if ofss_param is not None:
                 override = self.override_pf_param_from_ofss(pf, ofss_param)
                 if override:
                     param_value = override
@@ -253,4 +363,10 @@ class PCIe(OFS):
         logging.info(f"Total PF Count = {self.num_pfs}")
         logging.info(f"Total VF Count = {self.num_vfs}")
         logging.info(f"PF VF Mapping = {self.pf_vf_count}")
+        if self.perf_profile or self.link_settings:
+            link_params = getattr(self.PCIE_SS_PARAM, "link_params", {})
+            logging.info(f"Performance Profile = {self.perf_profile or 'default'}")
+            for key, (param, _) in link_params.items():
+                if param in self.ip_component_params:
+                    logging.info(f"\t{key} ({param}) = {self.ip_component_params[param]}")
         logging.info("")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright 2020 Intel Corporation
+# SPDX-License-Identifier: MIT
+
+"""
+Benchmark for the streaming IPFile reader in ip_reader.py
+
+Run Command "python3 bench_ip_reader.py [--ip <.ip files>] [--root <dir>] [--largest 5] [--repeat 3]"
+
+Reads each IP file three ways: the previous reader (ET.parse of the whole
+document, every parameter group built eagerly), the streaming reader with
+all parameter groups, and the streaming reader with only the system
+parameters, as needed for IP info. Reports the best time and the peak
+Python heap of each. Defaults to the largest .ip files in the repository.
+"""
+
+import argparse
+import os
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from ip_reader import IPFile, local_tag
+
+
+class DomParameter:
+    def __init__(self, parameter, parameter_type):
+        fields = {local_tag(child.tag): child.text for child in parameter}
+        self.name = fields.get('name')
+        self.parameter_type = parameter_type
+        self.display_name = fields.get('displayName')
+        self.id = parameter.attrib['parameterId']
+        self.type = parameter.attrib['type']
+        self.value = fields.get('value') or None
+
+
+def read_dom(ip_file):
+    """
+    The previous reader: whole document in memory, all parameter groups built up front
+    """
+    root = ET.parse(ip_file).getroot()
+    vendor_extensions = root[6]
+    groups = {}
+    for extension in vendor_extensions:
+        group = local_tag(extension.tag)
+        if group in ('altera_module_parameters', 'altera_system_parameters'):
+            groups[group] = {}
+            for parameter in extension[0]:
+                param = DomParameter(parameter, group)
+                groups[group][param.name] = param
+
+    return root, groups
+
+
+def read_streaming(ip_file):
+    return IPFile(ip_file)
+
+
+def read_ip_info(ip_file):
+    return IPFile(ip_file, groups=('altera_system_parameters',)).ip_info
+
+
+def largest_ip_files(root, count):
+    ip_files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if filename.endswith('.ip'):
+                path = os.path.join(dirpath, filename)
+                ip_files.append((os.path.getsize(path), path))
+
+    return [path for size, path in sorted(ip_files, reverse=True)[:count]]
+
+
+def peak_memory(func, ip_file):
+    tracemalloc.start()
+    result = func(ip_file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+
+    return peak
+
+
+if __name__ == "__main__":
+    default_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ip', nargs='+', help="IP files to read")
+    parser.add_argument('--root', default=default_root, help="Tree searched for .ip files without --ip")
+    parser.add_argument('--largest', type=int, default=5, help="Number of the largest .ip files to read")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing repetitions, the best one is reported")
+
+    args = parser.parse_args()
+
+    ip_files = args.ip or largest_ip_files(args.root, args.largest)
+    readers = [('dom', read_dom), ('streaming', read_streaming), ('ip_info', read_ip_info)]
+    totals = {label: 0.0 for label, _ in readers}
+    for ip_file in ip_files:
+        print(f"{os.path.relpath(ip_file)} ({os.path.getsize(ip_file) / 1024:.0f} KiB)")
+        for label, func in readers:
+            best = min(timeit.repeat(lambda: func(ip_file), number=1, repeat=args.repeat))
+            totals[label] += best
+            print(f"  {label:<10} {best * 1e3:8.2f} ms  {peak_memory(func, ip_file) / 1024:8.0f} KiB peak")
+
+    print(f"total      " + "  ".join(f"{label} {t * 1e3:.2f} ms" for label, t in totals.items()))
+    print(f"speedup    streaming {totals['dom'] / totals['streaming']:.2f}x, "
+          f"ip_info {totals['dom'] / totals['ip_info']:.2f}x")
@@ -0,0 +1,191 @@
+import argparse
+import concurrent.futures
+import fnmatch
+import logging
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+
+from ip_reader import IPFile, PARAMETER_GROUPS, configure_logging
+
+DEFAULT_DB = "ip_params.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ip_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    vendor TEXT,
+    library TEXT,
+    name TEXT,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    path TEXT NOT NULL REFERENCES ip_files(path) ON DELETE CASCADE,
+    parameter_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    display_name TEXT,
+    id TEXT,
+    type TEXT,
+    value TEXT,
+    PRIMARY KEY (path, parameter_type, name)
+);
+CREATE INDEX IF NOT EXISTS parameters_name ON parameters(name);
+"""
+
+GROUP_ALIASES = {
+    'module': 'altera_module_parameters',
+    'system': 'altera_system_parameters',
+}
+
+
+def open_db(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def find_ip_files(root):
+    """
+    {absolute path: (mtime_ns, size)} for every .ip file under 'root', hidden directories skipped
+    """
+    ip_files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if filename.endswith('.ip'):
+                path = os.path.join(dirpath, filename)
+                st = os.stat(path)
+                ip_files[path] = (st.st_mtime_ns, st.st_size)
+
+    return ip_files
+
+
+def read_ip_rows(path):
+    """
+    Worker: header and parameter rows of one IP file, as plain tuples
+    """
+    try:
+        ip = IPFile(path)
+    except (ET.ParseError, KeyError) as e:
+        return path, None, [], f"{e}"
+
+    header = (ip.vendor, ip.library, ip.name, ip.version)
+    rows = []
+    for group in PARAMETER_GROUPS:
+        for param in ip.get_parameters(group).values():
+            rows.append((path, group, param.name, param.display_name, param.id, param.type, param.value))
+
+    return path, header, rows, None
+
+
+def scan(root, db_file=DEFAULT_DB, jobs=None):
+    """
+    Bring the database up to date with the .ip files under 'root'.
+    Only files that are new or whose mtime or size changed are parsed,
+    across a process pool. Files no longer in the tree, and files that
+    no longer parse, are dropped, so queries never return stale values.
+    Returns the number of files parsed.
+    """
+    root = os.path.abspath(root)
+    ip_files = find_ip_files(root)
+    conn = open_db(db_file)
+
+    known = {
+        path: (mtime_ns, size)
+        for path, mtime_ns, size in conn.execute("SELECT path, mtime_ns, size FROM ip_files")
+        if path.startswith(root + os.sep)
+    }
+    removed = [path for path in known if path not in ip_files]
+    changed = [path for path, stat in ip_files.items() if known.get(path) != stat]
+
+    with conn:
+        conn.executemany("DELETE FROM ip_files WHERE path = ?", [(path,) for path in removed])
+
+    parsed = 0
+    failed = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for path, header, rows, error in executor.map(read_ip_rows, sorted(changed), chunksize=4):
+            if error is not None:
+                logging.info(f"Skipping {path}: {error}")
+                with conn:
+                    conn.execute("DELETE FROM ip_files WHERE path = ?", (path,))
+                failed += 1
+                continue
+            with conn:
+                conn.execute("DELETE FROM ip_files WHERE path = ?", (path,))
+                conn.execute(
+                    "INSERT INTO ip_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, *ip_files[path], *header),
+                )
+                conn.executemany("INSERT OR REPLACE INTO parameters VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            parsed += 1
+
+    conn.close()
+    logging.info(
+        f"Scanned {len(ip_files)} IP files under {root}: "
+        f"{parsed} parsed, {failed} failed, {len(ip_files) - len(changed)} unchanged, {len(removed)} removed"
+    )
+
+    return parsed
+
+
+def query(params, db_file=DEFAULT_DB, group=None, ip_pattern=None):
+    """
+    (path, parameter_type, name, value, type) for each parameter in 'params' across all IPs.
+    Parameter names accept shell wildcards; 'ip_pattern' filters on the IP file path.
+    """
+    conn = open_db(db_file)
+    sql = "SELECT path, parameter_type, name, value, type FROM parameters WHERE name GLOB ?"
+    sql_args = []
+    if group:
+        sql += " AND parameter_type = ?"
+        sql_args.append(GROUP_ALIASES.get(group, group))
+
+    results = []
+    for param in params:
+        for row in conn.execute(sql + " ORDER BY path, parameter_type", [param] + sql_args):
+            if ip_pattern and not fnmatch.fnmatch(row[0], ip_pattern):
+                continue
+            results.append(row)
+
+    conn.close()
+    return results
+
+
+def process_input_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite parameter database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Parse the .ip files under a tree into the database")
+    scan_parser.add_argument("root", nargs="?", default=".", help="Tree to scan for .ip files")
+    scan_parser.add_argument("--jobs", type=int, default=None, help="Parser processes, defaults to the CPU count")
+
+    query_parser = subparsers.add_parser("query", help="Look up parameters across all scanned IPs")
+    query_parser.add_argument("params", nargs="+", help="Parameter names, shell wildcards allowed")
+    query_parser.add_argument("--group", choices=sorted(GROUP_ALIASES), help="Only module or system parameters")
+    query_parser.add_argument("--ip", dest="ip_pattern", help="Only IP files matching this path pattern, e.g. '*pcie*'")
+
+    args = parser.parse_args()
+    if args.command == "scan" and args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    return args
+
+
+def main():
+    configure_logging()
+    args = process_input_arguments()
+
+    if args.command == "scan":
+        scan(args.root, args.db, args.jobs)
+    else:
+        for path, group, name, value, param_type in query(args.params, args.db, args.group, args.ip_pattern):
+            logging.info(f"{os.path.relpath(path)}\t{group}\t{name} = {value} ({param_type})")
+
+
+if __name__ == "__main__":
+    main()
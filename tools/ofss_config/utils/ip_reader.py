@@ -5,90 +5,231 @@ import os
 import sys
 import xml.etree.ElementTree as ET
 
-IP_ROOT_CHILDREN = {
-    'vendor' : 0,
-    'library': 1, 
-    'name': 2, 
-    'version': 3, 
-    'bus_interfaces': 4, 
-    'model': 5, 
-    'vendor_extensions': 6
-}
-
-VENDOR_EXT_CHILDREN = {
-    'entity_info': 0, 
-    'altera_module_parameters': 1, 
-    'altera_system_parameters': 2, 
-    'altera_interface_boundary': 3, 
-    'altera_has_warnings': 4, 
-    'altera_has_errors': 5
-}
-
-PARAM_CHILDREN = {
-    'name': 0, 
-    'display_name': 1, 
-    'value': 2
-}
+PARAMETER_GROUPS = ('altera_module_parameters', 'altera_system_parameters')
+HEADER_FIELDS = ('vendor', 'library', 'name', 'version')
+IP_INFO = ('device', 'deviceFamily', 'deviceSpeedGrade', 'generationId')
+
+PARAM_FIELDS = ('name', 'displayName', 'value')
+
+
+def local_tag(tag):
+    """
+    Element tag without its XML namespace
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def find_child(elem, tag):
+    """
+    First direct child of 'elem' with the given tag, ignoring namespaces
+    """
+    for child in elem:
+        if local_tag(child.tag) == tag:
+            return child
+
+    return None
+
+
+def child_text(elem, tag):
+    child = find_child(elem, tag)
+    return child.text if child is not None else None
+
+
+def get_port_width(port):
+    """
+    Width of a model port from its wire vector: 1 for scalar ports, None if not numeric
+    """
+    wire = find_child(port, 'wire')
+    vectors = find_child(wire, 'vectors') if wire is not None else None
+    vector = find_child(vectors, 'vector') if vectors is not None else None
+    if vector is None:
+        return 1
+
+    try:
+        return abs(int(child_text(vector, 'left')) - int(child_text(vector, 'right'))) + 1
+    except (TypeError, ValueError):
+        return None
+
 
 class AlteraParameter:
+    __slots__ = ('name', 'parameter_type', 'display_name', 'id', 'type', 'value')
+
     def __init__(self, parameter, parameter_type):
-       self.name = parameter[PARAM_CHILDREN['name']].text
-       self.parameter_type = parameter_type
-       self.display_name = parameter[PARAM_CHILDREN['display_name']].text
-       self.id = parameter.attrib['parameterId']
-       self.type = parameter.attrib['type']
-       self.value = parameter[PARAM_CHILDREN['value']].text if parameter[PARAM_CHILDREN['value']].text else None
+        fields = {local_tag(child.tag): child.text for child in parameter}
+        self.name = fields.get('name')
+        self.parameter_type = parameter_type
+        self.display_name = fields.get('displayName')
+        self.id = parameter.attrib['parameterId']
+        self.type = parameter.attrib['type']
+        self.value = fields.get('value') or None
 
     def get_info(self):
         return f"{self.value} ({self.type})"
 
+
 class IPFile:
-    def __init__(self, ip_file):
+    """
+    Streaming reader for IP-XACT .ip files.
+    Elements are resolved by tag and discarded once read. Only the requested
+    parameter groups are loaded; other groups are read on first access.
+    """
+    def __init__(self, ip_file, groups=PARAMETER_GROUPS):
         self.ip_file = ip_file
-        self.root = self.get_ip_root()
-
-        # Root Children: 
-        self.vendor = self.root[IP_ROOT_CHILDREN['vendor']].text
-        self.library = self.root[IP_ROOT_CHILDREN['library']].text
-        self.name = self.root[IP_ROOT_CHILDREN['name']].text
-        self.version = self.root[IP_ROOT_CHILDREN['version']].text
-        self.bus_interfaces = self.root[IP_ROOT_CHILDREN['bus_interfaces']]
-        self.model = self.root[IP_ROOT_CHILDREN['model']]
-        self.vendor_extensions = self.root[IP_ROOT_CHILDREN['vendor_extensions']]
-
-        # Vendor Extensions:
-        self.altera_module_parameters = self.get_parameters('altera_module_parameters')
-        self.altera_system_parameters = self.get_parameters('altera_system_parameters')
-        
-        # IP Info
-        self.ip_info = {}
-        self.get_ip_info()
 
-    def get_ip_root(self):
-        tree = ET.parse(self.ip_file)
-        root = tree.getroot()
+        # Root Children:
+        self.vendor = None
+        self.library = None
+        self.name = None
+        self.version = None
 
-        return root
+        # Vendor Extensions, by group name
+        self.parameter_groups = {}
+        self.read(groups)
 
-    def get_ip_info(self):
-        information = ['device', 'deviceFamily', 'deviceSpeedGrade', 'generationId']
-        for info in information:
-            self.ip_info[info] = self.altera_system_parameters[info].value
+        # Bus interfaces and model ports, read on first access
+        self._interfaces = None
+        self._interface_parameters = None
+        self._port_widths = None
+        self._class_name = None
+
+    @property
+    def altera_module_parameters(self):
+        return self.get_parameters('altera_module_parameters')
+
+    @property
+    def altera_system_parameters(self):
+        return self.get_parameters('altera_system_parameters')
+
+    @property
+    def interfaces(self):
+        """
+        {interface: [physical port names]} for each bus interface of the IP
+        """
+        self.read_interfaces()
+        return self._interfaces
+
+    @property
+    def interface_parameters(self):
+        self.read_interfaces()
+        return self._interface_parameters
+
+    @property
+    def port_widths(self):
+        self.read_interfaces()
+        return self._port_widths
+
+    @property
+    def class_name(self):
+        """
+        Component type of the IP's instance, e.g. altera_iopll
+        """
+        self.read_interfaces()
+        return self._class_name
+
+    @property
+    def ip_info(self):
+        system_parameters = self.altera_system_parameters
+        return {
+            info: system_parameters[info].value if info in system_parameters else None
+            for info in IP_INFO
+        }
+
+    def read(self, groups=()):
+        """
+        Single pass over the file, collecting the header and the requested
+        parameter groups. Only end events are handled: a 'parameters' list is
+        kept until the element closing it shows which group it belongs to,
+        everything else is cleared as soon as it is read. Stops as soon as
+        everything requested is read.
+        """
+        pending = set(groups) - set(self.parameter_groups)
+        read_header = self.version is None
+        if not pending and not read_header:
+            return
+
+        found = {}
+        params = []
+        completed = []
+        for _, elem in ET.iterparse(self.ip_file):
+            tag = local_tag(elem.tag)
+            if read_header:
+                # vendor, library, name and version open the file, version last
+                if tag in HEADER_FIELDS:
+                    setattr(self, tag, elem.text)
+                read_header = tag != 'version'
+                continue
+
+            if tag in PARAM_FIELDS:
+                # Read with their parameter
+                continue
+            if tag == 'parameter':
+                params.append(elem)
+                continue
+            if tag == 'parameters':
+                completed, params = params, []
+                continue
+
+            if tag in pending:
+                found[tag] = {}
+                for param in (AlteraParameter(p, tag) for p in completed):
+                    found[tag][param.name] = param
+                pending.discard(tag)
+
+            for param in completed:
+                param.clear()
+            completed = []
+            elem.clear()
+
+            if not pending:
+                break
+
+        for group in pending:
+            found[group] = {}
+        self.parameter_groups.update(found)
+
+    def read_interfaces(self):
+        """
+        Separate pass for the bus interfaces, the model's port widths and the
+        instance's class name. Stops at the entity info, before the parameters.
+        """
+        if self._interfaces is not None:
+            return
+
+        self._interfaces = {}
+        self._interface_parameters = {}
+        self._port_widths = {}
+        for _, elem in ET.iterparse(self.ip_file):
+            tag = local_tag(elem.tag)
+            if tag == 'busInterface':
+                name = child_text(elem, 'name')
+                self._interfaces[name] = [
+                    child_text(port, 'name')
+                    for port in elem.iter() if local_tag(port.tag) == 'physicalPort'
+                ]
+                parameters = find_child(elem, 'parameters')
+                self._interface_parameters[name] = {
+                    child_text(param, 'name'): child_text(param, 'value') or ''
+                    for param in (parameters if parameters is not None else [])
+                }
+                elem.clear()
+            elif tag == 'port':
+                self._port_widths[child_text(elem, 'name')] = get_port_width(elem)
+                elem.clear()
+            elif tag == 'entity_info':
+                self._class_name = child_text(elem, 'name')
+                break
+
+    def get_parameters(self, parameter_type):
+        if parameter_type not in self.parameter_groups:
+            self.read([parameter_type])
+
+        return self.parameter_groups[parameter_type]
 
     def dump_ip_info(self):
         logging.info(f'IP: {self.name}')
         for k, v in self.ip_info.items():
             logging.info(f'\t{k}: {v}')
 
-    def get_parameters(self, parameter_type):
-        parameters = {}
-    
-        for parameter in self.vendor_extensions[VENDOR_EXT_CHILDREN[parameter_type]][0]:
-            curr_param = AlteraParameter(parameter, parameter_type)
-            parameters[curr_param.name] = curr_param
-
-        return parameters
-
     def dump_to_log(self):
         sorted_module_parameters = sorted(self.altera_module_parameters.keys()) 
         sorted_system_parameters = sorted(self.altera_system_parameters.keys()) 